@@ -8,17 +8,23 @@ import re
 import os
 import io
 import torch
-import torchaudio
 import numpy as np
-from typing import Dict, Tuple, List, Any
+from typing import Dict, Tuple, List, Any, BinaryIO, Optional, Union
 from funasr import AutoModel
 import logging
-import torch.nn.functional as F
 try:
-    import jieba
-    import jieba.analyse
+    from funasr.utils.vad_utils import merge_vad
 except ImportError:
-    jieba = None
+    merge_vad = None
+
+from audio_frontend import decode_audio
+from batcher import MicroBatcher
+from ingest import AudioTooLongError, UploadRejected
+from keywords import KeywordEngine
+from metrics import stage_timer
+from silence_gate import SilenceGate
+from speaker_store import cosine_similarity_matrix
+from tag_parser import TagParser
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +34,7 @@ class SpeakerVerifier:
     
     def __init__(self, model_path="damo/speech_campplus_sv_zh-cn_16k-common"):
         """初始化声纹模型"""
+        self.silence_gate: Optional[SilenceGate] = None
         logger.info(f"Loading Speaker Verification model from: {model_path}")
         self.model = AutoModel(
             model=model_path,
@@ -36,13 +43,21 @@ class SpeakerVerifier:
         )
         logger.info("Speaker Verification model loaded successfully")
 
-    def get_embedding(self, audio_bytes: bytes) -> np.ndarray:
-        """从音频中提取声纹特征向量"""
-        # 预处理音频 (借用 EmotionAnalyzer 的逻辑)
-        analyzer_temp = EmotionAnalyzer(load_model=False)
-        audio_array, _ = analyzer_temp._preprocess_audio(audio_bytes)
-        
-        # 运行推理
+    def get_embedding(self, audio: Union[bytes, BinaryIO], audio_stats: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """从音频(字节或文件对象)中提取声纹特征向量 (audio_stats 见 embed)"""
+        audio_array, _ = decode_audio(audio)
+        return self.embed(audio_array, audio_stats)
+
+    def embed(self, audio_array: np.ndarray, audio_stats: Optional[Dict[str, float]] = None) -> Optional[np.ndarray]:
+        """
+        从已解码的 16kHz 单声道音频中提取声纹特征向量 (启用静音门限时先裁剪并检查语音时长)
+
+        audio_stats: 可选, 写入静音门限的输入/语音/裁剪时长 (input_s / speech_s / trimmed_s)
+        """
+        if self.silence_gate is not None:
+            gated = self.silence_gate.apply(audio_array)
+            gated.record(audio_stats)
+            audio_array = gated.audio
         result = self.model.generate(input=audio_array)
         
         # 返回 Embedding (通常是一个 1D-vector)
@@ -51,6 +66,10 @@ class SpeakerVerifier:
             return result[0]["spk_embedding"]
         return None
 
+    def warm_up(self, audio_array: np.ndarray):
+        """用一段合成音频完成首次推理 (初始化算子与内存), 之后的请求不再承担首次开销"""
+        self.model.generate(input=audio_array)
+
     @staticmethod
     def calculate_similarity(emb1: Any, emb2: Any) -> float:
         """计算两个声纹向量的余弦相似度"""
@@ -67,16 +86,8 @@ class SpeakerVerifier:
             print(f"DEBUG: Invalid types for similarity: {type(emb1)} {type(emb2)}")
             return 0.0
 
-        # Flatten to ensure (D,) shape instead of (1, D)
-        emb1 = emb1.flatten()
-        emb2 = emb2.flatten()
-
-        t1 = torch.from_numpy(emb1).float()
-        t2 = torch.from_numpy(emb2).float()
-        
-        # Cosine Similarity
-        similarity = F.cosine_similarity(t1.unsqueeze(0), t2.unsqueeze(0))
-        return float(similarity.item())
+        # 展平为 (D,) 后按 NumPy 计算, 不再经过 torch 张量转换
+        return float(cosine_similarity_matrix(emb1.flatten(), emb2.flatten())[0, 0])
 
 
 class EmotionAnalyzer:
@@ -104,8 +115,30 @@ class EmotionAnalyzer:
         "<|Cough|>": "cough",
     }
     
-    def __init__(self, model_path="iic/SenseVoiceSmall", load_model=True):
-        """初始化 SenseVoice 模型"""
+    # 语言标签 (整体结果按此顺序取第一个出现的语言)
+    LANGUAGE_DICT = {
+        "<|zh|>": "zh",
+        "<|en|>": "en",
+        "<|yue|>": "yue",
+        "<|ja|>": "ja",
+        "<|ko|>": "ko",
+    }
+    
+    # 单次扫描的标签解析器 (见 tag_parser.py)
+    TAG_PARSER = TagParser(EMO_DICT, EVENT_DICT, LANGUAGE_DICT)
+    
+    # VAD 单段最大时长 (毫秒); 长音频分窗分析 (long_audio.py) 的窗口与之对齐
+    MAX_SEGMENT_MS = 30000
+    
+    # VAD 合并后单段最大时长 (毫秒), 与 generate(merge_vad=True) 的默认值一致
+    MERGE_LENGTH_MS = 15000
+    
+    def __init__(self, model_path="iic/SenseVoiceSmall", load_model=True, keyword_engine: Optional[KeywordEngine] = None):
+        """初始化 SenseVoice 模型 (keyword_engine: 共享的关键词引擎, 默认新建一个, 在预热或第一次提取时加载)"""
+        self.batcher = None
+        self.max_duration_s: Optional[float] = None  # 解码后的时长上限, None 表示不限制
+        self.silence_gate: Optional[SilenceGate] = None  # 推理前的静音门限, None 表示关闭
+        self.keyword_engine = keyword_engine or KeywordEngine()  # 关键词提取 (见 keywords.py)
         if not load_model:
             return
             
@@ -123,19 +156,26 @@ class EmotionAnalyzer:
         self.model = AutoModel(
             model=model_path,
             vad_model="iic/speech_fsmn_vad_zh-cn-16k-common-pytorch",
-            vad_kwargs={"max_single_segment_time": 30000},
+            vad_kwargs={"max_single_segment_time": self.MAX_SEGMENT_MS},
             trust_remote_code=True,
         )
         
         logger.info("SenseVoice model loaded successfully")
         print("DEBUG: SenseVoice model loaded successfully!")
     
-    def analyze(self, audio_bytes: bytes) -> Dict:
+    def analyze(
+        self,
+        audio: Union[bytes, BinaryIO],
+        timings: Optional[Dict[str, float]] = None,
+        audio_stats: Optional[Dict[str, float]] = None
+    ) -> Dict:
         """
         分析音频情感
         
         参数:
-            audio_bytes: 音频字节数据
+            audio: 音频字节数据或可 seek 的文件对象
+            timings: 可选, 写入各阶段耗时(毫秒): decode / generate / parse / keywords
+            audio_stats: 可选, 写入静音门限的输入/语音/裁剪时长(秒): input_s / speech_s / trimmed_s
         
         返回:
             {
@@ -148,10 +188,91 @@ class EmotionAnalyzer:
                 "language": "zh"
             }
         """
-        # 预处理音频
-        audio_array, sample_rate = self._preprocess_audio(audio_bytes)
+        return self.analyze_array(self.decode(audio, timings, audio_stats), timings)
+    
+    def decode(
+        self,
+        audio: Union[bytes, BinaryIO],
+        timings: Optional[Dict[str, float]] = None,
+        audio_stats: Optional[Dict[str, float]] = None
+    ) -> np.ndarray:
+        """
+        解码为 16kHz 单声道 float32 并检查时长上限; 启用静音门限时裁剪首尾静音
+        (解码结果可供声纹模型共用; audio_stats 同 analyze)
+        
+        异常:
+            AudioTooLongError / SpeechTooShortError
+        """
+        with stage_timer(timings, "decode"):
+            audio_array, sample_rate = self._preprocess_audio(audio)
+        if self.max_duration_s and len(audio_array) > self.max_duration_s * sample_rate:
+            raise AudioTooLongError(f"Audio longer than {self.max_duration_s:.0f}s")
+        if self.silence_gate is not None:
+            with stage_timer(timings, "silence_gate"):
+                gated = self.silence_gate.apply(audio_array)
+            gated.record(audio_stats)
+            audio_array = gated.audio
+        return audio_array
+    
+    def analyze_array(self, audio_array: np.ndarray, timings: Optional[Dict[str, float]] = None) -> Dict:
+        """分析已解码的音频 (格式同 analyze 的返回值)"""
+        # 运行 SenseVoice 推理 (启用微批处理时与并发请求合并为一批)
+        with stage_timer(timings, "generate"):
+            if self.batcher is not None:
+                raw_text = self.batcher.infer(audio_array)
+            else:
+                raw_text = self._generate(audio_array)
+        
+        return self._parse_result(raw_text, timings)
+    
+    def analyze_batch(
+        self,
+        audios: List[Union[bytes, BinaryIO]],
+        timings: Optional[Dict[str, float]] = None
+    ) -> List[Union[Dict, UploadRejected]]:
+        """
+        批量分析多段音频: 逐段解码后一次批量推理
+        
+        单个文件无法解码、超长或语音不足时只影响该条目, 其余条目照常推理
+        
+        返回:
+            与输入顺序一致的列表: 成功的条目为分析结果 (格式同 analyze),
+            失败的条目为对应的 UploadRejected 异常 (AudioDecodeError / AudioTooLongError / SpeechTooShortError)
+        """
+        results: List[Union[Dict, UploadRejected, None]] = []
+        audio_arrays = []
+        for index, audio in enumerate(audios):
+            try:
+                audio_arrays.append(self.decode(audio, timings))
+                results.append(None)
+            except UploadRejected as e:
+                logger.warning(f"Batch item {index} rejected: {e}")
+                results.append(e)
         
-        # 运行 SenseVoice 推理
+        if audio_arrays:
+            with stage_timer(timings, "generate"):
+                raw_texts = iter(self.generate_batch(audio_arrays))
+            for index, result in enumerate(results):
+                if result is None:
+                    results[index] = self._parse_result(next(raw_texts), timings)
+        return results
+    
+    def warm_up(self, audio_array: np.ndarray):
+        """用一段合成音频完成首次推理 (VAD + ASR), 并提前加载关键词词典"""
+        self.keyword_engine.load()
+        self._parse_result(self._generate(audio_array))
+    
+    def enable_batching(self, max_batch_size: int = 8, max_wait_ms: float = 20.0):
+        """启用跨请求的动态微批处理"""
+        self.batcher = MicroBatcher(
+            self.generate_batch,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            name="sensevoice-batcher"
+        )
+    
+    def _generate(self, audio_array: np.ndarray) -> str:
+        """单段音频推理, 返回带标签的原始文本"""
         result = self.model.generate(
             input=audio_array,
             cache={},
@@ -160,15 +281,87 @@ class EmotionAnalyzer:
             batch_size_s=60,
             merge_vad=True
         )
+        return result[0]["text"]
+    
+    def generate_batch(self, audio_arrays: List[np.ndarray]) -> List[str]:
+        """
+        对多段音频执行一次批量推理
+        
+        参数:
+            audio_arrays: 16kHz 单声道波形列表
+        
+        返回:
+            与输入顺序一致的原始文本列表
+        """
+        if len(audio_arrays) == 1:
+            return [self._generate(audio_arrays[0])]
+        
+        try:
+            return self._generate_vad_batch(audio_arrays)
+        except Exception as e:
+            logger.warning(f"Batched inference failed, falling back to per-clip generate: {e}")
+            return [self._generate(audio_array) for audio_array in audio_arrays]
+    
+    def _generate_vad_batch(self, audio_arrays: List[np.ndarray]) -> List[str]:
+        """
+        先逐段做 VAD 切分, 再把所有请求的语音段合并为一批送入 SenseVoice
+        
+        model.generate 对列表输入仍逐条处理, 因此这里直接调用 VAD 与 ASR 两个阶段
+        """
+        model = self.model
+        
+        # 1. VAD 切分 (毫秒区间)
+        vad_results = model.inference(
+            audio_arrays, model=model.vad_model, kwargs=dict(model.vad_kwargs), disable_pbar=True
+        )
+        
+        segments = []
+        owners = []
+        for index, (audio_array, vad_result) in enumerate(zip(audio_arrays, vad_results)):
+            spans = vad_result["value"]
+            if merge_vad is not None:
+                spans = merge_vad(spans, self.MERGE_LENGTH_MS)
+            for beg_ms, end_ms in spans:
+                segment = audio_array[int(beg_ms * 16):int(end_ms * 16)]
+                if len(segment) > 0:
+                    segments.append(segment)
+                    owners.append(index)
+        
+        texts = [""] * len(audio_arrays)
+        if not segments:
+            return texts
+        
+        # 2. 按长度排序减少 padding, 一次批量推理
+        order = sorted(range(len(segments)), key=lambda i: len(segments[i]))
+        results = model.inference(
+            [segments[i] for i in order],
+            model=model.model,
+            kwargs=dict(model.kwargs),
+            language="auto",
+            use_itn=True,
+            batch_size=len(segments),
+            disable_pbar=True
+        )
         
-        # 解析结果
-        raw_text = result[0]["text"]
+        # 3. 按原始顺序拼回各请求
+        seg_texts = [""] * len(segments)
+        for i, result in zip(order, results):
+            seg_texts[i] = result["text"]
+        for owner, text in zip(owners, seg_texts):
+            texts[owner] += text
         
-        emotion, intensity = self._extract_emotion(raw_text)
-        events = self._extract_events(raw_text)
-        language = self._extract_language(raw_text)
-        clean_text = self._clean_text(raw_text)
-        keywords = self._extract_keywords(clean_text)
+        return texts
+    
+    def _parse_result(self, raw_text: str, timings: Optional[Dict[str, float]] = None) -> Dict:
+        """解析 SenseVoice 原始输出 (一次扫描得到整体结果与逐段时间线)"""
+        with stage_timer(timings, "parse"):
+            parsed = self.TAG_PARSER.parse(raw_text)
+            emotion, intensity = self._dominant_emotion(parsed.emotion_counts)
+            events = [event for event in self.EVENT_DICT.values() if event in parsed.events and event not in ['speech', 'breath']]
+            language = next((lang for lang in self.LANGUAGE_DICT.values() if lang in parsed.languages), "unknown")
+            clean_text = parsed.text
+        with stage_timer(timings, "keywords"):
+            keywords = self._extract_keywords(clean_text)
         
         return {
             "emotion": emotion,
@@ -178,53 +371,18 @@ class EmotionAnalyzer:
             "events": events,
             "raw_text": clean_text,
             "language": language,
+            "timeline": parsed.segments,  # 逐段 (VAD 段) 的语言/情感/事件/文本及文本偏移
             "full_result": raw_text  # 保留原始结果用于调试
         }
     
-    def _preprocess_audio(self, audio_bytes: bytes) -> Tuple[np.ndarray, int]:
-        """预处理音频数据"""
-        # 从字节加载音频
-        audio_buffer = io.BytesIO(audio_bytes)
-        
-        try:
-            # 尝试加载音频
-            waveform, sample_rate = torchaudio.load(audio_buffer)
-        except Exception as e:
-            # 如果失败，尝试作为原始 PCM 数据
-            audio_array = np.frombuffer(audio_bytes, dtype=np.int16)
-            audio_array = audio_array.astype(np.float32) / 32768.0
-            sample_rate = 16000
-            
-            return audio_array, sample_rate
-        
-        # 转换为 numpy
-        audio_array = waveform.numpy()
-        
-        # 转为单声道
-        if len(audio_array.shape) > 1 and audio_array.shape[0] > 1:
-            audio_array = audio_array.mean(axis=0)
-        else:
-            audio_array = audio_array.squeeze()
-        
-        # 重采样到 16kHz
-        if sample_rate != 16000:
-            resampler = torchaudio.transforms.Resample(sample_rate, 16000)
-            audio_tensor = torch.from_numpy(audio_array).float()
-            if len(audio_tensor.shape) == 1:
-                audio_tensor = audio_tensor.unsqueeze(0)
-            audio_array = resampler(audio_tensor).squeeze().numpy()
-            sample_rate = 16000
-        
-        return audio_array, sample_rate
+    def _preprocess_audio(self, audio: Union[bytes, BinaryIO]) -> Tuple[np.ndarray, int]:
+        """预处理音频数据 (字节或文件对象), 返回 16kHz 单声道 float32 (见 audio_frontend.py)"""
+        return decode_audio(audio)
     
-    def _extract_emotion(self, text: str) -> Tuple[str, float]:
-        """提取情感标签和强度"""
-        emotion_counts = {}
-        
-        for tag, emotion in self.EMO_DICT.items():
-            count = text.count(tag)
-            if count > 0:
-                emotion_counts[emotion] = count
+    def _dominant_emotion(self, emotion_counts: Dict[str, int]) -> Tuple[str, float]:
+        """由各情感出现次数得出主情感和强度"""
+        # 按 EMO_DICT 顺序排列, 次数相同时取靠前的情感
+        emotion_counts = {emotion: emotion_counts[emotion] for emotion in self.EMO_DICT.values() if emotion in emotion_counts}
         
         if not emotion_counts:
             return "NEUTRAL", 0.5
@@ -244,72 +402,17 @@ class EmotionAnalyzer:
             
         return dominant_emotion, intensity
     
-    def _extract_events(self, text: str) -> List[str]:
-        """提取音频事件"""
-        events = []
-        
-        for tag, event in self.EVENT_DICT.items():
-            if tag in text and event not in ['speech', 'breath']:
-                events.append(event)
-        
-        return events
-    
-    def _extract_language(self, text: str) -> str:
-        """提取检测到的语言"""
-        lang_tags = {
-            "<|zh|>": "zh",
-            "<|en|>": "en",
-            "<|yue|>": "yue",
-            "<|ja|>": "ja",
-            "<|ko|>": "ko",
-        }
-        
-        for tag, lang in lang_tags.items():
-            if tag in text:
-                return lang
-        
-        return "unknown"
-    
     def _clean_text(self, text: str) -> str:
-        """清理文本，移除所有标签"""
-        # 移除所有 <|xxx|> 格式的标签
-        cleaned = re.sub(r'<\|[^>]+\|>', '', text)
-        
-        # 移除多余空格
-        cleaned = ' '.join(cleaned.split())
-        
-        return cleaned.strip()
+        """清理文本，移除所有标签并规整空白"""
+        return self.TAG_PARSER.parse(text).text
     
     def _extract_keywords(self, text: str, max_keywords: int = 4) -> List[str]:
-        """使用 jieba 进行关键词提取，如果不可用则退回到词频"""
-        if not text:
+        """TF-IDF 关键词 (jieba / 英文分词 + 领域词典 + 语料 IDF, 见 keywords.py)"""
+        try:
+            return self.keyword_engine.extract(text, max_keywords)
+        except Exception as e:
+            logger.warning(f"Keyword extraction failed: {e}")
             return []
-            
-        if jieba:
-            try:
-                # 使用 TF-IDF 算法提取关键词
-                keywords = jieba.analyse.extract_tags(text, topK=max_keywords)
-                if keywords:
-                    return keywords
-            except Exception as e:
-                logger.warning(f"Jieba extraction failed: {e}")
-
-        # --- Fallback to simple logic (with better Chinese support) ---
-        # 这种简单的正则在中文下通常会把整句当作一个词
-        words = re.findall(r'[\u4e00-\u9fa5]{2,}|[a-zA-Z]{3,}', text)
-        
-        # 过滤停用词
-        stop_words = {'的', '了', '是', '我', '你', '他', '她', '它', '我们', '你们', '他们', '这个', '那个', '一个'}
-        words = [w for w in words if w not in stop_words]
-        
-        # 统计词频
-        word_freq = {}
-        for word in words:
-            word_freq[word] = word_freq.get(word, 0) + 1
-        
-        # 按频率排序，取前 N 个
-        sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-        return [word for word, freq in sorted_words[:max_keywords]]
 
 
 # 测试代码
@@ -0,0 +1,432 @@
+# ann_index.py - 声纹近似最近邻索引 (IVF + 乘积量化)
+"""
+一人多号 (Sybil) 检查: 每次提交反馈都要回答 "这个声音是否已经以其他用户注册过",
+声纹库规模变大后逐个比较 (speaker_store.py 的精确检索) 的开销随 N 线性增长
+
+- 粗量化 (IVF): k-means 把声纹分成 nlist 个簇, 查询只扫描最近的 nprobe 个簇
+- 乘积量化 (PQ): 向量减去所在簇中心后的残差切成 m 个子向量, 每个子向量用 256 个码字之一表示;
+  192 维 float32 (768 字节) 压缩为 m 字节
+- 内积按非对称距离计算 (ADC): q·x ≈ q·c + Σ_j table[j, code_j], 查询表每次查询只算一次
+- 召回率可调: nprobe 越大扫描越多; 近似得分取前 k x rerank 个候选后, 用声纹库中的原始向量精确重排
+
+纯 NumPy 实现, 训练与编码按块计算; 索引持久化为 .npz (不使用 pickle)
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from speaker_store import SpeakerStore, normalize
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "ivfpq.npz"
+TRAIN_POINTS_PER_CENTROID = 32  # 每个聚类中心的训练样本数 (上限)
+
+
+def _nearest(data: np.ndarray, centroids: np.ndarray, chunk: int = 16384) -> np.ndarray:
+    """每行最近 (欧氏距离) 的中心下标; 按块计算, 距离矩阵不超过 chunk x k"""
+    squared_norms = np.einsum("ij,ij->i", centroids, centroids)
+    labels = np.empty(len(data), dtype=np.int32)
+    for start in range(0, len(data), chunk):
+        block = data[start:start + chunk]
+        labels[start:start + chunk] = np.argmin(squared_norms - 2.0 * (block @ centroids.T), axis=1)
+    return labels
+
+
+def kmeans(data: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """
+    Lloyd k-means
+
+    参数:
+        data: 训练样本 (n x d), n >= k
+        k: 中心数
+
+    返回:
+        中心 (k x d, float32)
+    """
+    data = np.ascontiguousarray(data, dtype=np.float32)
+    if len(data) < k:
+        raise ValueError(f"k-means needs at least {k} samples, got {len(data)}")
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), k, replace=False)].copy()
+    for _ in range(iterations):
+        labels = _nearest(data, centroids)
+        counts = np.bincount(labels, minlength=k)
+        # 按维度 bincount 求和, 比 np.add.at 快一个数量级
+        sums = np.stack([np.bincount(labels, weights=data[:, j], minlength=k) for j in range(data.shape[1])], axis=1)
+        filled = counts > 0
+        centroids[filled] = (sums[filled] / counts[filled, None]).astype(np.float32)
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = data[rng.choice(len(data), len(empty), replace=False)]
+    return centroids
+
+
+class IVFPQIndex:
+    """
+    IVF-PQ 索引 (内积检索, 输入应为 L2 归一化向量)
+
+    - dim: 向量维度
+    - nlist: 粗量化簇数 (None 表示训练时取 4 x sqrt(N))
+    - m: 子向量个数 (dim 必须能被 m 整除), 每个向量编码为 m 字节
+    - nbits: 每个子向量码字位数 (<= 8)
+    - nprobe: 默认扫描的簇数
+    """
+
+    def __init__(self, dim: int = 192, nlist: Optional[int] = None, m: int = 24, nbits: int = 8, nprobe: int = 16):
+        if dim % m:
+            raise ValueError(f"dim {dim} is not divisible by m {m}")
+        if not 1 <= nbits <= 8:
+            raise ValueError("nbits must be between 1 and 8")
+        self.dim = dim
+        self.nlist = nlist
+        self.m = m
+        self.nbits = nbits
+        self.nprobe = nprobe
+        self.dsub = dim // m
+        self.ksub = 1 << nbits
+
+        self.centroids: Optional[np.ndarray] = None   # nlist x dim
+        self.codebooks: Optional[np.ndarray] = None   # m x ksub x dsub
+        self.trained_rows = 0
+
+        self._labels: List[str] = []
+        self._positions: Dict[str, int] = {}          # 标签 -> 当前有效位置
+        self._lists = np.zeros(0, dtype=np.int32)     # 位置 -> 簇
+        self._codes = np.zeros((0, m), dtype=np.uint8)
+        self._live = np.zeros(0, dtype=bool)
+        self._order: Optional[np.ndarray] = None      # 按簇排序的位置 (倒排表), 写入后惰性重建
+        self._offsets: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def code_bytes(self) -> int:
+        """每个向量的编码字节数"""
+        return (self.m * self.nbits + 7) // 8
+
+    @property
+    def bytes_per_vector(self) -> float:
+        """每个向量的实际内存占用: 编码 + 簇号 + 有效标记 (不含标签字符串); 空索引返回编码字节数"""
+        if not len(self._lists):
+            return float(self.code_bytes)
+        return (self._codes.nbytes + self._lists.nbytes + self._live.nbytes) / len(self._lists)
+
+    # ---- 训练与编码 ----
+
+    def train(self, vectors: np.ndarray, seed: int = 0, iterations: int = 10):
+        """训练粗量化中心与 PQ 码本; 会清空已有数据"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        nlist = self.nlist or max(1, int(4 * np.sqrt(len(vectors))))
+        nlist = min(nlist, len(vectors))
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(vectors), TRAIN_POINTS_PER_CENTROID * max(nlist, self.ksub))
+        sample = vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]
+        if len(sample) < self.ksub:
+            raise ValueError(f"Need at least {self.ksub} vectors to train the PQ codebooks, got {len(sample)}")
+
+        centroids = kmeans(sample, nlist, iterations, seed)
+        residuals = sample - centroids[_nearest(sample, centroids)]
+        self.codebooks = np.stack([
+            kmeans(residuals[:, j * self.dsub:(j + 1) * self.dsub], self.ksub, iterations, seed + j + 1)
+            for j in range(self.m)
+        ])
+        self.centroids = centroids
+        self.nlist = nlist
+        self.trained_rows = len(vectors)
+        self.reset()
+        logger.info(f"IVF-PQ index trained: nlist={nlist}, m={self.m}, {len(sample)} training vectors")
+
+    def encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """向量 -> (簇号, PQ 编码)"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        lists = _nearest(vectors, self.centroids)
+        residuals = vectors - self.centroids[lists]
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        for j in range(self.m):
+            codes[:, j] = _nearest(residuals[:, j * self.dsub:(j + 1) * self.dsub], self.codebooks[j])
+        return lists, codes
+
+    def decode(self, lists: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """编码 -> 重建向量 (用于评估量化误差)"""
+        parts = self.codebooks[np.arange(self.m), codes]  # n x m x dsub
+        return self.centroids[lists] + parts.reshape(len(codes), self.dim)
+
+    # ---- 增删 ----
+
+    def reset(self):
+        """清空数据, 保留训练结果"""
+        self._labels, self._positions = [], {}
+        self._lists = np.zeros(0, dtype=np.int32)
+        self._codes = np.zeros((0, self.m), dtype=np.uint8)
+        self._live = np.zeros(0, dtype=bool)
+        self._order = None
+
+    def add(self, labels: Sequence[str], vectors: np.ndarray):
+        """添加 (或替换) 向量; 同一标签已存在时旧编码作废"""
+        if not self.is_trained:
+            raise RuntimeError("Index is not trained")
+        if not len(labels):
+            return
+        self.remove(labels)
+        lists, codes = self.encode(vectors)
+        base = len(self._labels)
+        self._labels.extend(labels)
+        self._positions.update((label, base + i) for i, label in enumerate(labels))
+        self._lists = np.concatenate([self._lists, lists])
+        self._codes = np.concatenate([self._codes, codes])
+        self._live = np.concatenate([self._live, np.ones(len(labels), dtype=bool)])
+        self._order = None
+
+    def remove(self, labels: Iterable[str]) -> int:
+        """删除标签, 返回实际删除的数量; 作废位置超过一半时压缩"""
+        removed = 0
+        for label in labels:
+            position = self._positions.pop(label, None)
+            if position is not None:
+                self._live[position] = False
+                removed += 1
+        if removed and len(self._labels) > 2 * len(self._positions):
+            self._compact()
+        return removed
+
+    def _compact(self):
+        keep = np.flatnonzero(self._live)
+        self._labels = [self._labels[i] for i in keep]
+        self._positions = {label: i for i, label in enumerate(self._labels)}
+        self._lists, self._codes = self._lists[keep], self._codes[keep]
+        self._live = np.ones(len(keep), dtype=bool)
+        self._order = None
+
+    def _inverted_lists(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._order is None:
+            self._order = np.argsort(self._lists, kind="stable").astype(np.int32)
+            self._offsets = np.searchsorted(self._lists[self._order], np.arange(self.nlist + 1))
+        return self._order, self._offsets
+
+    # ---- 查询 ----
+
+    def search(self, query: np.ndarray, k: int = 10, nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        近似内积检索
+
+        返回:
+            [(标签, 近似内积), ...] 按得分降序, 最多 k 个
+        """
+        if not self.is_trained or not self._positions:
+            return []
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        coarse = self.centroids @ query
+        # 按欧氏距离选簇 (与编码时的簇分配一致); 中心未归一化, 不能直接按内积选
+        probe = np.argpartition(np.einsum("ij,ij->i", self.centroids, self.centroids) - 2.0 * coarse, nprobe - 1)[:nprobe]
+
+        order, offsets = self._inverted_lists()
+        candidates = np.concatenate([order[offsets[c]:offsets[c + 1]] for c in probe])
+        candidates = candidates[self._live[candidates]]
+        if not len(candidates):
+            return []
+
+        table = np.einsum("mkd,md->mk", self.codebooks, query.reshape(self.m, self.dsub))
+        scores = coarse[self._lists[candidates]] + table[np.arange(self.m), self._codes[candidates]].sum(axis=1)
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._labels[candidates[i]], float(scores[i])) for i in top]
+
+    # ---- 持久化 ----
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """可写入 .npz 的数组 (只包含有效数据)"""
+        keep = np.flatnonzero(self._live)
+        return {
+            "config": np.array([self.dim, self.nlist or 0, self.m, self.nbits, self.nprobe, self.trained_rows], dtype=np.int64),
+            "centroids": self.centroids,
+            "codebooks": self.codebooks,
+            "labels": np.array([self._labels[i] for i in keep], dtype=np.str_),
+            "lists": self._lists[keep],
+            "codes": self._codes[keep],
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, np.ndarray]) -> "IVFPQIndex":
+        dim, nlist, m, nbits, nprobe, trained_rows = (int(v) for v in state["config"])
+        index = cls(dim=dim, nlist=nlist, m=m, nbits=nbits, nprobe=nprobe)
+        index.centroids = np.asarray(state["centroids"], dtype=np.float32)
+        index.codebooks = np.asarray(state["codebooks"], dtype=np.float32)
+        index.trained_rows = trained_rows
+        index._labels = [str(label) for label in state["labels"]]
+        index._positions = {label: i for i, label in enumerate(index._labels)}
+        index._lists = np.asarray(state["lists"], dtype=np.int32)
+        index._codes = np.asarray(state["codes"], dtype=np.uint8)
+        index._live = np.ones(len(index._labels), dtype=bool)
+        return index
+
+
+class VoiceprintIndex:
+    """
+    跟随 SpeakerStore 的 IVF-PQ 索引
+
+    - 声纹数少于 min_speakers 时不建索引, 直接精确检索
+    - 查询前按声纹库版本增量同步 (新注册 / 重新注册 / 删除); 声纹数超过训练时的 retrain_growth 倍时重新训练
+    - 训练后写入 <store>/ivfpq.npz; 重启或其他工作进程优先加载该文件, 再增量同步
+    """
+
+    def __init__(
+        self,
+        store: SpeakerStore,
+        nprobe: int = 16,
+        rerank: int = 4,
+        min_speakers: int = 20000,
+        retrain_growth: float = 4.0,
+        m: int = 24,
+        save_every: int = 1000
+    ):
+        self.store = store
+        self.nprobe = nprobe
+        self.rerank = rerank
+        self.min_speakers = min_speakers
+        self.retrain_growth = retrain_growth
+        self.m = m
+        self.save_every = save_every
+        self.path = os.path.join(store.directory, INDEX_FILE)
+        self.index: Optional[IVFPQIndex] = None
+        self._matrix: Optional[np.ndarray] = None
+        self._rows: Dict[str, int] = {}
+        self._version = None
+        self._unsaved = 0
+        self._lock = threading.Lock()
+
+    # ---- 同步 ----
+
+    def sync(self):
+        """把声纹库的变化同步到索引 (阻塞; 训练可能需要数秒)"""
+        self.store.refresh()
+        if self.store.version == self._version:
+            return
+        with self._lock:
+            matrix, rows, version = self.store.snapshot()
+            if version == self._version:
+                return
+            if len(rows) < self.min_speakers:
+                self.index = None
+            else:
+                if self.index is None:
+                    self._load()
+                if self.index is None or len(rows) > self.retrain_growth * self.index.trained_rows:
+                    self._train(matrix, rows)
+                else:
+                    self._apply_changes(matrix, rows)
+            self._matrix, self._rows, self._version = matrix, rows, version
+
+    def _train(self, matrix: np.ndarray, rows: Dict[str, int]):
+        labels = sorted(rows, key=rows.get)
+        positions = np.fromiter((rows[label] for label in labels), dtype=np.int64, count=len(labels))
+        vectors = np.asarray(matrix[positions])
+        index = IVFPQIndex(dim=self.store.dim, m=self.m, nprobe=self.nprobe)
+        index.train(vectors)
+        index.add(labels, vectors)
+        self.index, self._rows = index, rows
+        self._save()
+
+    def _apply_changes(self, matrix: np.ndarray, rows: Dict[str, int]):
+        """与上次同步的 {ID: 行号} 比较: 行号变化即重新注册 (或压缩后重排), 重新编码"""
+        removed = [label for label in self._rows if label not in rows]
+        changed = [label for label, row in rows.items() if self._rows.get(label) != row]
+        if removed:
+            self.index.remove(removed)
+        if changed:
+            positions = np.fromiter((rows[label] for label in changed), dtype=np.int64, count=len(changed))
+            self.index.add(changed, np.asarray(matrix[positions]))
+        self._rows = rows
+        self._unsaved += len(removed) + len(changed)
+        if self._unsaved >= self.save_every:
+            self._save()
+
+    def _save(self):
+        tmp = f"{self.path}.{os.getpid()}.tmp.npz"
+        state = self.index.state()
+        state["rows"] = np.array([self._rows.get(label, -1) for label in state["labels"]], dtype=np.int64)
+        try:
+            np.savez(tmp, **state)
+            os.replace(tmp, self.path)
+            self._unsaved = 0
+        except OSError as e:
+            logger.warning(f"⚠️  Failed to save voiceprint index: {e}")
+
+    def _load(self):
+        """加载已保存的索引; 维度不符或文件损坏时忽略 (随后重新训练)"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                state = {key: data[key] for key in data.files}
+            index = IVFPQIndex.from_state(state)
+            if index.dim != self.store.dim:
+                return
+            index.nprobe = self.nprobe
+            self.index = index
+            self._rows = {label: int(row) for label, row in zip(index._labels, state["rows"])}
+            logger.info(f"Loaded voiceprint index: {len(index)} vectors, nlist={index.nlist}")
+        except Exception as e:
+            logger.warning(f"⚠️  Ignoring unreadable voiceprint index {self.path}: {e}")
+
+    # ---- 查询 ----
+
+    def search(
+        self,
+        embedding: Any,
+        k: int = 5,
+        nprobe: Optional[int] = None,
+        exclude: Iterable[str] = ()
+    ) -> Tuple[List[Tuple[str, float]], bool]:
+        """
+        检索最相似的 k 个说话人 (余弦相似度, 已精确重排)
+
+        参数:
+            exclude: 不参与结果的 ID (例如提交者自己)
+
+        返回:
+            ([(speaker_id, score), ...], 是否使用了近似索引)
+        """
+        query = normalize(embedding, self.store.dim)
+        exclude = set(exclude)
+        self.sync()
+        with self._lock:
+            index, matrix, rows = self.index, self._matrix, self._rows
+            if index is not None:
+                candidates = index.search(query, (k + len(exclude)) * self.rerank, nprobe)
+        if index is None:
+            results = self.store.identify(query, k + len(exclude))
+            return [item for item in results if item[0] not in exclude][:k], False
+
+        labels = [label for label, _ in candidates if label not in exclude and label in rows]
+        if not labels:
+            return [], True
+        positions = np.fromiter((rows[label] for label in labels), dtype=np.int64, count=len(labels))
+        scores = np.asarray(matrix[positions]) @ query
+        order = np.argsort(-scores)[:k]
+        return [(labels[i], float(scores[i])) for i in order], True
+
+    def stats(self) -> Dict[str, Any]:
+        index = self.index
+        if index is None:
+            return {"mode": "exact", "min_speakers": self.min_speakers}
+        return {
+            "mode": "ivfpq",
+            "vectors": len(index),
+            "nlist": index.nlist,
+            "nprobe": self.nprobe,
+            "m": index.m,
+            "bytes_per_vector": round(index.bytes_per_vector, 1),
+            "trained_rows": index.trained_rows,
+        }
@@ -3,34 +3,59 @@
 接收语音 -> AI情感分析 -> BLS签名 -> 返回结果
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException, Request, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
+import asyncio
+import functools
 import hashlib
+import json
 import time
 import secrets
 import logging
 import os
 from dotenv import load_dotenv
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
+from contextlib import ExitStack
 import numpy as np
 
 # 导入自定义模块(优雅降级)
 try:
     from analyzer import EmotionAnalyzer, SpeakerVerifier
+    from quantization import apply_inference_mode
     ANALYZER_AVAILABLE = True
 except Exception as e:
     ANALYZER_AVAILABLE = False
     print(f"⚠️  Warning: AI components not available: {e}")
 
 try:
-    from bls_signer import BLSSigner, construct_message
+    from bls_signer import BLSSigner, construct_message, construct_batch_message
+    from committee import CommitteeRegistry, CommitteeError, decode_bitmap
+    from quorum import QuorumSigner, QuorumError, load_validator_keys
+    from signing_service import SigningService
     SIGNER_AVAILABLE = True
 except Exception as e:
     SIGNER_AVAILABLE = False
     print(f"⚠️  Warning: BLSSigner not available: {e}")
 
+from inference_pool import InferenceExecutor, AdmissionError
+from audio_frontend import decode_audio
+from ingest import ingest_upload, IngestedAudio, UploadRejected, AudioTooLongError
+from result_cache import AnalysisCache
+from metrics import REGISTRY, stage_timer, record_stage
+from model_loader import ModelLoader, synthetic_clip
+from silence_gate import SilenceGate
+from long_audio import LongAudioAnalysis
+from speaker_store import SpeakerStore, SpeakerStoreError, cosine_similarity_matrix
+from ann_index import VoiceprintIndex
+from keywords import KeywordEngine
+from embedding_codec import (
+    MSGPACK_TYPE, EmbeddingCodecError, decode_array, encode_array, negotiate, read_body, render, render_embedding
+)
+from realtime import Endpointer, RecognitionSession, SAMPLE_RATE as REALTIME_SAMPLE_RATE
+from prefork import PreforkServer
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -41,6 +66,90 @@ logger = logging.getLogger(__name__)
 # 加载环境变量
 load_dotenv()
 
+# 上传限制
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+MAX_AUDIO_DURATION_S = float(os.getenv("MAX_AUDIO_DURATION_S", "300"))
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(1024 * 1024)))
+# 长音频分窗分析 (/analyze/stream) 的上传限制
+STREAM_MAX_UPLOAD_BYTES = int(os.getenv("STREAM_MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))
+STREAM_MAX_AUDIO_DURATION_S = float(os.getenv("STREAM_MAX_AUDIO_DURATION_S", "3600"))
+# 实时识别 (/ws/recognize): 句尾静音时长 (毫秒) / 未结束句子的中间结果间隔 (秒, 0 表示不推送)
+WS_END_SILENCE_MS = float(os.getenv("WS_END_SILENCE_MS", "600"))
+WS_PARTIAL_INTERVAL_S = float(os.getenv("WS_PARTIAL_INTERVAL_S", "0"))
+
+# CPU 推理优化 (见 quantization.py): INFERENCE_QUANTIZATION=none|int8, INFERENCE_COMPILE=none|compile|script
+INFERENCE_MODE = {
+    "quantization": os.getenv("INFERENCE_QUANTIZATION", "none").lower(),
+    "compile": os.getenv("INFERENCE_COMPILE", "none").lower()
+}
+
+# 模型/算法版本 (签名消息与结果缓存键均依赖这些版本)
+# 量化模型的输出与原模型不完全一致, 使用独立的模型版本, 缓存结果互不混用
+MODEL_VERSION = "SenseVoice-Small" + ("-int8" if INFERENCE_MODE["quantization"] == "int8" else "")
+ALGO_VERSION = "SenseVoice-v1.0"
+# 2: 结果中增加逐段时间线 (timeline)
+RESULT_SCHEMA_VERSION = "2"
+# 关键词提取算法 (见 keywords.py); 不进入签名消息, 只用于让旧算法的缓存结果失效
+KEYWORDS_VERSION = "tfidf-domain-v1"
+CACHE_VERSION = f"{MODEL_VERSION}|{ALGO_VERSION}|{RESULT_SCHEMA_VERSION}|{KEYWORDS_VERSION}"
+# 情感分析 + 声纹合并结果 (/analyze/voiceprint) 另外依赖声纹模型版本
+VOICEPRINT_MODEL_VERSION = "CAM++-sv_zh-cn_16k" + ("-int8" if INFERENCE_MODE["quantization"] == "int8" else "")
+VOICEPRINT_CACHE_VERSION = f"{CACHE_VERSION}|{VOICEPRINT_MODEL_VERSION}"
+
+
+def cache_version(base: str = CACHE_VERSION) -> str:
+    """结果缓存版本: 另外包含关键词引擎的 IDF 快照版本 (关键词进入 result_hash, 快照只在显式重新加载时变化)"""
+    return f"{base}|{keyword_engine.version}"
+
+# 批量分析单次请求的最大文件数
+ANALYZE_BATCH_MAX_FILES = int(os.getenv("ANALYZE_BATCH_MAX_FILES", "32"))
+# 委员会成员变更需要的管理令牌 (未设置时禁止通过 API 变更)
+COMMITTEE_ADMIN_TOKEN = os.getenv("COMMITTEE_ADMIN_TOKEN")
+# 服务自身签名公钥所在的委员会
+DEFAULT_COMMITTEE_ID = os.getenv("DEFAULT_COMMITTEE_ID", "default")
+# 委员会变更日志 (见 committee.py): 多个工作进程及重启之间共享成员列表; 留空则只保存在各进程内存中
+COMMITTEE_REGISTRY_PATH = os.getenv("COMMITTEE_REGISTRY_PATH", "data/committees.jsonl")
+# 多进程服务的工作进程数 (见 prefork.py)
+WORKERS = int(os.getenv("WORKERS", "1"))
+
+# 多验证者签名: 验证者数量 (1 表示仅用 VALIDATOR_1_SK 单独签名) / 最少签名数 (默认全部)
+QUORUM_VALIDATORS = int(os.getenv("QUORUM_VALIDATORS", "1"))
+QUORUM_THRESHOLD = int(os.getenv("QUORUM_THRESHOLD", "0")) or None
+
+# 进程外签名: 签名进程数 (0 表示在服务进程内签名; 多验证者模式下不使用)
+SIGNING_PROCESSES = int(os.getenv("SIGNING_PROCESSES", "1"))
+
+# 模型预热用合成音频时长 (秒)
+WARMUP_CLIP_SECONDS = float(os.getenv("WARMUP_CLIP_SECONDS", "1.0"))
+
+# 推理前的静音门限 (见 silence_gate.py): 裁剪首尾静音, 有效语音不足下限的音频返回 422
+SILENCE_GATE_ENABLED = os.getenv("SILENCE_GATE", "1") != "0"
+SILENCE_GATE_THRESHOLD_DB = float(os.getenv("SILENCE_GATE_THRESHOLD_DB", "-45"))
+SILENCE_GATE_MIN_SPEECH_S = float(os.getenv("SILENCE_GATE_MIN_SPEECH_S", "0.5"))
+# 声纹需要更长的有效语音才有意义
+VOICEPRINT_MIN_SPEECH_S = float(os.getenv("VOICEPRINT_MIN_SPEECH_S", "1.0"))
+
+# 声纹库 (见 speaker_store.py): 数据目录 (留空关闭) / 判定为同一说话人的余弦相似度阈值
+SPEAKER_STORE_DIR = os.getenv("SPEAKER_STORE_DIR", "data/speakers")
+VOICEPRINT_MATCH_THRESHOLD = float(os.getenv("VOICEPRINT_MATCH_THRESHOLD", "0.60"))
+# 声纹近似检索 (见 ann_index.py): 声纹数达到下限后启用 IVF-PQ 索引 / 扫描簇数 / 精确重排倍数
+VOICEPRINT_ANN_MIN_SPEAKERS = int(os.getenv("VOICEPRINT_ANN_MIN_SPEAKERS", "20000"))
+VOICEPRINT_ANN_NPROBE = int(os.getenv("VOICEPRINT_ANN_NPROBE", "16"))
+VOICEPRINT_ANN_RERANK = int(os.getenv("VOICEPRINT_ANN_RERANK", "4"))
+
+# 批量声纹比较 (/compare_voiceprints/batch) 单次请求的最大相似度矩阵元素数 (查询数 x 候选数)
+COMPARE_BATCH_MAX_PAIRS = int(os.getenv("COMPARE_BATCH_MAX_PAIRS", "1000000"))
+
+# 关键词提取 (见 keywords.py): 领域词典, jieba 词典缓存目录, 由已分析反馈维护的语料 IDF (路径留空关闭)
+KEYWORDS_DOMAIN_DICT = os.getenv("KEYWORDS_DOMAIN_DICT", "domain_dict.txt")
+KEYWORDS_CACHE_DIR = os.getenv("KEYWORDS_CACHE_DIR", "cache/keywords")
+KEYWORDS_IDF_PATH = os.getenv("KEYWORDS_IDF_PATH", "data/keywords/idf.json")
+KEYWORDS_IDF_PRIOR_DOCS = int(os.getenv("KEYWORDS_IDF_PRIOR_DOCS", "200"))
+KEYWORDS_IDF_SAVE_EVERY = int(os.getenv("KEYWORDS_IDF_SAVE_EVERY", "20"))
+
+# 批量验证单次请求的最大条目数
+VERIFY_BATCH_MAX_ITEMS = int(os.getenv("VERIFY_BATCH_MAX_ITEMS", "4096"))
+
 # 创建 FastAPI 应用
 app = FastAPI(
     title="EchoRank AI Backend",
@@ -57,11 +166,96 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 请求级指标 (分阶段耗时见 metrics.STAGE_SECONDS)
+REQUEST_SECONDS = REGISTRY.histogram(
+    "echorank_request_duration_seconds", "HTTP request latency", ["method", "route", "status"]
+)
+REQUESTS_IN_FLIGHT = REGISTRY.gauge("echorank_requests_in_flight", "HTTP requests currently being served")
+INFERENCE_QUEUE_DEPTH = REGISTRY.gauge("echorank_inference_queue_depth", "Requests waiting for an inference worker")
+INFERENCE_IN_FLIGHT = REGISTRY.gauge("echorank_inference_in_flight", "Requests running on inference workers")
+INFERENCE_REJECTED = REGISTRY.counter(
+    "echorank_inference_rejected_total", "Requests rejected by admission control", ["reason"]
+)
+MODEL_LOADED = REGISTRY.gauge("echorank_model_loaded", "Whether a model/component is loaded (1) or not (0)", ["model"])
+MODEL_LOAD_SECONDS = REGISTRY.gauge("echorank_model_load_seconds", "Model load and warm-up duration", ["model", "phase"])
+CACHE_LOOKUPS = REGISTRY.counter("echorank_analysis_cache_lookups_total", "Analysis cache lookups", ["result"])
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """统计请求耗时与并发数"""
+    REQUESTS_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        REQUESTS_IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status_code
+        )
+
+
 # 全局变量:存储初始化的组件
 emotion_analyzer = None
 speaker_verifier = None
 bls_signer = None
+quorum_signer = None
+signing_service = None
 bot_public_key = None
+inference_executor = None
+analysis_cache = None
+speaker_store = None
+voiceprint_index = None
+committee_registry = CommitteeRegistry(COMMITTEE_REGISTRY_PATH or None) if SIGNER_AVAILABLE else None
+model_loader = ModelLoader()
+model_loading_task = None
+# 关键词引擎与模型并行预加载, pre-fork 模式下随模型一起在父进程中加载
+keyword_engine = KeywordEngine(
+    domain_dict=KEYWORDS_DOMAIN_DICT or None,
+    cache_dir=KEYWORDS_CACHE_DIR or None,
+    idf_path=KEYWORDS_IDF_PATH or None,
+    prior_docs=KEYWORDS_IDF_PRIOR_DOCS,
+    save_every=KEYWORDS_IDF_SAVE_EVERY,
+    bootstrap_dir=os.getenv("ANALYSIS_CACHE_DIR", "cache/analysis") or None
+)
+models_preloaded = False
+
+
+INFERENCE_QUEUE_DEPTH.set_function(lambda: inference_executor.queued if inference_executor else 0)
+INFERENCE_IN_FLIGHT.set_function(lambda: inference_executor.in_flight if inference_executor else 0)
+INFERENCE_REJECTED.set_function(lambda: [
+    ({"reason": "queue_full"}, inference_executor.rejected_full if inference_executor else 0),
+    ({"reason": "queue_timeout"}, inference_executor.rejected_timeout if inference_executor else 0),
+])
+MODEL_LOADED.set_function(lambda: [
+    ({"model": "sensevoice"}, int(emotion_analyzer is not None)),
+    ({"model": "campplus"}, int(speaker_verifier is not None)),
+    ({"model": "bls_signer"}, int(bot_public_key is not None)),
+])
+MODEL_LOAD_SECONDS.set_function(lambda: [
+    ({"model": name, "phase": phase}, (slot.stats()[f"{phase}_ms"] or 0) / 1000)
+    for name, slot in model_loader.slots.items()
+    for phase in ("load", "warmup")
+])
+
+
+def _cache_lookup_samples():
+    stats = analysis_cache.stats() if analysis_cache else {}
+    return [
+        ({"result": "memory_hit"}, stats.get("memory_hits", 0)),
+        ({"result": "disk_hit"}, stats.get("disk_hits", 0)),
+        ({"result": "miss"}, stats.get("misses", 0)),
+    ]
+
+
+CACHE_LOOKUPS.set_function(_cache_lookup_samples)
 
 
 @app.get("/status")
@@ -72,61 +266,237 @@ async def status():
 @app.on_event("startup")
 async def startup_event():
     """服务启动时初始化组件"""
-    global emotion_analyzer, speaker_verifier, bls_signer, bot_public_key
+    global emotion_analyzer, speaker_verifier, bls_signer, quorum_signer, signing_service, bot_public_key
+    global inference_executor, analysis_cache, speaker_store, voiceprint_index, model_loading_task
     
     logger.info("="*60)
     logger.info("Starting EchoRank AI Backend Service...")
     logger.info("="*60)
     
-    # 1. 初始化情感分析器与声纹识别器
-    if ANALYZER_AVAILABLE:
+    # 0. 初始化推理执行器(推理与签名不在事件循环中执行)
+    inference_executor = InferenceExecutor(
+        max_workers=int(os.getenv("INFERENCE_WORKERS", "1")),
+        max_queue=int(os.getenv("INFERENCE_QUEUE_DEPTH", "8")),
+        queue_timeout=float(os.getenv("INFERENCE_QUEUE_TIMEOUT", "20"))
+    )
+    
+    # 分析结果缓存 (相同音频只推理一次, 签名仍每次重新生成)
+    analysis_cache = AnalysisCache(
+        memory_entries=int(os.getenv("ANALYSIS_CACHE_SIZE", "1024")),
+        disk_dir=os.getenv("ANALYSIS_CACHE_DIR", "cache/analysis") or None,
+        disk_max_bytes=int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    )
+    
+    # 声纹库 (pre-fork 模式下各工作进程打开同一目录, 写操作以文件锁互斥)
+    if SPEAKER_STORE_DIR:
         try:
-            logger.info("Loading SenseVoice emotion analyzer...")
-            emotion_analyzer = EmotionAnalyzer()
-            logger.info("✅ Emotion analyzer loaded successfully")
-            
-            logger.info("Loading Speaker Verification model (CAM++)...")
-            speaker_verifier = SpeakerVerifier()
-            logger.info("✅ Speaker verifier loaded successfully")
-            
+            speaker_store = SpeakerStore(SPEAKER_STORE_DIR)
+            voiceprint_index = VoiceprintIndex(
+                speaker_store,
+                nprobe=VOICEPRINT_ANN_NPROBE,
+                rerank=VOICEPRINT_ANN_RERANK,
+                min_speakers=VOICEPRINT_ANN_MIN_SPEAKERS
+            )
         except Exception as e:
-            logger.error(f"❌ Failed to load AI models: {e}")
-            logger.warning("⚠️  Service will run in LIMITED mode (no AI analysis)")
-    else:
-        logger.warning("⚠️  Analyzer module not available - running in LIMITED mode")
+            logger.error(f"❌ Failed to open speaker store: {e}")
+            speaker_store = voiceprint_index = None
     
-    # 2. 初始化 BLS 签名器
+    # 1. 初始化 BLS 签名器 (先于模型加载: 签名工作进程不继承模型与推理线程)
     if SIGNER_AVAILABLE:
         try:
             logger.info("Initializing BLS signer...")
             
-            # 从环境变量读取私钥(使用第一个验证者的密钥)
-            validator_sk = os.getenv("VALIDATOR_1_SK")
-            if not validator_sk:
-                raise ValueError("VALIDATOR_1_SK not found in .env file")
-            
-            # 转换为十六进制格式
-            sk_hex = hex(int(validator_sk))
-            bls_signer = BLSSigner(sk_hex)
+            if QUORUM_VALIDATORS == 1 and SIGNING_PROCESSES > 0:
+                # 私钥只在签名进程中读取 (本进程不解析、不持有私钥; 环境变量保留, 见 signing_service.py)
+                signing_service = SigningService("VALIDATOR_1_SK", processes=SIGNING_PROCESSES)
+                signing_service.start()
+                bot_public_key = signing_service.public_key.hex()
+            else:
+                # 从环境变量读取私钥(使用第一个验证者的密钥)
+                validator_sk = os.getenv("VALIDATOR_1_SK")
+                if not validator_sk:
+                    raise ValueError("VALIDATOR_1_SK not found in .env file")
+                # 转换为十六进制格式
+                sk_hex = hex(int(validator_sk))
+                bls_signer = BLSSigner(sk_hex)
+                bot_public_key = bls_signer.pk.hex()
             
-            # 获取公钥
-            bot_public_key = bls_signer.pk.hex()
             logger.info(f"✅ BLS signer initialized")
             logger.info(f"   Public Key: {bot_public_key[:32]}...")
             
+            if signing_service:
+                committee_registry.register(
+                    DEFAULT_COMMITTEE_ID, signing_service.public_key, signing_service.proof_of_possession, exist_ok=True
+                )
+            elif QUORUM_VALIDATORS > 1:
+                # 多验证者模式: VALIDATOR_1..N 并行签名, 全部加入默认委员会 (验证者 1 即服务公钥)
+                processes = os.getenv("QUORUM_PROCESSES")
+                quorum_signer = QuorumSigner(
+                    load_validator_keys(QUORUM_VALIDATORS),
+                    threshold=QUORUM_THRESHOLD,
+                    processes=int(processes) if processes else None
+                )
+                quorum_signer.warm_up()
+                quorum_signer.register(committee_registry, DEFAULT_COMMITTEE_ID)
+                logger.info(f"✅ Quorum signing enabled: {len(quorum_signer)} validators, threshold {quorum_signer.threshold}")
+            else:
+                # 服务公钥加入默认委员会
+                committee_registry.register(
+                    DEFAULT_COMMITTEE_ID, bls_signer.pk, bls_signer.proof_of_possession(), exist_ok=True
+                )
+            
         except Exception as e:
             logger.error(f"❌ Failed to initialize BLS signer: {e}")
             logger.warning("⚠️  Crypto features will be disabled")
+            bls_signer = quorum_signer = signing_service = bot_public_key = None
     else:
         logger.warning("⚠️  BLS signer module not available")
     
+    # 2. 后台并行加载情感分析器与声纹识别器 (预热后才对外可见, 见 /readyz)
+    if models_preloaded:
+        # pre-fork 工作进程: 模型已在父进程中加载, 这里只创建依赖线程的组件
+        if emotion_analyzer:
+            _configure_batching(emotion_analyzer)
+        logger.info(f"Using models preloaded before fork (pid {os.getpid()})")
+    elif ANALYZER_AVAILABLE:
+        _register_models()
+        model_loading_task = asyncio.create_task(_load_models())
+    else:
+        logger.warning("⚠️  Analyzer module not available - running in LIMITED mode")
+    
     logger.info("="*60)
-    logger.info("🚀 Service started successfully!")
-    if not emotion_analyzer or not bls_signer:
-        logger.warning("⚠️  Running in LIMITED mode - some features disabled")
+    logger.info("🚀 Service started, models loading in background (see /readyz)")
     logger.info("="*60)
 
 
+def _register_models():
+    model_loader.add(
+        "sensevoice", functools.partial(_load_model, functools.partial(EmotionAnalyzer, keyword_engine=keyword_engine), "sensevoice"),
+        warm_up=_warm_up, on_ready=_on_emotion_analyzer_ready
+    )
+    model_loader.add(
+        "campplus", functools.partial(_load_model, SpeakerVerifier, "campplus"),
+        warm_up=_warm_up, on_ready=_on_speaker_verifier_ready
+    )
+    # jieba 词典 (或其缓存) 与 IDF 在启动时加载, 第一次 /analyze 不再承担约 1 秒的词典构建
+    model_loader.add("keywords", keyword_engine.load)
+
+
+def preload_models():
+    """pre-fork 模式: fork 前在父进程中同步加载并预热模型, 工作进程以写时复制方式共享"""
+    global models_preloaded
+    models_preloaded = True
+    if ANALYZER_AVAILABLE:
+        _register_models()
+        model_loader.load_all_blocking()
+
+
+def _load_model(model_cls, name: str):
+    """加载模型并按 INFERENCE_MODE 做量化/编译 (默认不处理)"""
+    model = model_cls()
+    model.optimization = apply_inference_mode(model.model, INFERENCE_MODE, name=name)
+    return model
+
+
+def _warm_up(model):
+    model.warm_up(synthetic_clip(WARMUP_CLIP_SECONDS))
+
+
+def _on_emotion_analyzer_ready(analyzer):
+    """SenseVoice 预热完成后的配置, 之后才接收请求"""
+    global emotion_analyzer
+    analyzer.max_duration_s = MAX_AUDIO_DURATION_S
+    if SILENCE_GATE_ENABLED:
+        analyzer.silence_gate = SilenceGate(SILENCE_GATE_THRESHOLD_DB, SILENCE_GATE_MIN_SPEECH_S, name="sensevoice")
+    if not models_preloaded:
+        # pre-fork 父进程中不创建线程, 由工作进程在 startup 中启用
+        _configure_batching(analyzer)
+    emotion_analyzer = analyzer
+
+
+def _configure_batching(analyzer):
+    """启用跨请求微批处理 (INFERENCE_BATCH_SIZE > 1)"""
+    batch_size = int(os.getenv("INFERENCE_BATCH_SIZE", "1"))
+    if batch_size > 1:
+        analyzer.enable_batching(
+            max_batch_size=batch_size,
+            max_wait_ms=float(os.getenv("INFERENCE_BATCH_WAIT_MS", "20"))
+        )
+        if inference_executor.max_workers < batch_size:
+            logger.warning(
+                f"⚠️  INFERENCE_WORKERS ({inference_executor.max_workers}) < INFERENCE_BATCH_SIZE "
+                f"({batch_size}): batches can never fill up"
+            )
+
+
+def _on_speaker_verifier_ready(verifier):
+    global speaker_verifier
+    if SILENCE_GATE_ENABLED:
+        verifier.silence_gate = SilenceGate(SILENCE_GATE_THRESHOLD_DB, VOICEPRINT_MIN_SPEECH_S, name="campplus")
+    speaker_verifier = verifier
+
+
+async def _load_models():
+    """并行加载并预热全部模型"""
+    await model_loader.load_all()
+    if model_loader.failed():
+        logger.warning(f"⚠️  Running in LIMITED mode - failed to load: {', '.join(model_loader.failed())}")
+    elif not bot_public_key:
+        logger.warning("⚠️  Running in LIMITED mode - some features disabled")
+    else:
+        logger.info(f"🚀 All models ready in {model_loader.finished_at - model_loader.started_at:.1f}s")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """服务关闭时释放推理线程池与签名进程, 保存关键词语料 IDF 的未保存部分"""
+    if model_loading_task and not model_loading_task.done():
+        model_loading_task.cancel()
+    if inference_executor:
+        inference_executor.shutdown()
+    if quorum_signer:
+        quorum_signer.shutdown()
+    if signing_service:
+        signing_service.shutdown()
+    # 等待后台线程计入已提交的转写并保存 (文件锁 + 写文件, 不在事件循环中执行)
+    await asyncio.get_running_loop().run_in_executor(None, keyword_engine.flush, 5.0)
+
+
+async def run_inference(fn, *args, **kwargs):
+    """通过推理执行器运行阻塞任务, 排队被拒绝时返回 429/503 并附带 Retry-After"""
+    try:
+        return await inference_executor.run(fn, *args, **kwargs)
+    except AdmissionError as e:
+        logger.warning(f"Request rejected by admission control: {e}")
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+async def receive_audio(
+    audio: UploadFile,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    max_duration_s: float = MAX_AUDIO_DURATION_S
+) -> IngestedAudio:
+    """分块接收上传音频并计算哈希, 超出限制时返回 4xx"""
+    try:
+        ingested = await ingest_upload(
+            audio,
+            max_bytes=max_bytes,
+            max_duration_s=max_duration_s,
+            spool_max_size=UPLOAD_SPOOL_BYTES
+        )
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    
+    if ingested.size == 0:
+        ingested.close()
+        raise HTTPException(status_code=400, detail="Empty audio file")
+    return ingested
+
+
 @app.get("/")
 async def root():
     """健康检查端点"""
@@ -138,6 +508,30 @@ async def root():
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 格式指标"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/livez")
+async def livez():
+    """存活检查: 事件循环可响应即为存活 (不依赖模型加载)"""
+    return {"status": "alive"}
+
+
+@app.get("/readyz")
+async def readyz():
+    """就绪检查: 必需模型预热完成且签名器可用时返回 200, 否则 503"""
+    ready = model_loader.ready and bool(model_loader.slots) and bot_public_key is not None
+    body = {
+        "ready": ready,
+        "models": {name: slot.state for name, slot in model_loader.slots.items()},
+        "bls_signer": bot_public_key is not None
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
+
 @app.get("/health")
 async def health_check():
     """详细健康检查"""
@@ -145,13 +539,210 @@ async def health_check():
         "status": "healthy",
         "components": {
             "emotion_analyzer": emotion_analyzer is not None,
-            "bls_signer": bls_signer is not None,
+            "bls_signer": bot_public_key is not None,
             "public_key_available": bot_public_key is not None
         },
+        "models": model_loader.stats(),
+        "inference_mode": {
+            **INFERENCE_MODE,
+            "models": {
+                name: getattr(slot.instance, "optimization", None) for name, slot in model_loader.slots.items()
+            }
+        },
+        "inference_queue": inference_executor.stats() if inference_executor else None,
+        "batching": emotion_analyzer.batcher.stats() if emotion_analyzer and emotion_analyzer.batcher else None,
+        "cache": analysis_cache.stats() if analysis_cache else None,
+        "speaker_store": speaker_store.stats() if speaker_store is not None else None,
+        "voiceprint_index": voiceprint_index.stats() if voiceprint_index is not None else None,
+        "keywords": keyword_engine.stats(),
+        "committees": committee_registry.committees() if committee_registry else None,
         "timestamp": int(time.time())
     }
 
 
+def _analyze(audio, timings: Optional[Dict[str, float]] = None, audio_stats: Optional[Dict[str, float]] = None):
+    """
+    情感分析并计算结果哈希(阻塞, 在推理线程池中调用)
+    
+    参数:
+        audio: 音频字节或文件对象
+        timings: 可选, 写入各阶段耗时(毫秒)
+        audio_stats: 可选, 写入静音门限统计的输入/语音/裁剪时长(秒)
+    
+    返回:
+        (result_json, result_hash)
+    """
+    # 3. AI 情感分析
+    logger.info("Running emotion analysis...")
+    analysis_result = emotion_analyzer.analyze(audio, timings, audio_stats)
+    logger.info(f"Analysis complete: {analysis_result['emotion']} ({analysis_result['intensity']:.2f})")
+    
+    return _build_result(analysis_result)
+
+
+def _build_result(analysis_result: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+    """由分析器输出构建结构化结果 JSON 及其哈希"""
+    # 4. 构建结构化结果 JSON
+    result_json = {
+        "emotion": analysis_result["emotion"],
+        "intensity": float(analysis_result["intensity"]),
+        "confidence": float(analysis_result["confidence"]),
+        "keywords": analysis_result["keywords"],
+        "events": analysis_result["events"],
+        "transcript": analysis_result["raw_text"],
+        "language": analysis_result["language"],
+        "timeline": analysis_result["timeline"]
+    }
+    
+    # 5. 计算结果哈希 (result_hash)
+    result_json_str = json.dumps(result_json, sort_keys=True, ensure_ascii=False)
+    result_hash = hashlib.sha256(result_json_str.encode('utf-8')).hexdigest()
+    logger.info(f"Result hash: {result_hash[:16]}...")
+    
+    # 新分析的反馈计入关键词语料 IDF (缓存命中不重复计入); 只放入队列, 分词与保存在后台线程中进行,
+    # 不改变当前的打分快照
+    keyword_engine.observe(result_json["transcript"])
+    
+    return result_json, result_hash
+
+
+def _analyze_batch(
+    audios: list,
+    audio_hashes: List[str],
+    timings: Optional[Dict[str, float]] = None
+) -> List[Union[Tuple[Dict[str, Any], str], UploadRejected]]:
+    """
+    批量情感分析(一次批量推理, 阻塞), 成功的结果写入缓存
+    
+    返回:
+        与输入顺序一致的列表: 成功为 (result_json, result_hash), 失败为该文件的 UploadRejected 异常
+    """
+    logger.info(f"Running batched emotion analysis on {len(audios)} files...")
+    results = []
+    for audio_hash, analysis_result in zip(audio_hashes, emotion_analyzer.analyze_batch(audios, timings)):
+        if isinstance(analysis_result, UploadRejected):
+            results.append(analysis_result)
+            continue
+        result_json, result_hash = _build_result(analysis_result)
+        if analysis_cache:
+            analysis_cache.put(audio_hash, cache_version(), {"result": result_json, "result_hash": result_hash})
+        results.append((result_json, result_hash))
+    return results
+
+
+async def _verify_signature(public_key: bytes, message: bytes, signature: bytes) -> bool:
+    """验证签名: 优先在签名进程中执行, 否则放到线程中, 不阻塞事件循环"""
+    if signing_service:
+        return await signing_service.verify(public_key, message, signature)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, BLSSigner.verify_signature, public_key, message, signature)
+
+
+async def _sign_message(message: bytes, timings: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    签名并自检; 多验证者模式下由全部验证者并行签名并聚合
+    
+    签名不占用推理线程: 当前请求签名时, 后续请求可以继续解码和推理
+    
+    返回:
+        crypto 中的签名相关字段
+    """
+    loop = asyncio.get_running_loop()
+    if quorum_signer:
+        with stage_timer(timings, "sign"):
+            try:
+                quorum = await loop.run_in_executor(None, quorum_signer.sign, message)
+            except QuorumError as e:
+                logger.error(f"❌ {e}")
+                raise HTTPException(status_code=503, detail=str(e))
+        with stage_timer(timings, "verify"):
+            is_valid = await _verify_signature(quorum["aggregate_public_key"], message, quorum["signature"])
+        fields = {
+            "signature": quorum["signature"].hex(),
+            "public_key": quorum["aggregate_public_key"].hex(),
+            "committee_id": DEFAULT_COMMITTEE_ID,
+            "committee_public_key": quorum["committee_public_key"].hex(),
+            "signer_bitmap": quorum["signer_bitmap"],
+            "signers": quorum["signers"],
+            "threshold": quorum_signer.threshold,
+        }
+    elif signing_service:
+        # 签名与自检在签名进程中一次完成
+        signature, is_valid, sign_seconds, verify_seconds = await signing_service.sign_and_verify(message)
+        record_stage(timings, "sign", sign_seconds)
+        record_stage(timings, "verify", verify_seconds)
+        fields = {"signature": signature.hex(), "public_key": bot_public_key}
+    else:
+        with stage_timer(timings, "sign"):
+            signature = await loop.run_in_executor(None, bls_signer.sign_message, message)
+        with stage_timer(timings, "verify"):
+            is_valid = await _verify_signature(bls_signer.pk, message, signature)
+        fields = {"signature": signature.hex(), "public_key": bot_public_key}
+    
+    if not is_valid:
+        logger.error("❌ Signature verification failed!")
+        raise HTTPException(status_code=500, detail="Signature verification failed")
+    logger.info(f"✅ Signature verified successfully: {fields['signature'][:16]}...")
+    return fields
+
+
+async def _sign_result(audio_hash: str, result_hash: str, timings: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    生成时间戳/随机数并进行 BLS 签名与自检
+    
+    返回:
+        crypto 字段
+    """
+    # 6. 生成时间戳和随机数
+    timestamp = int(time.time())
+    nonce = secrets.token_hex(16)
+    
+    # 7. 构造待签名消息
+    # 消息格式: audio_hash || result_hash || public_key || timestamp || nonce
+    message = construct_message(
+        audio_hash=audio_hash,
+        result_hash=result_hash,
+        algo_version=ALGO_VERSION,
+        timestamp=timestamp,
+        nonce=nonce
+    )
+    message_hash = message.hex()
+    logger.info(f"Message hash: {message_hash[:16]}...")
+    
+    # 8. BLS 签名 + 9. 验证签名(自检)
+    logger.info("Signing message with BLS...")
+    signed = await _sign_message(message, timings)
+    
+    return {
+        "audio_hash": audio_hash,
+        "result_hash": result_hash,
+        "message_hash": message_hash,
+        **signed,
+        "timestamp": timestamp,
+        "nonce": nonce,
+        "algorithm": "BLS12-381",
+        "verified": True
+    }
+
+
+def _analyze_and_cache(
+    audio,
+    audio_hash: str,
+    timings: Optional[Dict[str, float]] = None,
+    audio_stats: Optional[Dict[str, float]] = None
+):
+    """
+    情感分析(阻塞, 在推理线程池中调用); 分析结果写入缓存
+    
+    返回:
+        (result_json, result_hash)
+    """
+    result_json, result_hash = _analyze(audio, timings, audio_stats)
+    if analysis_cache:
+        analysis_cache.put(audio_hash, cache_version(), {"result": result_json, "result_hash": result_hash})
+    return result_json, result_hash
+
+
 @app.post("/analyze")
 async def analyze_audio(audio: UploadFile = File(...)):
     """
@@ -170,7 +761,11 @@ async def analyze_audio(audio: UploadFile = File(...)):
                 "keywords": ["活动", "很棒"],
                 "events": ["applause"],
                 "transcript": "这次活动很棒!",
-                "language": "zh"
+                "language": "zh",
+                "timeline": [
+                    {"index": 0, "language": "zh", "emotion": "HAPPY", "events": ["applause"],
+                     "text": "这次活动很棒!", "text_start": 0, "text_end": 7}
+                ]
             },
             "crypto": {
                 "audio_hash": "abc123...",
@@ -180,9 +775,18 @@ async def analyze_audio(audio: UploadFile = File(...)):
                 "public_key": "mno345...",
                 "timestamp": 1706600000,
                 "nonce": "pqr678..."
+            },
+            "metadata": {
+                "audio_size": 64044, "processing_time_ms": 850, "stage_ms": {...},
+                "input_s": 2.0, "speech_s": 1.4, "trimmed_s": 0.3,   # 静音门限统计; 缓存命中或门限关闭时省略
+                "model_version": "...", "cache_hit": false
             }
         }
     """
+    start_time = time.perf_counter()
+    timings: Dict[str, float] = {}
+    # 静音门限统计 (input_s / speech_s / trimmed_s, 秒); 缓存命中或门限关闭时为空
+    audio_stats: Dict[str, float] = {}
     try:
         logger.info(f"Received audio file: {audio.filename}")
         
@@ -193,166 +797,901 @@ async def analyze_audio(audio: UploadFile = File(...)):
                 detail="Emotion analyzer not available. Please check server logs."
             )
         
-        if not bls_signer:
+        if not bot_public_key:
             raise HTTPException(
                 status_code=503,
                 detail="BLS signer not available. Please check .env configuration."
             )
         
-        # 1. 读取音频数据
-        audio_bytes = await audio.read()
-        audio_size = len(audio_bytes)
-        logger.info(f"Audio size: {audio_size} bytes")
-        
-        if audio_size == 0:
-            raise HTTPException(status_code=400, detail="Empty audio file")
-        
-        # 2. 计算音频哈希 (audio_hash)
-        audio_hash = hashlib.sha256(audio_bytes).hexdigest()
-        logger.info(f"Audio hash: {audio_hash[:16]}...")
+        # 1-2. 分块读取音频数据, 同时计算音频哈希 (audio_hash)
+        with stage_timer(timings, "upload_read"):
+            ingested = await receive_audio(audio)
+        with ingested:
+            audio_size = ingested.size
+            audio_hash = ingested.sha256
+            logger.info(f"Audio size: {audio_size} bytes")
+            logger.info(f"Audio hash: {audio_hash[:16]}...")
+            
+            # 3-5. 情感分析(在推理线程池中执行, 不阻塞事件循环)
+            # 相同音频命中缓存时复用 result_json / result_hash, 只重新签名
+            cached = analysis_cache.get(audio_hash, cache_version()) if analysis_cache else None
+            if cached:
+                logger.info("Analysis cache hit, reusing result")
+                result_json, result_hash = cached["result"], cached["result_hash"]
+            else:
+                result_json, result_hash = await run_inference(
+                    _analyze_and_cache, ingested.open(), audio_hash, timings, audio_stats
+                )
         
-        # 3. AI 情感分析
-        logger.info("Running emotion analysis...")
-        analysis_result = emotion_analyzer.analyze(audio_bytes)
-        logger.info(f"Analysis complete: {analysis_result['emotion']} ({analysis_result['intensity']:.2f})")
+        # 6-9. 签名(推理线程已释放给后续请求)
+        crypto = await _sign_result(audio_hash, result_hash, timings)
         
-        # 4. 构建结构化结果 JSON
-        result_json = {
-            "emotion": analysis_result["emotion"],
-            "intensity": float(analysis_result["intensity"]),
-            "confidence": float(analysis_result["confidence"]),
-            "keywords": analysis_result["keywords"],
-            "events": analysis_result["events"],
-            "transcript": analysis_result["raw_text"],
-            "language": analysis_result["language"]
+        # 10. 构造返回结果
+        response = {
+            "success": True,
+            "result": result_json,
+            "crypto": crypto,
+            "metadata": {
+                "audio_size": audio_size,
+                "processing_time_ms": int((time.perf_counter() - start_time) * 1000),
+                "stage_ms": timings,
+                **audio_stats,
+                "model_version": MODEL_VERSION,
+                "cache_hit": cached is not None
+            }
         }
         
-        # 5. 计算结果哈希 (result_hash)
-        import json
-        result_json_str = json.dumps(result_json, sort_keys=True, ensure_ascii=False)
-        result_hash = hashlib.sha256(result_json_str.encode('utf-8')).hexdigest()
-        logger.info(f"Result hash: {result_hash[:16]}...")
+        logger.info("✅ Request processed successfully")
+        
+        return response
+    
+    except HTTPException:
+        raise
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """server-sent events 消息"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/analyze/stream")
+async def analyze_audio_stream(audio: UploadFile = File(...)):
+    """
+    长音频分窗分析, 以 server-sent events 逐段返回结果
+    
+    事件:
+        segment: {"index", "start_s", "end_s", "emotion", "intensity", "events", "text", "language"}
+                 (静音窗口为 {"index", "start_s", "end_s", "skipped": "silence"})
+        result:  最后一条, 整段音频的结果与签名 (格式同 /analyze 的响应)
+        error:   {"status", "detail"}, 之后不再有其他事件
+    """
+    if not emotion_analyzer:
+        raise HTTPException(status_code=503, detail="Emotion analyzer not available. Please check server logs.")
+    if not bot_public_key:
+        raise HTTPException(status_code=503, detail="BLS signer not available. Please check .env configuration.")
+    
+    start_time = time.perf_counter()
+    timings: Dict[str, float] = {}
+    with stage_timer(timings, "upload_read"):
+        ingested = await receive_audio(audio, STREAM_MAX_UPLOAD_BYTES, STREAM_MAX_AUDIO_DURATION_S)
+    analysis = LongAudioAnalysis(
+        emotion_analyzer,
+        ingested.open(),
+        max_duration_s=STREAM_MAX_AUDIO_DURATION_S,
+        on_close=ingested.close
+    )
+    logger.info(f"Streaming analysis of {ingested.size} bytes in {analysis.window_s:.0f}s windows")
+    
+    async def events():
+        try:
+            # 每个窗口单独提交到推理线程池, 与其他请求公平排队
+            while True:
+                segment = await run_inference(analysis.next_segment, timings)
+                if segment is None:
+                    break
+                yield _sse("segment", segment)
+            
+            aggregate = await run_inference(analysis.aggregate, timings)
+            result_json, result_hash = _build_result(aggregate)
+            crypto = await _sign_result(ingested.sha256, result_hash, timings)
+            yield _sse("result", {
+                "success": True,
+                "result": result_json,
+                "crypto": crypto,
+                "metadata": {
+                    "audio_size": ingested.size,
+                    "audio_duration_s": round(analysis.duration_s, 2),
+                    "skipped_silence_s": round(analysis.skipped_s, 2),
+                    "segments": analysis.segments,
+                    "processing_time_ms": int((time.perf_counter() - start_time) * 1000),
+                    "stage_ms": timings,
+                    "model_version": MODEL_VERSION
+                }
+            })
+        except HTTPException as e:
+            yield _sse("error", {"status": e.status_code, "detail": e.detail})
+        except UploadRejected as e:
+            yield _sse("error", {"status": e.status_code, "detail": str(e)})
+        except Exception as e:
+            logger.error(f"Streaming analysis error: {e}")
+            yield _sse("error", {"status": 500, "detail": str(e)})
+        finally:
+            analysis.close()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _ws_error(websocket: WebSocket, status: int, detail: str):
+    """推送错误并关闭连接 (客户端可能已断开)"""
+    try:
+        await websocket.send_json({"type": "error", "status": status, "detail": detail})
+        await websocket.close(code=1011 if status >= 500 else 1008)
+    except Exception:
+        pass
+
+
+@app.websocket("/ws/recognize")
+async def recognize_stream(websocket: WebSocket):
+    """
+    实时流式识别
+    
+    客户端:
+        二进制消息: 16kHz 单声道 pcm_s16le 音频帧 (任意长度)
+        文本消息 {"type": "end"}: 结束输入, 等待整体结果
+    
+    服务端 (JSON 文本消息):
+        ready:   {"type": "ready", "sample_rate": 16000, "format": "pcm_s16le"}
+        segment: 一句结束后的结果 {"type", "index", "start_s", "end_s", "text", "emotion", "intensity", "events", "language"}
+        partial: 未结束句子的中间结果 (WS_PARTIAL_INTERVAL_S > 0 时), 字段同 segment (无 index)
+        result:  收到 end 后整个会话的结果与签名 (字段同 /analyze 的响应), 随后关闭连接
+        error:   {"type": "error", "status", "detail"}, 随后关闭连接
+    """
+    await websocket.accept()
+    if not emotion_analyzer or not bot_public_key:
+        await _ws_error(websocket, 503, "Emotion analyzer or BLS signer not available")
+        return
+    
+    start_time = time.perf_counter()
+    timings: Dict[str, float] = {}
+    session = RecognitionSession(
+        Endpointer(
+            threshold_db=SILENCE_GATE_THRESHOLD_DB,
+            end_silence_ms=WS_END_SILENCE_MS,
+            max_segment_s=emotion_analyzer.MAX_SEGMENT_MS / 1000
+        ),
+        max_duration_s=STREAM_MAX_AUDIO_DURATION_S
+    )
+    queue: asyncio.Queue = asyncio.Queue()
+    pending = 0  # 已入队但未推送结果的句子数
+    
+    async def recognize():
+        """按顺序推理已结束的句子 (及中间结果) 并推送"""
+        nonlocal pending
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            message = await run_inference(session.analyze_segment, emotion_analyzer, *item)
+            pending -= 1
+            await websocket.send_json(message)
+    
+    worker = asyncio.create_task(recognize())
+    last_partial_s = 0.0
+    try:
+        await websocket.send_json({"type": "ready", "sample_rate": REALTIME_SAMPLE_RATE, "format": "pcm_s16le"})
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                logger.info("Recognition client disconnected before end")
+                return
+            if worker.done():
+                worker.result()  # 推理失败时抛出
+            
+            if message.get("bytes"):
+                for start, audio in session.feed(message["bytes"]):
+                    pending += 1
+                    queue.put_nowait((start, audio, True))
+                if session.too_long:
+                    raise AudioTooLongError(f"Audio longer than {STREAM_MAX_AUDIO_DURATION_S:.0f}s")
+                # 中间结果只在没有待处理句子时推理, 不拖慢已结束句子的结果
+                current = session.endpointer.current()
+                if (WS_PARTIAL_INTERVAL_S > 0 and current is not None and pending == 0
+                        and session.duration_s - last_partial_s >= WS_PARTIAL_INTERVAL_S):
+                    last_partial_s = session.duration_s
+                    pending += 1
+                    queue.put_nowait((*current, False))
+            elif message.get("text"):
+                try:
+                    control = json.loads(message["text"])
+                except ValueError:
+                    control = {}
+                if isinstance(control, dict) and control.get("type") == "end":
+                    break
         
-        # 6. 生成时间戳和随机数
-        timestamp = int(time.time())
-        nonce = secrets.token_hex(16)
+        tail = session.endpointer.flush()
+        if tail is not None:
+            queue.put_nowait((*tail, True))
+        queue.put_nowait(None)
+        await worker
         
-        # 7. 构造待签名消息
-        # 消息格式: audio_hash || result_hash || public_key || timestamp || nonce
-        message = construct_message(
+        aggregate = await run_inference(session.aggregate, emotion_analyzer)
+        result_json, result_hash = _build_result(aggregate)
+        crypto = await _sign_result(session.audio_hash, result_hash, timings)
+        await websocket.send_json({
+            "type": "result",
+            "success": True,
+            "result": result_json,
+            "crypto": crypto,
+            "metadata": {
+                "audio_size": session.received_bytes,
+                "audio_duration_s": round(session.duration_s, 2),
+                "segments": session.segments,
+                "session_time_ms": int((time.perf_counter() - start_time) * 1000),
+                "stage_ms": timings,
+                "model_version": MODEL_VERSION
+            }
+        })
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.info("Recognition client disconnected")
+    except HTTPException as e:
+        await _ws_error(websocket, e.status_code, str(e.detail))
+    except UploadRejected as e:
+        await _ws_error(websocket, e.status_code, str(e))
+    except Exception as e:
+        logger.error(f"Realtime recognition error: {e}")
+        await _ws_error(websocket, 500, str(e))
+    finally:
+        worker.cancel()
+
+
+async def _sign_batch(items: List[Tuple[str, str]], timings: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    对整批结果生成一个 BLS 签名
+    
+    参数:
+        items: [(audio_hash, result_hash), ...]
+    
+    返回:
+        {"message_hashes": [...], "attestation": {...}}
+    """
+    timestamp = int(time.time())
+    nonce = secrets.token_hex(16)
+    
+    # 每个条目按单条格式构造消息 (共享 timestamp/nonce), 再汇总为一个批量消息
+    messages = [
+        construct_message(
             audio_hash=audio_hash,
             result_hash=result_hash,
-            algo_version="SenseVoice-v1.0",
+            algo_version=ALGO_VERSION,
             timestamp=timestamp,
             nonce=nonce
         )
-        message_hash = message.hex()
-        logger.info(f"Message hash: {message_hash[:16]}...")
+        for audio_hash, result_hash in items
+    ]
+    batch_message = construct_batch_message(messages)
+    
+    logger.info(f"Signing batch attestation over {len(messages)} results...")
+    signed = await _sign_message(batch_message, timings)
+    
+    return {
+        "message_hashes": [message.hex() for message in messages],
+        "attestation": {
+            "batch_hash": batch_message.hex(),
+            "count": len(messages),
+            **signed,
+            "timestamp": timestamp,
+            "nonce": nonce,
+            "algorithm": "BLS12-381",
+            "verified": True
+        }
+    }
+
+
+@app.post("/analyze/batch")
+async def analyze_audio_batch(audio: List[UploadFile] = File(...)):
+    """
+    批量分析多个语音文件, 返回逐条结果和一个覆盖全部成功结果的 BLS 签名
+    
+    单个文件被拒绝 (过大/超长/无法解码/语音不足) 时只在该条目返回错误, 不影响其余文件;
+    签名只覆盖成功的条目 (按 results 中的顺序), 全部失败时 crypto 为 null
+    
+    请求:
+        - audio: 多个音频文件 (multipart 中重复的 audio 字段)
+    
+    响应:
+        {
+            "success": true,
+            "results": [
+                {
+                    "filename": "a.ogg",
+                    "result": {...},
+                    "audio_hash": "...",
+                    "result_hash": "...",
+                    "message_hash": "...",
+                    "cache_hit": false
+                },
+                {
+                    "filename": "tap.ogg",
+                    "error": "Too little speech ...",
+                    "status": 422
+                }
+            ],
+            "crypto": {
+                "batch_hash": "...",    # construct_batch_message(各成功条目的 message_hash)
+                "count": 1,
+                "signature": "...",
+                "public_key": "...",
+                "timestamp": 1706600000,
+                "nonce": "...",
+                "algorithm": "BLS12-381",
+                "verified": true
+            }
+        }
+    """
+    start_time = time.perf_counter()
+    timings: Dict[str, float] = {}
+    try:
+        if not emotion_analyzer:
+            raise HTTPException(status_code=503, detail="Emotion analyzer not available. Please check server logs.")
+        if not bot_public_key:
+            raise HTTPException(status_code=503, detail="BLS signer not available. Please check .env configuration.")
+        if len(audio) > ANALYZE_BATCH_MAX_FILES:
+            raise HTTPException(status_code=413, detail=f"Too many files (max {ANALYZE_BATCH_MAX_FILES})")
         
-        # 8. BLS 签名
-        logger.info("Signing message with BLS...")
-        signature = bls_signer.sign_message(message)
-        signature_hex = signature.hex()
-        logger.info(f"Signature: {signature_hex[:16]}...")
+        with ExitStack() as stack:
+            # 1. 接收全部文件 (单个文件被拒绝时记录错误, 继续接收其余文件)
+            ingested_files: List[Optional[IngestedAudio]] = []
+            results: List[Union[Tuple[Dict[str, Any], str], UploadRejected, None]] = []
+            with stage_timer(timings, "upload_read"):
+                for upload in audio:
+                    try:
+                        ingested_files.append(stack.enter_context(await receive_audio(upload)))
+                        results.append(None)
+                    except UploadRejected as e:
+                        logger.warning(f"Batch upload {upload.filename!r} rejected: {e}")
+                        ingested_files.append(None)
+                        results.append(e)
+            
+            # 2. 命中缓存的条目直接复用, 其余一次批量推理
+            for i, ingested in enumerate(ingested_files):
+                cached = analysis_cache.get(ingested.sha256, cache_version()) if analysis_cache and ingested else None
+                if cached:
+                    results[i] = (cached["result"], cached["result_hash"])
+            
+            missing = [i for i, result in enumerate(results) if result is None]
+            if missing:
+                analyzed = await run_inference(
+                    _analyze_batch,
+                    [ingested_files[i].open() for i in missing],
+                    [ingested_files[i].sha256 for i in missing],
+                    timings
+                )
+                for i, result in zip(missing, analyzed):
+                    results[i] = result
         
-        # 9. 验证签名(自检)
-        is_valid = BLSSigner.verify_signature(bls_signer.pk, message, signature)
-        if not is_valid:
-            logger.error("❌ Signature verification failed!")
-            raise HTTPException(status_code=500, detail="Signature verification failed")
-        logger.info("✅ Signature verified successfully")
+        # 3. 一次签名覆盖全部成功的结果
+        succeeded = [i for i, result in enumerate(results) if not isinstance(result, UploadRejected)]
+        signed = None
+        if succeeded:
+            signed = await _sign_batch([(ingested_files[i].sha256, results[i][1]) for i in succeeded], timings)
+        message_hashes = dict(zip(succeeded, signed["message_hashes"])) if signed else {}
         
-        # 10. 构造返回结果
-        response = {
-            "success": True,
-            "result": result_json,
-            "crypto": {
-                "audio_hash": audio_hash,
+        items = []
+        for i, (upload, result) in enumerate(zip(audio, results)):
+            if isinstance(result, UploadRejected):
+                items.append({"filename": upload.filename, "error": str(result), "status": result.status_code})
+                continue
+            result_json, result_hash = result
+            items.append({
+                "filename": ingested_files[i].filename,
+                "result": result_json,
+                "audio_hash": ingested_files[i].sha256,
                 "result_hash": result_hash,
-                "message_hash": message_hash,
-                "signature": signature_hex,
-                "public_key": bot_public_key,
-                "timestamp": timestamp,
-                "nonce": nonce,
-                "algorithm": "BLS12-381",
-                "verified": is_valid
-            },
+                "message_hash": message_hashes[i],
+                "cache_hit": i not in missing
+            })
+        
+        logger.info(f"✅ Batch of {len(items)} processed ({len(items) - len(succeeded)} rejected)")
+        return {
+            "success": True,
+            "results": items,
+            "crypto": signed["attestation"] if signed else None,
             "metadata": {
-                "audio_size": audio_size,
-                "processing_time_ms": 0,  # 可以在开始时记录时间来计算
-                "model_version": "SenseVoice-Small"
+                "count": len(items),
+                "analyzed": len(missing),
+                "failed": len(items) - len(succeeded),
+                "processing_time_ms": int((time.perf_counter() - start_time) * 1000),
+                "stage_ms": timings,
+                "model_version": MODEL_VERSION
             }
         }
-        
-        logger.info("✅ Request processed successfully")
-        
-        return response
     
     except HTTPException:
         raise
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.error(f"Batch analysis error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/voiceprint")
-async def extract_voiceprint(audio: UploadFile = File(...)):
+async def extract_voiceprint(request: Request, audio: UploadFile = File(...)):
     """
     提取音频的声纹特征向量 (Speaker Embedding)
+    
+    返回格式见 embedding_codec.py: ?encoding=f16|f32 返回 base64 块,
+    Accept: application/msgpack 返回 msgpack, Accept: application/octet-stream 只返回声纹原始字节;
+    metadata 包含各阶段耗时与静音门限统计 (input_s / speech_s / trimmed_s, 门限关闭时省略)
     """
+    start_time = time.perf_counter()
+    timings: Dict[str, float] = {}
+    audio_stats: Dict[str, float] = {}
     try:
         if not speaker_verifier:
             raise HTTPException(status_code=503, detail="Speaker verifier not available")
+        media_type, encoding = negotiate(request, allow_octet=True)
             
-        audio_bytes = await audio.read()
-        if not audio_bytes:
-            raise HTTPException(status_code=400, detail="Empty audio file")
-            
-        embedding = speaker_verifier.get_embedding(audio_bytes)
+        with stage_timer(timings, "upload_read"):
+            ingested = await receive_audio(audio)
+        with ingested:
+            embedding = await run_inference(_embed_upload, ingested.open(), timings, audio_stats)
         
-        if embedding is None:
-            raise HTTPException(status_code=500, detail="Voiceprint extraction failed")
-            
-        return {
+        embedding = _as_vector(embedding)
+        payload = {
             "success": True,
-            "embedding": embedding.tolist(),
-            "dimensions": len(embedding)
+            "dimensions": len(embedding),
+            "metadata": {
+                "processing_time_ms": int((time.perf_counter() - start_time) * 1000),
+                "stage_ms": timings,
+                **audio_stats,
+                "voiceprint_model_version": VOICEPRINT_MODEL_VERSION
+            }
         }
+        return render_embedding(payload, embedding, media_type, encoding)
+    except HTTPException:
+        raise
+    except (UploadRejected, EmbeddingCodecError) as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         logger.error(f"Voiceprint error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def embedding_hash(embedding: np.ndarray) -> str:
+    """声纹向量哈希: float32 小端字节的 SHA-256 (客户端可由返回的 embedding 重新计算)"""
+    return hashlib.sha256(np.asarray(embedding, dtype="<f4").tobytes()).hexdigest()
+
+
+def _as_vector(embedding) -> np.ndarray:
+    """模型输出 (torch 张量或数组) -> float32 一维向量"""
+    if embedding is None:
+        raise HTTPException(status_code=500, detail="Voiceprint extraction failed")
+    return np.asarray(embedding.cpu() if hasattr(embedding, "cpu") else embedding, dtype=np.float32).flatten()
+
+
+def _embed_upload(audio, timings: Dict[str, float], audio_stats: Dict[str, float]):
+    """解码并提取声纹(阻塞, 在推理线程池中调用), 写入各阶段耗时与静音门限统计"""
+    with stage_timer(timings, "decode"):
+        audio_array, _ = decode_audio(audio)
+    with stage_timer(timings, "embed"):
+        return speaker_verifier.embed(audio_array, audio_stats)
+
+
+def _embed(audio_array: np.ndarray, timings: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """提取声纹(阻塞, 在推理线程池中调用)"""
+    with stage_timer(timings, "embed"):
+        embedding = speaker_verifier.embed(audio_array)
+    return _as_vector(embedding)
+
+
+async def _analyze_with_voiceprint(audio, audio_hash: str, timings: Dict[str, float]) -> Dict[str, Any]:
+    """
+    解码一次, SenseVoice 与 CAM++ 在推理线程池中并发处理同一段波形
+
+    情感分析结果同时写入 /analyze 的缓存
+
+    返回:
+        {"result", "result_hash", "embedding"}; result 中包含声纹哈希, 一次签名即覆盖两者
+    """
+    audio_array = await run_inference(emotion_analyzer.decode, audio, timings)
+    analysis_result, embedding = await asyncio.gather(
+        run_inference(emotion_analyzer.analyze_array, audio_array, timings),
+        run_inference(_embed, audio_array, timings)
+    )
+    del audio_array
+
+    analysis_json, analysis_hash = _build_result(analysis_result)
+    if analysis_cache:
+        analysis_cache.put(audio_hash, cache_version(), {"result": analysis_json, "result_hash": analysis_hash})
+
+    result_json = {
+        **analysis_json,
+        "voiceprint": {
+            "embedding_hash": embedding_hash(embedding),
+            "dimensions": len(embedding),
+            "model_version": VOICEPRINT_MODEL_VERSION
+        }
+    }
+    result_hash = hashlib.sha256(json.dumps(result_json, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+    return {"result": result_json, "result_hash": result_hash, "embedding": embedding.tolist()}
+
+
+@app.post("/analyze/voiceprint")
+async def analyze_with_voiceprint(request: Request, audio: UploadFile = File(...)):
+    """
+    情感分析 + 声纹提取 (同一份上传只接收、哈希、解码一次)
+    
+    响应:
+        {
+            "success": true,
+            "result": {... /analyze 的 result 字段 ..., "voiceprint": {"embedding_hash", "dimensions", "model_version"}},
+            "embedding": [...],
+            "crypto": {... 签名覆盖 result (包括 embedding_hash) ...},
+            "metadata": {...}
+        }
+    
+    embedding 的编码与 /voiceprint 相同 (不支持 octet-stream); 需要校验 embedding_hash 时不要使用 f16
+    """
+    start_time = time.perf_counter()
+    timings: Dict[str, float] = {}
+    try:
+        if not emotion_analyzer or not speaker_verifier:
+            raise HTTPException(status_code=503, detail="Emotion analyzer or speaker verifier not available")
+        if not bot_public_key:
+            raise HTTPException(status_code=503, detail="BLS signer not available. Please check .env configuration.")
+        media_type, encoding = negotiate(request)
+        
+        with stage_timer(timings, "upload_read"):
+            ingested = await receive_audio(audio)
+        with ingested:
+            audio_size = ingested.size
+            audio_hash = ingested.sha256
+            cached = analysis_cache.get(audio_hash, cache_version(VOICEPRINT_CACHE_VERSION)) if analysis_cache else None
+            if cached:
+                logger.info("Analysis cache hit, reusing result and voiceprint")
+                combined = cached
+            else:
+                combined = await _analyze_with_voiceprint(ingested.open(), audio_hash, timings)
+                if analysis_cache:
+                    analysis_cache.put(audio_hash, cache_version(VOICEPRINT_CACHE_VERSION), combined)
+        
+        crypto = await _sign_result(audio_hash, combined["result_hash"], timings)
+        payload = {
+            "success": True,
+            "result": combined["result"],
+            "crypto": crypto,
+            "metadata": {
+                "audio_size": audio_size,
+                "processing_time_ms": int((time.perf_counter() - start_time) * 1000),
+                "stage_ms": timings,
+                "model_version": MODEL_VERSION,
+                "voiceprint_model_version": VOICEPRINT_MODEL_VERSION,
+                "cache_hit": cached is not None
+            }
+        }
+        return render_embedding(payload, np.asarray(combined["embedding"], dtype=np.float32), media_type, encoding)
+    except HTTPException:
+        raise
+    except (UploadRejected, EmbeddingCodecError) as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except Exception as e:
+        logger.error(f"Analyze+voiceprint error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _require_speaker_store():
+    if not speaker_verifier:
+        raise HTTPException(status_code=503, detail="Speaker verifier not available")
+    if speaker_store is None:
+        raise HTTPException(status_code=503, detail="Speaker store not available (SPEAKER_STORE_DIR not set)")
+
+
+def _enroll_speaker(audio, speaker_id: str) -> bool:
+    """提取声纹并写入声纹库(阻塞, 在推理线程池中调用); 返回是否为新注册"""
+    return speaker_store.enroll(speaker_id, _as_vector(speaker_verifier.get_embedding(audio)))
+
+
+def _identify_speaker(audio, k: int) -> List[Tuple[str, float]]:
+    """提取声纹并在声纹库中查询 top-k(阻塞, 在推理线程池中调用)"""
+    return speaker_store.identify(_as_vector(speaker_verifier.get_embedding(audio)), k)
+
+
+@app.post("/voiceprint/enroll")
+async def enroll_voiceprint(audio: UploadFile = File(...), speaker_id: str = Form(...)):
+    """
+    注册说话人声纹 (同一 speaker_id 再次注册时替换原声纹)
+    """
+    _require_speaker_store()
+    try:
+        with await receive_audio(audio) as ingested:
+            created = await run_inference(_enroll_speaker, ingested.open(), speaker_id)
+        return {"success": True, "speaker_id": speaker_id, "created": created, "speakers": len(speaker_store)}
+    except HTTPException:
+        raise
+    except (UploadRejected, SpeakerStoreError) as e:
+        raise HTTPException(status_code=getattr(e, "status_code", 400), detail=str(e))
+    except Exception as e:
+        logger.error(f"Voiceprint enroll error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/voiceprint/identify")
+async def identify_voiceprint(audio: UploadFile = File(...), k: int = 5):
+    """
+    1:N 说话人识别: 返回声纹库中相似度最高的 k 个说话人
+    
+    响应:
+        {
+            "success": true,
+            "matches": [{"speaker_id": "123", "similarity": 0.82, "matched": true}, ...],
+            "best": {...} 或 null (最高分低于阈值时)
+        }
+    """
+    _require_speaker_store()
+    if not 1 <= k <= 100:
+        raise HTTPException(status_code=400, detail="k must be between 1 and 100")
+    try:
+        with await receive_audio(audio) as ingested:
+            results = await run_inference(_identify_speaker, ingested.open(), k)
+        matches = [
+            {"speaker_id": speaker_id, "similarity": score, "matched": score > VOICEPRINT_MATCH_THRESHOLD}
+            for speaker_id, score in results
+        ]
+        return {
+            "success": True,
+            "matches": matches,
+            "best": matches[0] if matches and matches[0]["matched"] else None,
+            "threshold": VOICEPRINT_MATCH_THRESHOLD,
+            "speakers": len(speaker_store)
+        }
+    except HTTPException:
+        raise
+    except (UploadRejected, SpeakerStoreError) as e:
+        raise HTTPException(status_code=getattr(e, "status_code", 400), detail=str(e))
+    except Exception as e:
+        logger.error(f"Voiceprint identify error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.delete("/voiceprint/speakers/{speaker_id}")
+async def delete_voiceprint(speaker_id: str):
+    """从声纹库中删除说话人"""
+    _require_speaker_store()
+    if not await asyncio.get_running_loop().run_in_executor(None, speaker_store.remove, speaker_id):
+        raise HTTPException(status_code=404, detail=f"Unknown speaker: {speaker_id}")
+    return {"success": True, "speaker_id": speaker_id, "speakers": len(speaker_store)}
+
+
+def _find_duplicates(audio, speaker_id: Optional[str], k: int, nprobe: Optional[int]):
+    """提取声纹并检索其他 ID 下的相似声纹(阻塞, 在推理线程池中调用; 首次建索引时包含训练)"""
+    embedding = _as_vector(speaker_verifier.get_embedding(audio))
+    return voiceprint_index.search(embedding, k, nprobe, exclude=[speaker_id] if speaker_id else ())
+
+
+@app.post("/voiceprint/duplicates")
+async def find_duplicate_voiceprints(
+    audio: UploadFile = File(...),
+    speaker_id: Optional[str] = Form(None),
+    k: int = 5,
+    nprobe: Optional[int] = None
+):
+    """
+    一人多号检查: 该声音是否已以其他 ID 注册
+    
+    参数:
+        speaker_id: 提交者自己的 ID (结果中排除)
+        nprobe: 扫描的簇数, 越大召回率越高 (默认 VOICEPRINT_ANN_NPROBE)
+    
+    响应:
+        {
+            "success": true,
+            "duplicate": true,
+            "duplicates": [{"speaker_id": "456", "similarity": 0.81}, ...],  # 高于阈值的其他 ID
+            "matches": [...],                                                # top-k, 含低于阈值的
+            "approximate": true                                              # 是否使用了 IVF-PQ 索引
+        }
+    """
+    _require_speaker_store()
+    if not 1 <= k <= 100:
+        raise HTTPException(status_code=400, detail="k must be between 1 and 100")
+    if nprobe is not None and nprobe < 1:
+        raise HTTPException(status_code=400, detail="nprobe must be positive")
+    try:
+        with await receive_audio(audio) as ingested:
+            results, approximate = await run_inference(_find_duplicates, ingested.open(), speaker_id, k, nprobe)
+        matches = [{"speaker_id": match_id, "similarity": score} for match_id, score in results]
+        duplicates = [match for match in matches if match["similarity"] > VOICEPRINT_MATCH_THRESHOLD]
+        return {
+            "success": True,
+            "speaker_id": speaker_id,
+            "duplicate": bool(duplicates),
+            "duplicates": duplicates,
+            "matches": matches,
+            "threshold": VOICEPRINT_MATCH_THRESHOLD,
+            "approximate": approximate,
+            "speakers": len(speaker_store)
+        }
+    except HTTPException:
+        raise
+    except (UploadRejected, SpeakerStoreError) as e:
+        raise HTTPException(status_code=getattr(e, "status_code", 400), detail=str(e))
+    except Exception as e:
+        logger.error(f"Voiceprint duplicate check error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/compare_voiceprints")
-async def compare_voiceprints(data: Dict[str, Any]):
+async def compare_voiceprints(request: Request):
     """
     比较两个声纹特征向量的相似度
+    
+    embedding1 / embedding2 可以是数值列表或 /voiceprint 返回的编码块; 请求体可为 JSON 或 msgpack
+    threshold 可选, 默认 VOICEPRINT_MATCH_THRESHOLD (与 /compare_voiceprints/batch 相同), 响应中返回实际使用的阈值
     """
     try:
         if not speaker_verifier:
             raise HTTPException(status_code=503, detail="Speaker verifier not available")
             
+        data = await read_body(request)
         emb1 = data.get("embedding1")
         emb2 = data.get("embedding2")
         
         if not emb1 or not emb2:
             raise HTTPException(status_code=400, detail="Missing embeddings (embedding1 and embedding2)")
+        threshold = data.get("threshold", VOICEPRINT_MATCH_THRESHOLD)
+        if not isinstance(threshold, (int, float)) or isinstance(threshold, bool):
+            raise HTTPException(status_code=400, detail="threshold must be a number")
             
-        # analyzer.py handles list -> array conversion
-        similarity = speaker_verifier.calculate_similarity(emb1, emb2)
+        similarity = speaker_verifier.calculate_similarity(decode_array(emb1), decode_array(emb2))
         
         return {
             "success": True,
             "similarity": similarity,
-            "matched": similarity > 0.60 # 阈值从 0.85 降低到 0.60，更符合实际场景
+            "matched": similarity > threshold,
+            "threshold": float(threshold)
         }
+    except HTTPException:
+        raise
+    except EmbeddingCodecError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         logger.error(f"Comparison error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _embedding_matrix(data: Dict[str, Any], key: str) -> np.ndarray:
+    """请求中的声纹 (列表、编码块列表或编码后的矩阵) -> float32 矩阵 (每行一个声纹)"""
+    vectors = data.get(key)
+    if not vectors or not isinstance(vectors, (list, dict)):
+        raise HTTPException(status_code=400, detail=f"'{key}' must be a non-empty list of embeddings")
+    try:
+        matrix = decode_array(vectors, ndim=2)
+    except EmbeddingCodecError as e:
+        raise HTTPException(status_code=400, detail=f"'{key}': {e}")
+    if not np.isfinite(matrix).all():
+        raise HTTPException(status_code=400, detail=f"'{key}' contains non-finite values")
+    return matrix
+
+
+def _embedding_ids(data: Dict[str, Any], key: str, count: int) -> Optional[List[Any]]:
+    ids = data.get(key)
+    if ids is not None and (not isinstance(ids, list) or len(ids) != count):
+        raise HTTPException(status_code=400, detail=f"'{key}' must be a list with one ID per embedding")
+    return ids
+
+
+def _compare_batch(
+    queries: np.ndarray,
+    candidates: np.ndarray,
+    top_k: Optional[int],
+    threshold: float,
+    encoding: str = "json",
+    binary: bool = False
+) -> Dict[str, Any]:
+    """相似度矩阵与阈值判定 (一次归一化矩阵乘法); 完整矩阵按 encoding 编码"""
+    similarity = cosine_similarity_matrix(queries, candidates)
+    if top_k is None:
+        return {
+            "similarity": encode_array(similarity, encoding, binary),
+            "matches": [np.flatnonzero(row > threshold).tolist() for row in similarity]
+        }
+    k = min(top_k, similarity.shape[1])
+    top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+    top = np.take_along_axis(top, np.argsort(-np.take_along_axis(similarity, top, axis=1), axis=1), axis=1)
+    scores = np.take_along_axis(similarity, top, axis=1)
+    return {"top_k": [
+        [
+            {"candidate": int(j), "similarity": float(score), "matched": bool(score > threshold)}
+            for j, score in zip(row, row_scores)
+        ]
+        for row, row_scores in zip(top, scores)
+    ]}
+
+
+@app.post("/compare_voiceprints/batch")
+async def compare_voiceprints_batch(request: Request):
+    """
+    N:M 声纹比较: 一次请求比较一组查询声纹与一组候选声纹 (例如一个用户与其历史声纹)
+    
+    请求:
+        {
+            "queries": [[...], ...],          # Q 个声纹
+            "candidates": [[...], ...],       # C 个声纹 (维度与 queries 相同)
+            "query_ids": [...],               # 可选, 原样返回
+            "candidate_ids": [...],           # 可选, top_k 结果中附带
+            "top_k": 5,                       # 可选; 省略时返回完整 Q x C 相似度矩阵
+            "threshold": 0.6                  # 可选, 默认 VOICEPRINT_MATCH_THRESHOLD
+        }
+    
+    响应 (省略 top_k):
+        {"success": true, "similarity": [[0.82, ...], ...], "matches": [[0, 3], ...]}  # matches: 每个查询高于阈值的候选下标
+    响应 (指定 top_k):
+        {"success": true, "top_k": [[{"candidate": 3, "similarity": 0.82, "matched": true}, ...], ...]}
+    
+    请求体可为 JSON 或 msgpack, 声纹可使用 /voiceprint 返回的编码块; ?encoding=f16|f32 或
+    Accept: application/msgpack 时完整相似度矩阵以二进制块返回 (见 embedding_codec.py)
+    
+    不需要加载声纹模型; 零向量与任何声纹的相似度为 0
+    """
+    try:
+        data = await read_body(request)
+        media_type, encoding = negotiate(request)
+    except EmbeddingCodecError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    queries = _embedding_matrix(data, "queries")
+    candidates = _embedding_matrix(data, "candidates")
+    if queries.shape[1] != candidates.shape[1]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Dimension mismatch: queries {queries.shape[1]}, candidates {candidates.shape[1]}"
+        )
+    if len(queries) * len(candidates) > COMPARE_BATCH_MAX_PAIRS:
+        raise HTTPException(status_code=413, detail=f"Too many pairs (max {COMPARE_BATCH_MAX_PAIRS})")
+    query_ids = _embedding_ids(data, "query_ids", len(queries))
+    candidate_ids = _embedding_ids(data, "candidate_ids", len(candidates))
+
+    top_k = data.get("top_k")
+    if top_k is not None and (not isinstance(top_k, int) or isinstance(top_k, bool) or top_k < 1):
+        raise HTTPException(status_code=400, detail="top_k must be a positive integer")
+    threshold = data.get("threshold", VOICEPRINT_MATCH_THRESHOLD)
+    if not isinstance(threshold, (int, float)) or isinstance(threshold, bool):
+        raise HTTPException(status_code=400, detail="threshold must be a number")
+
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(
+            None, _compare_batch, queries, candidates, top_k, float(threshold), encoding, media_type == MSGPACK_TYPE
+        )
+    except Exception as e:
+        logger.error(f"Batch comparison error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if candidate_ids is not None and "top_k" in result:
+        for row in result["top_k"]:
+            for match in row:
+                match["candidate_id"] = candidate_ids[match["candidate"]]
+    return render({
+        "success": True,
+        "queries": len(queries),
+        "candidates": len(candidates),
+        "query_ids": query_ids,
+        "threshold": float(threshold),
+        **result
+    }, media_type)
+
+
 @app.post("/verify")
 async def verify_signature(
     audio_hash: str,
@@ -381,7 +1720,7 @@ async def verify_signature(
         message = construct_message(
             audio_hash=audio_hash,
             result_hash=result_hash,
-            algo_version="SenseVoice-v1.0",
+            algo_version=ALGO_VERSION,
             timestamp=timestamp,
             nonce=nonce
         )
@@ -391,7 +1730,7 @@ async def verify_signature(
         public_key_bytes = bytes.fromhex(public_key)
         
         # 验证
-        is_valid = BLSSigner.verify_signature(
+        is_valid = await _verify_signature(
             public_key_bytes,
             message,
             signature_bytes
@@ -404,6 +1743,203 @@ async def verify_signature(
         return {"valid": False, "error": str(e)}
 
 
+@app.post("/verify/batch")
+async def verify_signature_batch(data: Dict[str, Any]):
+    """
+    批量验证多个独立签名 (随机线性组合 + 共享最终幂运算, 失败时二分定位)
+    
+    请求:
+        {
+            "items": [
+                {
+                    "audio_hash": "...",
+                    "result_hash": "...",
+                    "timestamp": 1706600000,
+                    "nonce": "...",
+                    "signature": "...",
+                    "public_key": "..."
+                }
+            ]
+        }
+    
+    返回:
+        {"valid": true/false, "results": [true, ...], "invalid_indices": [...], "count": n}
+    """
+    items = data.get("items")
+    if not isinstance(items, list) or not items:
+        raise HTTPException(status_code=400, detail="Missing items")
+    if len(items) > VERIFY_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Too many items (max {VERIFY_BATCH_MAX_ITEMS})")
+    
+    # 格式错误的条目直接判定为无效, 其余进入批量验证
+    results = [False] * len(items)
+    triples = []
+    positions = []
+    for index, item in enumerate(items):
+        try:
+            message = construct_message(
+                audio_hash=item["audio_hash"],
+                result_hash=item["result_hash"],
+                algo_version=ALGO_VERSION,
+                timestamp=int(item["timestamp"]),
+                nonce=item["nonce"]
+            )
+            triples.append((bytes.fromhex(item["public_key"]), message, bytes.fromhex(item["signature"])))
+            positions.append(index)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Malformed verify item {index}: {e}")
+    
+    if triples:
+        # 验证是纯 CPU 计算, 放到签名进程或线程中避免阻塞事件循环
+        if signing_service:
+            verified = await signing_service.batch_verify(triples)
+        else:
+            loop = asyncio.get_running_loop()
+            verified = await loop.run_in_executor(None, BLSSigner.batch_verify, triples)
+        for index, is_valid in zip(positions, verified):
+            results[index] = is_valid
+    
+    invalid = [i for i, is_valid in enumerate(results) if not is_valid]
+    return {
+        "valid": not invalid,
+        "results": results,
+        "invalid_indices": invalid,
+        "count": len(items)
+    }
+
+
+def _require_committee_admin(token: Optional[str]):
+    """委员会变更鉴权; 多进程模式下成员列表只在内存中时禁止变更 (只会改到处理该请求的工作进程)"""
+    if not COMMITTEE_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Committee changes are disabled (COMMITTEE_ADMIN_TOKEN not set)")
+    if WORKERS > 1 and not committee_registry.path:
+        raise HTTPException(
+            status_code=403, detail="Committee changes are disabled (WORKERS > 1 needs COMMITTEE_REGISTRY_PATH)"
+        )
+    if not token or not secrets.compare_digest(token, COMMITTEE_ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.get("/committees/{committee_id}")
+async def get_committee(committee_id: str):
+    """
+    查询委员会成员 (按注册顺序, 即签名者位图顺序) 与聚合公钥
+    
+    已移除成员的位置为 null 且不会复用, 位图长度为 slots (包含这些位置), size 为当前成员数
+    """
+    if not committee_registry:
+        raise HTTPException(status_code=503, detail="BLS signer not available")
+    try:
+        members = committee_registry.members(committee_id)
+        aggregate_pk = committee_registry.aggregate_public_key(committee_id)
+    except CommitteeError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {
+        "committee_id": committee_id,
+        "size": sum(1 for pk in members if pk is not None),
+        "slots": len(members),
+        "members": [pk.hex() if pk is not None else None for pk in members],
+        "aggregate_public_key": aggregate_pk.hex()
+    }
+
+
+@app.post("/committees/{committee_id}/members")
+async def register_committee_member(
+    committee_id: str,
+    data: Dict[str, Any],
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    注册验证者 (需要 X-Admin-Token)
+    
+    请求:
+        {"public_key": "...", "proof": "..."}  # proof 为 PopProve 生成的 proof-of-possession
+    """
+    _require_committee_admin(x_admin_token)
+    try:
+        public_key = bytes.fromhex(data["public_key"])
+        proof = bytes.fromhex(data["proof"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="public_key and proof (hex) are required")
+    
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(None, committee_registry.register, committee_id, public_key, proof)
+    except CommitteeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await get_committee(committee_id)
+
+
+@app.delete("/committees/{committee_id}/members/{public_key}")
+async def remove_committee_member(
+    committee_id: str,
+    public_key: str,
+    x_admin_token: Optional[str] = Header(None)
+):
+    """移除验证者 (需要 X-Admin-Token)"""
+    _require_committee_admin(x_admin_token)
+    try:
+        committee_registry.remove(committee_id, bytes.fromhex(public_key))
+    except (CommitteeError, ValueError) as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"success": True, "committee_id": committee_id}
+
+
+@app.post("/verify/quorum")
+async def verify_quorum(data: Dict[str, Any]):
+    """
+    验证委员会聚合签名 (缓存的聚合公钥, 一次配对检查)
+    
+    请求:
+        {
+            "committee_id": "default",
+            "audio_hash": "...", "result_hash": "...", "timestamp": 1706600000, "nonce": "...",
+            "signature": "...",            # 聚合签名
+            "signer_bitmap": "07",         # 可选, 十六进制或 0/1 列表, 按成员位置 (含已移除的位置); 缺省表示全体成员
+            "threshold": 2                 # 可选, 最少签名人数 (1 到当前成员数之间的整数)
+        }
+    
+    返回:
+        {"valid": true/false}
+    """
+    if not committee_registry:
+        raise HTTPException(status_code=503, detail="BLS signer not available")
+    committee_id = data.get("committee_id", DEFAULT_COMMITTEE_ID)
+    try:
+        message = construct_message(
+            audio_hash=data["audio_hash"],
+            result_hash=data["result_hash"],
+            algo_version=ALGO_VERSION,
+            timestamp=int(data["timestamp"]),
+            nonce=data["nonce"]
+        )
+        signature = bytes.fromhex(data["signature"])
+        signer_bitmap = None
+        threshold = data.get("threshold")
+        if data.get("signer_bitmap") is not None or threshold is not None:
+            members = committee_registry.members(committee_id)
+            size = sum(1 for pk in members if pk is not None)
+        if data.get("signer_bitmap") is not None:
+            signer_bitmap = decode_bitmap(data["signer_bitmap"], len(members))
+        if threshold is not None and (
+            not isinstance(threshold, int) or isinstance(threshold, bool) or not 1 <= threshold <= size
+        ):
+            raise HTTPException(status_code=400, detail=f"threshold must be an integer between 1 and {size}")
+    except CommitteeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid request: {e}")
+    
+    loop = asyncio.get_running_loop()
+    is_valid = await loop.run_in_executor(
+        None,
+        lambda: committee_registry.verify_quorum(
+            committee_id, message, signature, signer_bitmap, threshold
+        )
+    )
+    return {"valid": is_valid, "committee_id": committee_id}
+
+
 @app.get("/public-key")
 async def get_public_key():
     """获取服务的公钥"""
@@ -413,17 +1949,36 @@ async def get_public_key():
     return {
         "public_key": bot_public_key,
         "algorithm": "BLS12-381",
-        "curve": "G2ProofOfPossession"
+        "curve": "G2ProofOfPossession",
+        "backend": signing_service.backend_name if signing_service else bls_signer.backend.name,
+        "quorum": {
+            "committee_id": DEFAULT_COMMITTEE_ID,
+            "validators": [pk.hex() for pk in quorum_signer.public_keys],
+            "committee_public_key": quorum_signer.aggregate_public_key.hex(),
+            "threshold": quorum_signer.threshold
+        } if quorum_signer else None
     }
 
 
 if __name__ == "__main__":
-    # 运行服务
-    uvicorn.run(
-        app,
-        host="0.0.0.0",  # 监听所有网络接口
-        port=8001,       # 端口号
-        log_level="info"
-    )
+    # 多进程模式: WORKERS > 1 时父进程加载模型后 fork 出工作进程 (见 prefork.py)
+    if WORKERS > 1:
+        PreforkServer(
+            app,
+            host="0.0.0.0",
+            port=8001,
+            workers=WORKERS,
+            threads_per_worker=int(os.getenv("WORKER_THREADS", "0")) or None,
+            preload=preload_models,
+            log_level="info"
+        ).run()
+    else:
+        # 运行服务
+        uvicorn.run(
+            app,
+            host="0.0.0.0",  # 监听所有网络接口
+            port=8001,       # 端口号
+            log_level="info"
+        )
 
     
\ No newline at end of file
@@ -0,0 +1,479 @@
+# audio_frontend.py - 音频解码前端
+"""
+把上传的音频解码为 16kHz 单声道 float32 (模型输入格式)
+
+- 按文件头魔数识别格式; 无已知文件头的数据先交给 ffmpeg / torchaudio, 都失败时才按原始 PCM 解析
+  (调用方明确声明为 PCM 时直接解析, 不再试探)
+- WAV / 原始 PCM: 直接解析 RIFF 头, np.frombuffer 读取采样数据 (不经过 BytesIO / torch 张量),
+  仅在转换为 float32 时复制一次
+- Opus/OGG 等压缩格式: ffmpeg 一次完成解码 + 下混 + 重采样, 直接输出 16kHz 单声道;
+  ffmpeg 不可用或失败时回退到 torchaudio.load + 重采样
+- 重采样器按 (原采样率, 目标采样率) 缓存, 滤波器核只计算一次
+  (Telegram 语音为 48kHz Opus, 此前每个请求都会重新构造 Resample)
+- 长音频: stream_decode 按块解码, 内存占用与总时长无关
+"""
+
+import io
+import logging
+import mmap
+import os
+import shutil
+import struct
+import subprocess
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import BinaryIO, Callable, Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    import torch
+    import torchaudio
+except ImportError:
+    torch = None
+    torchaudio = None
+
+from ingest import UploadRejected
+
+logger = logging.getLogger(__name__)
+
+TARGET_SAMPLE_RATE = 16000
+
+# ffmpeg 可执行文件 (设为空字符串禁用 ffmpeg 解码)
+FFMPEG_BINARY = os.getenv("AUDIO_FFMPEG", "ffmpeg")
+FFMPEG_TIMEOUT_S = float(os.getenv("AUDIO_FFMPEG_TIMEOUT_S", "30"))
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class AudioDecodeError(UploadRejected):
+    """无法解码的音频"""
+
+    status_code = 400
+
+
+def sniff_format(header: bytes) -> str:
+    """
+    根据文件头魔数识别音频格式
+
+    返回:
+        "wav" / "ogg" / "flac" / "mp3" / "aac" / "mp4" / "webm" / "aiff" / "caf" / "amr" / "unknown"
+        (无已知文件头: 可能是原始 PCM, 也可能是这里未列出的格式)
+    """
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[:4] == b"OggS":
+        return "ogg"
+    if header[:4] == b"fLaC":
+        return "flac"
+    if header[:3] == b"ID3":
+        return "mp3"
+    if len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0:
+        # MPEG 帧同步字: layer 位为 00 的是 AAC ADTS, 其余为 MP1/2/3 (含带 CRC 的 \xff\xfa)
+        return "aac" if header[1] & 0x06 == 0 else "mp3"
+    if header[4:8] == b"ftyp":
+        return "mp4"
+    if header[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"
+    if header[:4] == b"FORM" and header[8:12] in (b"AIFF", b"AIFC"):
+        return "aiff"
+    if header[:4] == b"caff":
+        return "caf"
+    if header[:5] == b"#!AMR":
+        return "amr"
+    return "unknown"
+
+
+def _map_file(file: BinaryIO) -> Optional[mmap.mmap]:
+    """只读映射整个文件; 文件为空、无 fileno 或不支持 mmap 时返回 None"""
+    try:
+        fileno = file.fileno()
+        file.flush()
+        if os.fstat(fileno).st_size == 0:
+            return None
+        return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        return None
+
+
+@contextmanager
+def _as_buffer(audio: Union[bytes, bytearray, memoryview, BinaryIO]) -> Iterator[memoryview]:
+    """
+    取得音频数据的只读视图, 不复制数据
+
+    - bytes / BytesIO: 直接共享内存
+    - SpooledTemporaryFile (ingest 的上传缓存): 未落盘时共享内部 BytesIO, 已落盘时 mmap 临时文件
+    - 其他带 fileno 的文件: mmap; 无法映射的文件对象 (如网络流) 才读取一次
+
+    退出时释放视图并关闭映射, 之后文件对象可以正常关闭
+    """
+    mapped = None
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        view = memoryview(audio)
+    elif getattr(audio, "_rolled", None) is False and hasattr(getattr(audio, "_file", None), "getbuffer"):
+        view = audio._file.getbuffer()
+    elif hasattr(audio, "getbuffer"):
+        view = audio.getbuffer()
+    else:
+        mapped = _map_file(audio)
+        if mapped is not None:
+            view = memoryview(mapped)
+        else:
+            audio.seek(0)
+            view = memoryview(audio.read())
+    try:
+        yield view
+    finally:
+        view.release()
+        if mapped is not None:
+            mapped.close()
+
+
+# ---- 重采样 ----
+
+def _sinc_decimator(factor: int, taps_per_side: int = 16) -> Callable[[np.ndarray], np.ndarray]:
+    """整数倍降采样: 加窗 sinc 低通 + 抽取 (无 torchaudio 时使用)"""
+    n = np.arange(-taps_per_side * factor, taps_per_side * factor + 1)
+    kernel = np.sinc(n / factor) / factor * np.hanning(len(n))
+    kernel = (kernel / kernel.sum()).astype(np.float32)
+    offset = len(kernel) // 2
+
+    def decimate(audio: np.ndarray) -> np.ndarray:
+        filtered = np.convolve(audio, kernel)
+        return filtered[offset:offset + len(audio):factor]
+
+    return decimate
+
+
+@lru_cache(maxsize=16)
+def get_resampler(src_rate: int, dst_rate: int = TARGET_SAMPLE_RATE) -> Callable[[np.ndarray], np.ndarray]:
+    """
+    获取 (src_rate -> dst_rate) 的重采样函数 (按采样率对缓存, 滤波器核只计算一次)
+
+    torchaudio 可用时使用 torchaudio.transforms.Resample (与此前的数值结果一致);
+    否则整数倍降采样使用 numpy 加窗 sinc, 其余比例使用线性插值
+    """
+    if torchaudio is not None:
+        transform = torchaudio.transforms.Resample(src_rate, dst_rate)
+
+        def resample(audio: np.ndarray) -> np.ndarray:
+            with torch.inference_mode():
+                return transform(torch.from_numpy(audio).unsqueeze(0)).squeeze(0).numpy()
+
+        return resample
+
+    if src_rate % dst_rate == 0:
+        return _sinc_decimator(src_rate // dst_rate)
+
+    def interpolate(audio: np.ndarray) -> np.ndarray:
+        length = int(round(len(audio) * dst_rate / src_rate))
+        positions = np.arange(length, dtype=np.float64) * (src_rate / dst_rate)
+        return np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+
+    return interpolate
+
+
+def resample(audio: np.ndarray, src_rate: int, dst_rate: int = TARGET_SAMPLE_RATE) -> np.ndarray:
+    if src_rate == dst_rate:
+        return audio
+    return get_resampler(src_rate, dst_rate)(np.ascontiguousarray(audio, dtype=np.float32))
+
+
+# ---- WAV / PCM ----
+
+def _parse_wav(buffer: memoryview, total_size: Optional[int] = None) -> Optional[Tuple[int, int, int, int, int, int]]:
+    """
+    遍历 RIFF 块, 返回 (格式, 声道数, 采样率, 位深, data 偏移, data 长度); 头部不完整时返回 None
+
+    流式写入的 WAV 常把 data 长度写为 0 或 0xFFFFFFFF, 按文件剩余长度截断
+    buffer 只包含文件开头时, total_size 为完整文件长度
+    """
+    fmt = None
+    offset = 12
+    size = len(buffer)
+    total_size = size if total_size is None else total_size
+    while offset + 8 <= size:
+        chunk_id = bytes(buffer[offset:offset + 4])
+        chunk_size = struct.unpack_from("<I", buffer, offset + 4)[0]
+        body = offset + 8
+        if chunk_id == b"fmt " and chunk_size >= 16 and body + 16 <= size:
+            audio_format, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", buffer, body)
+            if audio_format == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40 and body + 26 <= size:
+                # 子格式 GUID 的前两个字节即实际格式
+                audio_format = struct.unpack_from("<H", buffer, body + 24)[0]
+            fmt = (audio_format, channels, sample_rate, bits)
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            length = total_size - body if chunk_size in (0, 0xFFFFFFFF) else min(chunk_size, total_size - body)
+            return fmt + (body, length)
+        offset = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+def _pcm_to_float(data: memoryview, audio_format: int, bits: int) -> Optional[np.ndarray]:
+    """把 PCM 采样数据转换为 [-1, 1] 的 float32; 不支持的格式返回 None"""
+    width = bits // 8
+    usable = len(data) - len(data) % max(width, 1)
+    if audio_format == WAVE_FORMAT_PCM:
+        if bits == 16:
+            return np.frombuffer(data, dtype="<i2", count=usable // 2).astype(np.float32) / 32768.0
+        if bits == 32:
+            return (np.frombuffer(data, dtype="<i4", count=usable // 4) / 2147483648.0).astype(np.float32)
+        if bits == 8:
+            return (np.frombuffer(data, dtype=np.uint8, count=usable).astype(np.float32) - 128.0) / 128.0
+        if bits == 24:
+            raw = np.frombuffer(data, dtype=np.uint8, count=usable).reshape(-1, 3)
+            samples = (raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8) | (raw[:, 2].astype(np.int32) << 16))
+            samples = np.where(samples & 0x800000, samples - 0x1000000, samples)
+            return samples.astype(np.float32) / 8388608.0
+    if audio_format == WAVE_FORMAT_IEEE_FLOAT:
+        if bits == 32:
+            return np.frombuffer(data, dtype="<f4", count=usable // 4).astype(np.float32)
+        if bits == 64:
+            return np.frombuffer(data, dtype="<f8", count=usable // 8).astype(np.float32)
+    return None
+
+
+def decode_wav(buffer: memoryview, target_rate: int = TARGET_SAMPLE_RATE) -> Optional[np.ndarray]:
+    """解析 WAV; 头部损坏或编码不受支持 (如 ADPCM) 时返回 None, 由通用解码器处理"""
+    parsed = _parse_wav(buffer)
+    if parsed is None:
+        return None
+    audio_format, channels, sample_rate, bits, offset, length = parsed
+    if channels < 1 or sample_rate < 1:
+        return None
+    return _frames_to_mono(buffer[offset:offset + length], audio_format, channels, bits, sample_rate, target_rate)
+
+
+def _frames_to_mono(
+    data: memoryview,
+    audio_format: int,
+    channels: int,
+    bits: int,
+    sample_rate: int,
+    target_rate: int
+) -> Optional[np.ndarray]:
+    """PCM 帧数据 -> 目标采样率单声道 float32; 不支持的编码返回 None"""
+    samples = _pcm_to_float(data, audio_format, bits)
+    if samples is None:
+        return None
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1, dtype=np.float32)
+    return resample(samples, sample_rate, target_rate)
+
+
+def decode_pcm(buffer: memoryview) -> np.ndarray:
+    """无容器头的数据按 16kHz / 16bit / 单声道 PCM 解析 (与 ingest.RAW_PCM_BYTE_RATE 一致)"""
+    return np.frombuffer(buffer, dtype="<i2", count=len(buffer) // 2).astype(np.float32) / 32768.0
+
+
+# ---- 压缩格式 ----
+
+@lru_cache(maxsize=1)
+def _ffmpeg_path() -> Optional[str]:
+    return shutil.which(FFMPEG_BINARY) if FFMPEG_BINARY else None
+
+
+def decode_ffmpeg(buffer: memoryview, target_rate: int = TARGET_SAMPLE_RATE) -> Optional[np.ndarray]:
+    """ffmpeg 解码并直接输出目标采样率的单声道 float32; ffmpeg 不可用或解码失败时返回 None"""
+    binary = _ffmpeg_path()
+    if binary is None:
+        return None
+    command = [
+        binary, "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+        "-f", "f32le", "-acodec", "pcm_f32le", "-ac", "1", "-ar", str(target_rate), "pipe:1"
+    ]
+    try:
+        completed = subprocess.run(command, input=buffer, capture_output=True, timeout=FFMPEG_TIMEOUT_S)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"ffmpeg decode failed: {e}")
+        return None
+    if completed.returncode != 0 or not completed.stdout:
+        logger.warning(f"ffmpeg decode failed: {completed.stderr.decode(errors='replace').strip()[:200]}")
+        return None
+    return np.frombuffer(completed.stdout, dtype="<f4")
+
+
+def decode_torchaudio(buffer: memoryview, target_rate: int = TARGET_SAMPLE_RATE) -> Optional[np.ndarray]:
+    """torchaudio.load 解码 (回退路径); 失败时返回 None"""
+    if torchaudio is None:
+        return None
+    try:
+        waveform, sample_rate = torchaudio.load(io.BytesIO(buffer))
+    except Exception as e:
+        logger.warning(f"torchaudio decode failed: {e}")
+        return None
+    samples = waveform.mean(dim=0) if waveform.shape[0] > 1 else waveform[0]
+    return resample(samples.numpy(), sample_rate, target_rate)
+
+
+def decode_audio(
+    audio: Union[bytes, bytearray, memoryview, BinaryIO],
+    target_rate: int = TARGET_SAMPLE_RATE,
+    pcm: bool = False
+) -> Tuple[np.ndarray, int]:
+    """
+    解码音频为单声道 float32
+
+    参数:
+        audio: 音频字节或文件对象
+        target_rate: 目标采样率
+        pcm: 调用方已知数据为 16kHz / 16bit 原始 PCM (如 audio/l16), 跳过格式识别
+
+    返回:
+        (audio_array, target_rate)
+
+    异常:
+        AudioDecodeError: 已识别为压缩格式但所有解码器均失败
+    """
+    with _as_buffer(audio) as buffer:
+        return _decode_buffer(buffer, target_rate, pcm)
+
+
+def _decode_buffer(buffer: memoryview, target_rate: int, pcm: bool) -> Tuple[np.ndarray, int]:
+    """decode_audio 的实现; 返回的数组均为副本, 不引用 buffer"""
+    fmt = "pcm" if pcm else sniff_format(bytes(buffer[:12]))
+
+    if fmt == "pcm":
+        return resample(decode_pcm(buffer), TARGET_SAMPLE_RATE, target_rate), target_rate
+
+    if fmt == "wav":
+        samples = decode_wav(buffer, target_rate)
+        if samples is not None:
+            return samples, target_rate
+
+    samples = decode_ffmpeg(buffer, target_rate)
+    if samples is None:
+        samples = decode_torchaudio(buffer, target_rate)
+    if samples is None:
+        if fmt == "unknown":
+            # 与此前 "解码失败即按 PCM 处理" 一致, 但只在所有解码器都失败之后
+            return resample(decode_pcm(buffer), TARGET_SAMPLE_RATE, target_rate), target_rate
+        raise AudioDecodeError(f"Unable to decode {fmt} audio")
+    return samples, target_rate
+
+
+# ---- 分块解码 (长音频) ----
+
+STREAM_READ_BYTES = 256 * 1024
+
+
+def _stream_frames(
+    file: BinaryIO,
+    offset: int,
+    length: int,
+    fmt: Tuple[int, int, int, int],
+    block_seconds: float,
+    target_rate: int
+) -> Iterator[np.ndarray]:
+    """从文件中按块读取 PCM 帧并转换; 每次只读取一块"""
+    audio_format, channels, sample_rate, bits = fmt
+    block_align = max(1, channels * bits // 8)
+    block_bytes = max(1, int(sample_rate * block_seconds)) * block_align
+    file.seek(offset)
+    remaining = length
+    while remaining > 0:
+        data = file.read(min(block_bytes, remaining))
+        if not data:
+            break
+        remaining -= len(data)
+        yield _frames_to_mono(memoryview(data), audio_format, channels, bits, sample_rate, target_rate)
+
+
+def _stream_ffmpeg(file: BinaryIO, binary: str, block_seconds: float, target_rate: int) -> Iterator[np.ndarray]:
+    """ffmpeg 流式解码: 后台线程把文件写入 stdin, 按块读取 stdout"""
+    command = [
+        binary, "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+        "-f", "f32le", "-acodec", "pcm_f32le", "-ac", "1", "-ar", str(target_rate), "pipe:1"
+    ]
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    def feed():
+        try:
+            file.seek(0)
+            while True:
+                chunk = file.read(STREAM_READ_BYTES)
+                if not chunk:
+                    break
+                process.stdin.write(chunk)
+        except (OSError, ValueError):
+            pass  # ffmpeg 提前退出或调用方已关闭文件
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    feeder = threading.Thread(target=feed, name="ffmpeg-feed", daemon=True)
+    feeder.start()
+    block_bytes = max(1, int(target_rate * block_seconds)) * 4
+    produced = False
+    try:
+        while True:
+            data = process.stdout.read(block_bytes)
+            if not data:
+                break
+            produced = True
+            yield np.frombuffer(data, dtype="<f4", count=len(data) // 4)
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.wait()
+        feeder.join()
+    if process.returncode != 0 and not produced:
+        raise AudioDecodeError(f"ffmpeg failed to decode audio (exit code {process.returncode})")
+
+
+def stream_decode(
+    file: BinaryIO,
+    block_seconds: float = 30.0,
+    target_rate: int = TARGET_SAMPLE_RATE,
+    pcm: bool = False
+) -> Iterator[np.ndarray]:
+    """
+    分块解码文件对象, 每次产出约 block_seconds 秒的目标采样率单声道 float32
+
+    WAV / 声明为 PCM 的数据直接按块读取文件, 其他格式通过 ffmpeg 管道按块读取, 内存占用与音频总时长无关;
+    无已知文件头且 ffmpeg 无法解码时按原始 PCM 分块读取; ffmpeg 不可用时回退到整段解码后再切块 (内存不受限)
+
+    注意: 有重采样时各块独立重采样, 块边界处有轻微的边缘效应
+    """
+    file.seek(0, os.SEEK_END)
+    total_size = file.tell()
+    file.seek(0)
+    header = file.read(STREAM_READ_BYTES)
+    fmt = "pcm" if pcm else sniff_format(header[:12])
+    pcm_format = (WAVE_FORMAT_PCM, 1, TARGET_SAMPLE_RATE, 16)
+
+    if fmt == "pcm":
+        yield from _stream_frames(file, 0, total_size, pcm_format, block_seconds, target_rate)
+        return
+
+    if fmt == "wav":
+        parsed = _parse_wav(memoryview(header), total_size)
+        if parsed is not None and parsed[1] >= 1 and parsed[2] >= 1 and _pcm_to_float(memoryview(b""), parsed[0], parsed[3]) is not None:
+            yield from _stream_frames(file, parsed[4], parsed[5], parsed[:4], block_seconds, target_rate)
+            return
+
+    binary = _ffmpeg_path()
+    if binary is not None:
+        try:
+            yield from _stream_ffmpeg(file, binary, block_seconds, target_rate)
+            return
+        except AudioDecodeError:
+            if fmt != "unknown":
+                raise
+        logger.info("ffmpeg could not decode headerless audio, reading it as raw PCM")
+        yield from _stream_frames(file, 0, total_size, pcm_format, block_seconds, target_rate)
+        return
+
+    logger.warning(f"ffmpeg not available, decoding whole {fmt} file before chunking")
+    samples, _ = decode_audio(file, target_rate)
+    block = max(1, int(target_rate * block_seconds))
+    for start in range(0, len(samples), block):
+        yield samples[start:start + block]
@@ -0,0 +1,130 @@
+# batcher.py - 动态微批处理
+"""
+将短时间窗口内到达的多个推理请求合并为一次批量调用, 再把结果分发回各请求
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    动态微批处理器
+
+    - batch_fn: 批量处理函数, 输入 N 个条目, 按相同顺序返回 N 个结果
+    - max_batch_size: 单批最大条目数
+    - max_wait_ms: 第一个条目到达后最多等待多久再发车
+
+    submit() 可在任意线程调用; 批处理在独立的后台线程中串行执行
+
+    批量调用失败时逐条重试, 只有自身出错的条目收到异常, 同批的其他请求不受影响
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 20.0,
+        name: str = "batcher"
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+        self.retries = 0
+
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Micro-batcher '{name}': max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={max_wait_ms}"
+        )
+
+    def submit(self, item: Any) -> Future:
+        """提交一个条目, 返回其结果的 Future"""
+        if self._closed:
+            raise RuntimeError("Batcher is closed")
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def infer(self, item: Any, timeout: float = None) -> Any:
+        """提交并阻塞等待结果"""
+        return self.submit(item).result(timeout=timeout)
+
+    def _collect(self) -> List:
+        """阻塞等待第一个条目, 然后在等待窗口内尽量凑满一批"""
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                self._queue.put(None)  # 留给下一轮退出
+                break
+            batch.append(entry)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                return
+
+            items = [item for item, _ in batch]
+            futures = [future for _, future in batch]
+            try:
+                results = self._call(items)
+            except Exception as e:
+                if len(items) == 1:
+                    futures[0].set_exception(e)
+                    continue
+                logger.warning(f"Batch of {len(items)} failed, retrying items one by one: {e}")
+                self.retries += 1
+                for item, future in zip(items, futures):
+                    try:
+                        future.set_result(self._call([item])[0])
+                    except Exception as item_error:
+                        future.set_exception(item_error)
+                continue
+
+            self.batches += 1
+            self.items += len(items)
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+    def _call(self, items: List[Any]) -> List[Any]:
+        """调用 batch_fn 并检查结果数量"""
+        results = self.batch_fn(items)
+        if len(results) != len(items):
+            raise RuntimeError(f"Batch function returned {len(results)} results for {len(items)} items")
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_s * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "retries": self.retries,
+        }
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# bench_audio_frontend.py - 音频解码前端微基准测试
+"""
+对比音频解码前端与旧实现 (torchaudio.load + 每次新建 Resample) 在常见输入上的耗时
+
+输入 (合成 10 秒音频):
+- wav16k: 16kHz 16bit 单声道 WAV (零拷贝快速路径)
+- wav48k_stereo: 48kHz 16bit 双声道 WAV (下混 + 缓存的重采样器)
+- pcm16k: 无容器头的 16kHz 16bit PCM
+- opus48k: 48kHz Opus/OGG (Telegram 语音格式, 需要 ffmpeg 生成)
+
+用法:
+    python benchmarks/bench_audio_frontend.py --seconds 10 --repeat 20
+    python benchmarks/bench_audio_frontend.py voice.ogg other.wav
+"""
+
+import argparse
+import io
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_frontend import decode_audio  # noqa: E402
+from model_loader import synthetic_clip  # noqa: E402
+
+
+def to_wav(audio: np.ndarray, sample_rate: int, channels: int = 1) -> bytes:
+    pcm = (np.clip(audio, -1, 1) * 32767).astype("<i2")
+    if channels > 1:
+        pcm = np.repeat(pcm, channels)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def to_opus(wav_bytes: bytes) -> bytes:
+    completed = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", "pipe:0", "-c:a", "libopus", "-f", "ogg", "pipe:1"],
+        input=wav_bytes, capture_output=True, check=True
+    )
+    return completed.stdout
+
+
+def build_inputs(seconds: float):
+    inputs = {
+        "wav16k": to_wav(synthetic_clip(seconds), 16000),
+        "wav48k_stereo": to_wav(synthetic_clip(seconds, 48000), 48000, channels=2),
+        "pcm16k": (synthetic_clip(seconds) * 32767).astype("<i2").tobytes(),
+    }
+    if shutil.which("ffmpeg"):
+        try:
+            inputs["opus48k"] = to_opus(to_wav(synthetic_clip(seconds, 48000), 48000))
+        except subprocess.CalledProcessError as e:
+            print(f"⚠️  Skipping opus48k: {e.stderr.decode(errors='replace').strip()[:120]}")
+    else:
+        print("⚠️  ffmpeg not found, skipping opus48k")
+    return inputs
+
+
+def legacy_decode(audio: bytes):
+    """旧实现: torchaudio.load 失败则按 PCM 处理, 每次新建 Resample"""
+    import torch
+    import torchaudio
+    try:
+        waveform, sample_rate = torchaudio.load(io.BytesIO(audio))
+    except Exception:
+        return np.frombuffer(audio, dtype=np.int16).astype(np.float32) / 32768.0
+    audio_array = waveform.numpy()
+    audio_array = audio_array.mean(axis=0) if audio_array.shape[0] > 1 else audio_array.squeeze()
+    if sample_rate != 16000:
+        resampler = torchaudio.transforms.Resample(sample_rate, 16000)
+        audio_array = resampler(torch.from_numpy(audio_array).float().unsqueeze(0)).squeeze().numpy()
+    return audio_array
+
+
+def timed(fn, data, repeat):
+    fn(data)
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(data)
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="额外的测试音频文件")
+    parser.add_argument("--seconds", type=float, default=10.0, help="合成音频时长")
+    parser.add_argument("--repeat", type=int, default=20, help="每种输入的重复次数 (取中位数)")
+    args = parser.parse_args()
+
+    inputs = build_inputs(args.seconds)
+    for path in args.files:
+        with open(path, "rb") as f:
+            inputs[os.path.basename(path)] = f.read()
+
+    try:
+        import torchaudio  # noqa: F401
+        has_torchaudio = True
+    except ImportError:
+        has_torchaudio = False
+        print("⚠️  torchaudio not installed, skipping legacy comparison")
+
+    print(f"\n{'input':<20} {'KB':>8} {'frontend_ms':>12} {'legacy_ms':>10} {'speedup':>8} {'samples':>9}")
+    for name, data in inputs.items():
+        samples, _ = decode_audio(data)
+        frontend_ms = timed(decode_audio, data, args.repeat)
+        legacy_ms = timed(legacy_decode, data, args.repeat) if has_torchaudio else float("nan")
+        print(
+            f"{name[:20]:<20} {len(data) / 1024:>8.0f} {frontend_ms:>12.2f} {legacy_ms:>10.2f} "
+            f"{legacy_ms / frontend_ms:>7.1f}x {len(samples):>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# bench_batching.py - 微批处理吞吐量基准测试
+"""
+对比不同批处理窗口下 SenseVoice 推理的吞吐量与延迟
+
+用法:
+    python benchmarks/bench_batching.py [clip.wav ...] --requests 64 --concurrency 16
+    python benchmarks/bench_batching.py --batch-sizes 1,4,8,16 --waits 0,10,20,50
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer import EmotionAnalyzer  # noqa: E402
+from batcher import MicroBatcher  # noqa: E402
+
+
+def load_clips(paths, analyzer, seconds):
+    """加载测试音频; 未提供时生成合成音频"""
+    if paths:
+        clips = []
+        for path in paths:
+            with open(path, "rb") as f:
+                audio_array, _ = analyzer._preprocess_audio(f.read())
+            clips.append(audio_array)
+        return clips
+
+    rng = np.random.default_rng(0)
+    t = np.arange(int(16000 * seconds)) / 16000.0
+    tone = 0.3 * np.sin(2 * np.pi * 220 * t) * (1 + np.sin(2 * np.pi * 3 * t))
+    return [(tone + 0.01 * rng.standard_normal(len(t))).astype(np.float32)]
+
+
+def run(analyzer, clips, batch_size, wait_ms, n_requests, concurrency):
+    """以 concurrency 个并发线程发送 n_requests 个请求, 返回 (吞吐量, 延迟列表, 平均批大小)"""
+    batcher = None
+    if batch_size > 1:
+        batcher = MicroBatcher(analyzer.generate_batch, batch_size, wait_ms, name="bench")
+        infer = batcher.infer
+    else:
+        infer = analyzer._generate
+
+    latencies = []
+    lock = threading.Lock()
+    counter = iter(range(n_requests))
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            t0 = time.perf_counter()
+            infer(clips[i % len(clips)])
+            with lock:
+                latencies.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    avg_batch = batcher.stats()["avg_batch_size"] if batcher else 1.0
+    if batcher:
+        batcher.close()
+    return n_requests / elapsed, latencies, avg_batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("clips", nargs="*", help="测试音频文件 (默认生成合成音频)")
+    parser.add_argument("--seconds", type=float, default=5.0, help="合成音频时长")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch-sizes", default="1,4,8,16")
+    parser.add_argument("--waits", default="0,10,20,50", help="批处理等待窗口 (毫秒)")
+    args = parser.parse_args()
+
+    analyzer = EmotionAnalyzer()
+    clips = load_clips(args.clips, analyzer, args.seconds)
+
+    # 预热
+    analyzer._generate(clips[0])
+
+    print(f"{'batch':>6} {'wait_ms':>8} {'req/s':>8} {'p50_ms':>8} {'p95_ms':>8} {'avg_batch':>10}")
+    for batch_size in [int(x) for x in args.batch_sizes.split(",")]:
+        waits = [0.0] if batch_size == 1 else [float(x) for x in args.waits.split(",")]
+        for wait_ms in waits:
+            rps, latencies, avg_batch = run(
+                analyzer, clips, batch_size, wait_ms, args.requests, args.concurrency
+            )
+            latencies.sort()
+            p50 = statistics.median(latencies) * 1000
+            p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+            print(f"{batch_size:>6} {wait_ms:>8.0f} {rps:>8.2f} {p50:>8.0f} {p95:>8.0f} {avg_batch:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
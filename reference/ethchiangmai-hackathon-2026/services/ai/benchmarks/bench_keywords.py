@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# bench_keywords.py - 关键词提取延迟
+"""
+对比关键词引擎 (keywords.py) 与旧实现 (惰性的 jieba.analyse.extract_tags / 正则词频) 的延迟
+
+指标:
+- 加载: 引擎首次加载 (构建 jieba 前缀词典并写入缓存) 与之后从缓存文件加载的耗时
+- 第一次调用: 旧实现在第一次 /analyze 中才构建词典; 引擎已在启动时加载
+- 每次调用的延迟中位数 / p95 (毫秒), 按输入类型: 中文 / 英文 / 中英混合, 短 (一句) / 长 (约一分钟语音)
+- observe: 请求路径上的开销 (放入后台队列), 以及后台线程把一篇新反馈计入语料 IDF (分词) 的耗时
+
+输入为由模板合成的活动反馈; 可用 --texts 传入真实转写 (每行一条)
+
+用法:
+    python benchmarks/bench_keywords.py --repeat 200
+    python benchmarks/bench_keywords.py --texts transcripts.txt --corpus 2000
+"""
+
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keywords import KeywordEngine, jieba  # noqa: E402
+
+if jieba is not None:
+    # 与旧 analyzer.py 相同: 导入时读取 IDF 表, 分词词典在第一次调用时构建
+    import jieba.analyse  # noqa: E402
+
+ZH_PHRASES = [
+    "今天在清迈的黑客松活动非常棒", "智能合约的分享很精彩", "宁曼路的咖啡馆很适合联合办公", "零知识证明的讲座有点难懂",
+    "现场的网络不太稳定", "志愿者都很热情", "空投的规则没有讲清楚", "午餐的泰式咖喱面很好吃", "希望明年还能来古城参加",
+    "钱包连接的时候出了问题", "去中心化身份的工作坊很有收获", "场地有点热但是整体体验不错",
+]
+EN_PHRASES = [
+    "The hackathon in Chiang Mai was amazing", "the smart contract workshop was really helpful",
+    "I loved the khao soi at lunch", "the wifi kept dropping during the demos", "zero knowledge talks were hard to follow",
+    "volunteers were super friendly", "the DAO governance panel ran too long", "great coworking space in Nimman",
+    "NFT minting demo failed twice", "would definitely come back to ETH Chiang Mai next year",
+]
+
+
+def synthetic_feedback(kind: str, sentences: int, rng: random.Random) -> str:
+    if kind == "zh":
+        return "，".join(rng.choice(ZH_PHRASES) for _ in range(sentences)) + "。"
+    if kind == "en":
+        return ". ".join(rng.choice(EN_PHRASES) for _ in range(sentences)) + "."
+    return " ".join(rng.choice(ZH_PHRASES) + "，" + rng.choice(EN_PHRASES) for _ in range(max(1, sentences // 2)))
+
+
+def legacy_extract(text: str, max_keywords: int = 4):
+    """旧实现: 第一次调用时由 jieba 惰性构建词典; 未安装 jieba 时为正则 + 词频"""
+    if jieba is not None:
+        keywords = jieba.analyse.extract_tags(text, topK=max_keywords)
+        if keywords:
+            return keywords
+    words = re.findall(r'[\u4e00-\u9fa5]{2,}|[a-zA-Z]{3,}', text)
+    stop_words = {'的', '了', '是', '我', '你', '他', '她', '它', '我们', '你们', '他们', '这个', '那个', '一个'}
+    word_freq = {}
+    for word in words:
+        if word not in stop_words:
+            word_freq[word] = word_freq.get(word, 0) + 1
+    return [word for word, _ in sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:max_keywords]]
+
+
+def timed_ms(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def latency(fn, texts, repeat):
+    samples = sorted(timed_ms(fn, texts[i % len(texts)]) for i in range(repeat))
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--corpus", type=int, default=1000, help="用于语料 IDF 的合成反馈数")
+    parser.add_argument("--texts", help="真实转写文件 (每行一条)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    if args.texts:
+        with open(args.texts, "r", encoding="utf-8") as f:
+            real = [line.strip() for line in f if line.strip()]
+        inputs = {"real": real}
+    else:
+        inputs = {
+            f"{kind}_{size}": [synthetic_feedback(kind, sentences, rng) for _ in range(50)]
+            for kind in ("zh", "en", "mixed") for size, sentences in (("short", 2), ("long", 20))
+        }
+    print(f"jieba: {'installed' if jieba is not None else 'not installed (regex segmentation)'}")
+
+    # 旧实现的第一次调用 (全局 jieba 词典尚未构建; 引擎使用独立的 Tokenizer, 不影响这一测量)
+    first_text = next(iter(inputs.values()))[0]
+    print(f"legacy first call: {timed_ms(legacy_extract, first_text):.1f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = os.path.join(tmp, "cache")
+        cold = KeywordEngine(cache_dir=cache_dir)
+        cold_ms = timed_ms(cold.load)
+        engine = KeywordEngine(cache_dir=cache_dir, idf_path=os.path.join(tmp, "idf.json"))
+        warm_ms = timed_ms(engine.load)
+        print(f"engine load: {cold_ms:.1f} ms (build), {warm_ms:.1f} ms (from cache)")
+        print(f"engine first call after load: {timed_ms(engine.extract, first_text):.2f} ms")
+
+        corpus = [synthetic_feedback(rng.choice(("zh", "en", "mixed")), rng.randint(2, 20), rng) for _ in range(args.corpus)]
+        observe_ms = sorted(timed_ms(engine.observe, text) for text in corpus)
+        engine.flush()
+        add_ms = sorted(timed_ms(engine.add_documents, [text]) for text in corpus)
+        engine.save()
+        engine.reload_idf()  # 新的语料计数只在显式重新加载后参与打分
+        print(f"observe: median {statistics.median(observe_ms):.3f} ms in the request path, "
+              f"{statistics.median(add_ms):.3f} ms in the background over {len(corpus)} documents "
+              f"(corpus IDF weight {engine.stats()['corpus_weight']}, version {engine.version})")
+
+        print(f"\n{'input':<12} {'chars':>6} {'legacy p50':>11} {'p95':>7} {'engine p50':>11} {'p95':>7}")
+        for name, texts in inputs.items():
+            chars = int(statistics.mean(len(text) for text in texts))
+            legacy_p50, legacy_p95 = latency(legacy_extract, texts, args.repeat)
+            engine_p50, engine_p95 = latency(engine.extract, texts, args.repeat)
+            print(f"{name:<12} {chars:>6} {legacy_p50:>11.3f} {legacy_p95:>7.3f} {engine_p50:>11.3f} {engine_p95:>7.3f}")
+
+        print("\nsample keywords:")
+        for name, texts in inputs.items():
+            print(f"  {name:<12} legacy={legacy_extract(texts[0])} engine={engine.extract(texts[0])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# bench_quantization.py - 量化推理的精度与延迟评估
+"""
+在参考音频集上对比原模型与优化模型 (int8 动态量化 / 编译) 的延迟和精度
+
+精度指标:
+- 情感一致率: 优化模型与原模型输出相同情感标签的比例
+- 转写一致率: 清洗后转写文本完全相同的比例
+- 声纹余弦漂移: 1 - cos(原模型 embedding, 优化模型 embedding), 报告均值与最大值
+
+用法:
+    python benchmarks/bench_quantization.py refs/*.wav
+    python benchmarks/bench_quantization.py refs/*.wav --compile compile --repeat 5 --json report.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer import EmotionAnalyzer, SpeakerVerifier  # noqa: E402
+from model_loader import synthetic_clip  # noqa: E402
+from quantization import optimize_auto_model  # noqa: E402
+
+
+def load_clips(paths, analyzer):
+    """加载参考音频; 未提供时使用合成音频 (只能评估延迟, 精度指标没有意义)"""
+    if not paths:
+        print("⚠️  No reference clips given, using synthetic audio (accuracy numbers are not meaningful)")
+        return {"synthetic_3s": synthetic_clip(3.0), "synthetic_10s": synthetic_clip(10.0)}
+    clips = {}
+    for path in paths:
+        with open(path, "rb") as f:
+            clips[os.path.basename(path)], _ = analyzer._preprocess_audio(f.read())
+    return clips
+
+
+def timed(fn, repeat):
+    """执行 repeat 次, 返回 (最后一次结果, 中位耗时毫秒)"""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        durations.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(durations)
+
+
+def run_variant(analyzer, verifier, clips, repeat):
+    """对每段音频运行 SenseVoice 与 CAM++, 返回 {clip: {...}}"""
+    analyzer._generate(next(iter(clips.values())))
+    verifier.model.generate(input=next(iter(clips.values())))
+
+    outputs = {}
+    for name, clip in clips.items():
+        raw_text, asr_ms = timed(lambda: analyzer._generate(clip), repeat)
+        embedding, sv_ms = timed(lambda: verifier.model.generate(input=clip)[0]["spk_embedding"], repeat)
+        parsed = analyzer._parse_result(raw_text)
+        outputs[name] = {
+            "emotion": parsed["emotion"],
+            "text": analyzer._clean_text(raw_text),
+            "embedding": np.asarray(embedding.cpu() if hasattr(embedding, "cpu") else embedding).flatten(),
+            "asr_ms": asr_ms,
+            "sv_ms": sv_ms,
+            "audio_s": len(clip) / 16000,
+        }
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("clips", nargs="*", help="参考音频文件 (默认生成合成音频)")
+    parser.add_argument("--quantization", default="int8", choices=["none", "int8"])
+    parser.add_argument("--compile", default="none", choices=["none", "compile", "script"])
+    parser.add_argument("--repeat", type=int, default=3, help="每段音频重复次数 (取中位数)")
+    parser.add_argument("--threads", type=int, default=0, help="torch 线程数 (0 表示默认)")
+    parser.add_argument("--json", help="把完整报告写入 JSON 文件")
+    args = parser.parse_args()
+
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    # 原模型与优化模型各加载一份 (编译会原地替换编码器, 不能共享)
+    baseline_analyzer, baseline_verifier = EmotionAnalyzer(), SpeakerVerifier()
+    optimized_analyzer, optimized_verifier = EmotionAnalyzer(), SpeakerVerifier()
+    reports = {
+        "sensevoice": optimize_auto_model(optimized_analyzer.model, args.quantization, args.compile, "sensevoice"),
+        "campplus": optimize_auto_model(optimized_verifier.model, args.quantization, args.compile, "campplus"),
+    }
+
+    clips = load_clips(args.clips, baseline_analyzer)
+    baseline = run_variant(baseline_analyzer, baseline_verifier, clips, args.repeat)
+    optimized = run_variant(optimized_analyzer, optimized_verifier, clips, args.repeat)
+
+    rows = []
+    for name in clips:
+        base, opt = baseline[name], optimized[name]
+        cosine = float(np.dot(base["embedding"], opt["embedding"]) / (
+            np.linalg.norm(base["embedding"]) * np.linalg.norm(opt["embedding"]) + 1e-12
+        ))
+        rows.append({
+            "clip": name,
+            "audio_s": round(base["audio_s"], 2),
+            "asr_ms": [round(base["asr_ms"], 1), round(opt["asr_ms"], 1)],
+            "sv_ms": [round(base["sv_ms"], 1), round(opt["sv_ms"], 1)],
+            "emotion": [base["emotion"], opt["emotion"]],
+            "text_match": base["text"] == opt["text"],
+            "cosine_drift": 1.0 - cosine,
+        })
+
+    print(f"\n{'clip':<24} {'sec':>6} {'asr_ms base/opt':>18} {'sv_ms base/opt':>16} {'emotion':>20} {'drift':>8}")
+    for row in rows:
+        emotion = row["emotion"][0] if row["emotion"][0] == row["emotion"][1] else "{}->{}".format(*row["emotion"])
+        print(
+            f"{row['clip'][:24]:<24} {row['audio_s']:>6.1f} "
+            f"{row['asr_ms'][0]:>8.0f}/{row['asr_ms'][1]:<9.0f} {row['sv_ms'][0]:>7.0f}/{row['sv_ms'][1]:<8.0f} "
+            f"{emotion:>20} {row['cosine_drift']:>8.5f}"
+        )
+
+    def total(key, i):
+        return sum(row[key][i] for row in rows)
+
+    drifts = [row["cosine_drift"] for row in rows]
+    summary = {
+        "clips": len(rows),
+        "quantization": args.quantization,
+        "compile": args.compile,
+        "asr_speedup": round(total("asr_ms", 0) / total("asr_ms", 1), 2),
+        "sv_speedup": round(total("sv_ms", 0) / total("sv_ms", 1), 2),
+        "emotion_agreement": round(sum(row["emotion"][0] == row["emotion"][1] for row in rows) / len(rows), 4),
+        "text_agreement": round(sum(row["text_match"] for row in rows) / len(rows), 4),
+        "cosine_drift_mean": round(statistics.mean(drifts), 6),
+        "cosine_drift_max": round(max(drifts), 6),
+        "models": reports,
+    }
+
+    print(f"\nSenseVoice: {summary['asr_speedup']}x faster, "
+          f"{reports['sensevoice']['size_before_mb']} -> {reports['sensevoice']['size_after_mb']} MB")
+    print(f"CAM++:      {summary['sv_speedup']}x faster, "
+          f"{reports['campplus']['size_before_mb']} -> {reports['campplus']['size_after_mb']} MB")
+    print(f"Emotion agreement: {summary['emotion_agreement']:.1%}  Transcript agreement: {summary['text_agreement']:.1%}")
+    print(f"Embedding cosine drift: mean {summary['cosine_drift_mean']:.6f}, max {summary['cosine_drift_max']:.6f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "clips": rows}, f, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+# bls_backends.py - BLS 计算后端
+"""
+BLS12-381 (G2ProofOfPossession 密码套件) 的可插拔实现
+
+- blspy: Chia 的 blst 绑定 (PopSchemeMPL), 最快
+- milagro: milagro_bls_binding
+- py_ecc: 纯 Python 实现, 始终可用
+
+batch_verify: py_ecc 与 blspy 使用随机线性组合 (一次多配对检查, 失败时二分定位无效条目);
+milagro 绑定不提供点运算, 其批量接口逐条验证 (batch_mode = "per-item")
+
+所有后端使用相同的 IETF 密码套件 (BLS_SIG_BLS12381G2_XMD:SHA-256_SSWU_RO_POP_),
+签名是确定性的, 因此同一私钥/消息在各后端产生逐字节相同的签名
+"""
+
+import functools
+import logging
+import operator
+import os
+import secrets
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from py_ecc.bls import G2ProofOfPossession as py_ecc_bls
+
+logger = logging.getLogger(__name__)
+
+
+class PyEccBackend:
+    """纯 Python 后端; 也是其它后端未覆盖操作的默认实现"""
+
+    name = "py_ecc"
+    # batch_verify 的实现方式 (见 benchmarks/bench_bls.py 输出)
+    batch_mode = "rlc"
+
+    @staticmethod
+    def _sk_bytes(sk: int) -> bytes:
+        return sk.to_bytes(32, "big")
+
+    def sk_to_pk(self, sk: int) -> bytes:
+        return py_ecc_bls.SkToPk(sk)
+
+    def sign(self, sk: int, message: bytes) -> bytes:
+        return py_ecc_bls.Sign(sk, message)
+
+    def verify(self, public_key: bytes, message: bytes, signature: bytes) -> bool:
+        return py_ecc_bls.Verify(public_key, message, signature)
+
+    def aggregate(self, signatures: List[bytes]) -> bytes:
+        return py_ecc_bls.Aggregate(signatures)
+
+    def aggregate_pubkeys(self, public_keys: List[bytes]) -> bytes:
+        return py_ecc_bls._AggregatePKs(public_keys)
+
+    def fast_aggregate_verify(self, public_keys: List[bytes], message: bytes, signature: bytes) -> bool:
+        return py_ecc_bls.FastAggregateVerify(public_keys, message, signature)
+
+    def batch_verify(self, items: Sequence[Tuple[bytes, bytes, bytes]]) -> List[bool]:
+        """批量验证独立的 (公钥, 消息, 签名); 纯 Python 下使用随机线性组合共享最终幂运算"""
+        from bls_batch import batch_verify
+        return batch_verify(items)
+
+    def _verify_each(self, items: Sequence[Tuple[bytes, bytes, bytes]]) -> List[bool]:
+        """逐条验证 (原生后端的单条验证已快于纯 Python 的批量检查)"""
+        results = []
+        for public_key, message, signature in items:
+            try:
+                results.append(bool(self.verify(public_key, message, signature)))
+            except Exception:
+                results.append(False)
+        return results
+
+    def pop_prove(self, sk: int) -> bytes:
+        return py_ecc_bls.PopProve(sk)
+
+    def pop_verify(self, public_key: bytes, proof: bytes) -> bool:
+        return py_ecc_bls.PopVerify(public_key, proof)
+
+
+class MilagroBackend(PyEccBackend):
+    """
+    milagro_bls_binding 后端 (PoP 与公钥聚合沿用 py_ecc)
+
+    绑定不提供标量乘法等点运算, 无法构造随机线性组合; batch_verify 逐条验证
+    (不使用无随机系数的 AggregateVerify: 两个互相抵消的无效签名可以一起通过检查)
+    """
+
+    name = "milagro"
+    batch_mode = "per-item"
+
+    def __init__(self):
+        import milagro_bls_binding
+        self._bls = milagro_bls_binding
+
+    def sk_to_pk(self, sk: int) -> bytes:
+        return self._bls.SkToPk(self._sk_bytes(sk))
+
+    def sign(self, sk: int, message: bytes) -> bytes:
+        return self._bls.Sign(self._sk_bytes(sk), message)
+
+    def verify(self, public_key: bytes, message: bytes, signature: bytes) -> bool:
+        return self._bls.Verify(public_key, message, signature)
+
+    def aggregate(self, signatures: List[bytes]) -> bytes:
+        return self._bls.Aggregate(list(signatures))
+
+    def fast_aggregate_verify(self, public_keys: List[bytes], message: bytes, signature: bytes) -> bool:
+        return self._bls.FastAggregateVerify(list(public_keys), message, signature)
+
+    def batch_verify(self, items: Sequence[Tuple[bytes, bytes, bytes]]) -> List[bool]:
+        """逐条验证 (见类说明)"""
+        return self._verify_each(items)
+
+
+class BlspyBackend(PyEccBackend):
+    """blspy (blst) 后端"""
+
+    name = "blspy"
+    batch_mode = "rlc"
+    # 随机系数位数, 与 bls_batch.RANDOM_BITS 相同
+    RANDOM_BITS = 64
+
+    def __init__(self):
+        import blspy
+        self._blspy = blspy
+        self._scheme = blspy.PopSchemeMPL
+
+    def _private_key(self, sk: int):
+        return self._blspy.PrivateKey.from_bytes(self._sk_bytes(sk))
+
+    def sk_to_pk(self, sk: int) -> bytes:
+        return bytes(self._private_key(sk).get_g1())
+
+    def sign(self, sk: int, message: bytes) -> bytes:
+        return bytes(self._scheme.sign(self._private_key(sk), message))
+
+    def verify(self, public_key: bytes, message: bytes, signature: bytes) -> bool:
+        try:
+            pk = self._blspy.G1Element.from_bytes(bytes(public_key))
+            sig = self._blspy.G2Element.from_bytes(bytes(signature))
+        except (ValueError, RuntimeError):
+            return False
+        return self._scheme.verify(pk, message, sig)
+
+    def aggregate(self, signatures: List[bytes]) -> bytes:
+        if not signatures:
+            raise ValueError("Cannot aggregate an empty list of signatures")
+        return bytes(self._scheme.aggregate([self._blspy.G2Element.from_bytes(bytes(s)) for s in signatures]))
+
+    def aggregate_pubkeys(self, public_keys: List[bytes]) -> bytes:
+        if not public_keys:
+            raise ValueError("Cannot aggregate an empty list of public keys")
+        points = [self._blspy.G1Element.from_bytes(bytes(pk)) for pk in public_keys]
+        return bytes(functools.reduce(operator.add, points))
+
+    def fast_aggregate_verify(self, public_keys: List[bytes], message: bytes, signature: bytes) -> bool:
+        try:
+            pks = [self._blspy.G1Element.from_bytes(bytes(pk)) for pk in public_keys]
+            sig = self._blspy.G2Element.from_bytes(bytes(signature))
+        except (ValueError, RuntimeError):
+            return False
+        return bool(pks) and self._scheme.fast_aggregate_verify(pks, message, sig)
+
+    @staticmethod
+    def _multiply(point, scalar: int):
+        """标量乘法 (blspy 的 Python 接口只提供点加法): 倍加法, scalar > 0"""
+        result = None
+        while scalar:
+            if scalar & 1:
+                result = point if result is None else result + point
+            point = point + point
+            scalar >>= 1
+        return result
+
+    def batch_verify(self, items: Sequence[Tuple[bytes, bytes, bytes]]) -> List[bool]:
+        """
+        随机线性组合批量验证: 对随机 r_i 检查 e(Σ r_i·σ_i, G1) == Π e(r_i·pk_i, H(m_i)),
+        由一次 aggregate_verify (多配对 + 一次最终幂运算) 完成; 失败时二分定位无效条目
+        """
+        valid = [False] * len(items)
+        entries = []
+        infinity = self._blspy.G1Element()
+        for index, (public_key, message, signature) in enumerate(items):
+            try:
+                pk = self._blspy.G1Element.from_bytes(bytes(public_key))
+                sig = self._blspy.G2Element.from_bytes(bytes(signature))
+            except (ValueError, RuntimeError):
+                continue
+            if pk == infinity:
+                continue
+            r = secrets.randbits(self.RANDOM_BITS) | 1
+            entries.append((index, self._multiply(pk, r), bytes(message), self._multiply(sig, r)))
+        self._bisect(entries, valid)
+        return valid
+
+    def _bisect(self, entries: list, valid: List[bool]):
+        if not entries:
+            return
+        signature = functools.reduce(operator.add, (entry[3] for entry in entries))
+        if self._scheme.aggregate_verify([entry[1] for entry in entries], [entry[2] for entry in entries], signature):
+            for entry in entries:
+                valid[entry[0]] = True
+            return
+        if len(entries) > 1:
+            middle = len(entries) // 2
+            self._bisect(entries[:middle], valid)
+            self._bisect(entries[middle:], valid)
+
+    def pop_prove(self, sk: int) -> bytes:
+        return bytes(self._scheme.pop_prove(self._private_key(sk)))
+
+    def pop_verify(self, public_key: bytes, proof: bytes) -> bool:
+        try:
+            pk = self._blspy.G1Element.from_bytes(bytes(public_key))
+            sig = self._blspy.G2Element.from_bytes(bytes(proof))
+        except (ValueError, RuntimeError):
+            return False
+        return self._scheme.pop_verify(pk, sig)
+
+
+# 自动选择时的优先级 (快 -> 慢)
+BACKENDS = {
+    "blspy": BlspyBackend,
+    "milagro": MilagroBackend,
+    "py_ecc": PyEccBackend,
+}
+
+_instances: Dict[str, PyEccBackend] = {}
+
+
+def available_backends() -> List[str]:
+    """当前环境可用的后端名称"""
+    names = []
+    for name in BACKENDS:
+        try:
+            get_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def get_backend(name: Optional[str] = None) -> PyEccBackend:
+    """
+    获取 BLS 后端
+
+    参数:
+        name: "auto" / "blspy" / "milagro" / "py_ecc"; 默认读取环境变量 BLS_BACKEND (默认 auto)
+
+    返回:
+        后端实例 (同名复用)
+    """
+    name = (name or os.getenv("BLS_BACKEND", "auto")).lower()
+
+    if name == "auto":
+        for candidate in BACKENDS:
+            try:
+                return get_backend(candidate)
+            except ImportError:
+                continue
+
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown BLS backend: {name} (choose from auto, {', '.join(BACKENDS)})")
+
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+        logger.info(f"BLS backend '{name}' loaded")
+    return _instances[name]
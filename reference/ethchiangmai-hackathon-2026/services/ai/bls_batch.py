@@ -0,0 +1,132 @@
+# bls_batch.py - BLS 批量验证
+"""
+随机线性组合 (random linear combination) 批量验证 N 个独立的 (公钥, 消息, 签名)
+
+对随机标量 r_i, 检查
+    e(Σ r_i·σ_i, G1) · Π_pk e(Σ_{i∈pk} r_i·H(m_i), -pk) == 1
+
+所有条目共享一次最终幂运算; 相同公钥的条目合并为一次 Miller loop
+(审计同一服务签发的证明时, 整批只需 2 次 Miller loop)。
+hash_to_G2 中的清除余因子是线性映射, 因此对每个条目只做 map_to_curve,
+在加权求和后每个公钥组只清除一次余因子。
+批量检查失败时二分定位无效条目。
+"""
+
+import logging
+import secrets
+from hashlib import sha256
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from py_ecc.bls import G2ProofOfPossession
+from py_ecc.bls.g2_primitives import pubkey_to_G1, signature_to_G2, subgroup_check
+from py_ecc.bls.hash_to_curve import clear_cofactor_G2, hash_to_field_FQ2, map_to_curve_G2
+from py_ecc.fields import optimized_bls12_381_FQ12 as FQ12
+from py_ecc.optimized_bls12_381 import G1, Z2, add, final_exponentiate, multiply, neg, pairing
+
+logger = logging.getLogger(__name__)
+
+# 随机标量位数: 伪造一批无效签名通过检查的概率约为 2^-64
+RANDOM_BITS = 64
+
+
+class _Entry:
+    """解压/哈希后的单个条目"""
+
+    __slots__ = ("index", "pk", "sig_point", "map_point", "r")
+
+    def __init__(self, index, pk, sig_point, map_point):
+        self.index = index
+        self.pk = pk
+        self.sig_point = sig_point
+        self.map_point = map_point  # 清除余因子之前的 H(m)
+        self.r = secrets.randbits(RANDOM_BITS) | 1
+
+
+def _map_message(message: bytes) -> tuple:
+    """hash_to_G2 去掉最后的 clear_cofactor_G2"""
+    u0, u1 = hash_to_field_FQ2(message, 2, G2ProofOfPossession.DST, sha256)
+    return add(map_to_curve_G2(u0), map_to_curve_G2(u1))
+
+
+def _prepare(
+    items: Sequence[Tuple[bytes, bytes, bytes]],
+    pk_points: Dict[bytes, Optional[tuple]]
+) -> Tuple[List[_Entry], List[bool]]:
+    """解码并校验所有条目; 编码非法的条目直接判定为无效"""
+    entries = []
+    valid = [False] * len(items)
+
+    for index, (public_key, message, signature) in enumerate(items):
+        public_key, message, signature = bytes(public_key), bytes(message), bytes(signature)
+        if len(public_key) != 48 or len(signature) != 96:
+            continue
+
+        # 同一公钥只做一次解压与子群检查
+        if public_key not in pk_points:
+            pk_points[public_key] = pubkey_to_G1(public_key) if G2ProofOfPossession.KeyValidate(public_key) else None
+        if pk_points[public_key] is None:
+            continue
+
+        try:
+            sig_point = signature_to_G2(signature)
+        except (ValueError, AssertionError):
+            continue
+        if not subgroup_check(sig_point):
+            continue
+
+        entries.append(_Entry(index, public_key, sig_point, _map_message(message)))
+        valid[index] = True
+
+    return entries, valid
+
+
+def _check(entries: List[_Entry], pk_points: Dict[bytes, tuple]) -> bool:
+    """对一组条目执行一次随机线性组合的多重配对检查"""
+    sig_sum = Z2
+    hash_sums: Dict[bytes, tuple] = {}
+    for entry in entries:
+        sig_sum = add(sig_sum, multiply(entry.sig_point, entry.r))
+        weighted = multiply(entry.map_point, entry.r)
+        hash_sums[entry.pk] = add(hash_sums[entry.pk], weighted) if entry.pk in hash_sums else weighted
+
+    product = pairing(sig_sum, G1, final_exponentiate=False)
+    for public_key, hash_sum in hash_sums.items():
+        hash_point = clear_cofactor_G2(hash_sum)
+        product = product * pairing(hash_point, neg(pk_points[public_key]), final_exponentiate=False)
+    return final_exponentiate(product) == FQ12.one()
+
+
+def _bisect(entries: List[_Entry], pk_points: Dict[bytes, tuple], valid: List[bool]):
+    """整组检查失败时二分, 把无效条目标记为 False"""
+    if _check(entries, pk_points):
+        return
+    if len(entries) == 1:
+        valid[entries[0].index] = False
+        return
+    middle = len(entries) // 2
+    _bisect(entries[:middle], pk_points, valid)
+    _bisect(entries[middle:], pk_points, valid)
+
+
+def batch_verify(items: Sequence[Tuple[bytes, bytes, bytes]]) -> List[bool]:
+    """
+    批量验证 BLS 签名
+
+    参数:
+        items: [(public_key, message, signature), ...]
+
+    返回:
+        与输入顺序一致的验证结果列表
+    """
+    if not items:
+        return []
+
+    pk_points: Dict[bytes, Optional[tuple]] = {}
+    entries, valid = _prepare(items, pk_points)
+    if entries:
+        _bisect(entries, pk_points, valid)
+
+    invalid = valid.count(False)
+    if invalid:
+        logger.info(f"Batch verify: {invalid}/{len(items)} signatures invalid")
+    return valid
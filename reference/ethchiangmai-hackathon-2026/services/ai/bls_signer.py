@@ -6,6 +6,9 @@
 from py_ecc.bls import G2ProofOfPossession as bls
 import hashlib
 import logging
+from typing import Optional
+
+from bls_backends import get_backend
 
 logger = logging.getLogger(__name__)
 
@@ -13,17 +16,22 @@ logger = logging.getLogger(__name__)
 class BLSSigner:
     """BLS 签名器"""
     
-    def __init__(self, private_key_hex: str):
+    def __init__(self, private_key_hex: str, backend: Optional[str] = None):
         """
         初始化签名器
         
         参数:
             private_key_hex: 私钥的十六进制字符串
+            backend: BLS 后端名称 (见 bls_backends), 默认读取 BLS_BACKEND
         """
+        self.backend = get_backend(backend)
         self.sk = int(private_key_hex, 16)
-        self.pk = bls.SkToPk(self.sk)
+        self.pk = self.backend.sk_to_pk(self.sk)
         
-        logger.info(f"BLS Signer initialized with public key: {self.pk.hex()[:16]}...")
+        logger.info(
+            f"BLS Signer initialized with public key: {self.pk.hex()[:16]}... "
+            f"(backend: {self.backend.name})"
+        )
     
     def sign_message(self, message: bytes) -> bytes:
         """
@@ -35,9 +43,18 @@ class BLSSigner:
         返回:
             签名（字节）
         """
-        signature = bls.Sign(self.sk, message)
+        signature = self.backend.sign(self.sk, message)
         return signature
     
+    def proof_of_possession(self) -> bytes:
+        """
+        生成公钥的 proof-of-possession, 注册到验证者委员会时使用
+        
+        返回:
+            PoP 签名（字节）
+        """
+        return self.backend.pop_prove(self.sk)
+    
     @staticmethod
     def verify_signature(public_key: bytes, message: bytes, signature: bytes) -> bool:
         """
@@ -52,11 +69,28 @@ class BLSSigner:
             是否有效
         """
         try:
-            return bls.Verify(public_key, message, signature)
+            return get_backend().verify(public_key, message, signature)
         except Exception as e:
             logger.error(f"Signature verification failed: {e}")
             return False
     
+    @staticmethod
+    def batch_verify(items: list) -> list:
+        """
+        批量验证多个独立签名
+        
+        参数:
+            items: [(public_key, message, signature), ...]
+        
+        返回:
+            与输入顺序一致的验证结果列表 (无效条目为 False)
+        """
+        try:
+            return get_backend().batch_verify(items)
+        except Exception as e:
+            logger.error(f"Batch signature verification failed: {e}")
+            return [BLSSigner.verify_signature(*item) for item in items]
+    
     @staticmethod
     def aggregate_signatures(signatures: list) -> bytes:
         """
@@ -68,7 +102,7 @@ class BLSSigner:
         返回:
             聚合签名
         """
-        return bls.Aggregate(signatures)
+        return get_backend().aggregate(signatures)
     
     @staticmethod
     def aggregate_verify(
@@ -89,12 +123,11 @@ class BLSSigner:
         """
         try:
             # 聚合公钥
-            agg_pk = public_keys[0]
-            for pk in public_keys[1:]:
-                agg_pk = bls.aggregate_pubkeys([agg_pk, pk])
+            backend = get_backend()
+            agg_pk = backend.aggregate_pubkeys(public_keys)
             
             # 验证聚合签名
-            return bls.Verify(agg_pk, message, aggregated_sig)
+            return backend.verify(agg_pk, message, aggregated_sig)
         except Exception as e:
             logger.error(f"Aggregated signature verification failed: {e}")
             return False
@@ -141,6 +174,30 @@ def construct_message(
     return hashlib.sha256(message_bytes).digest()
 
 
+def construct_batch_message(messages: list) -> bytes:
+    """
+    构造批量证明的待签名消息
+    
+    消息格式:
+    m = SHA256(batch_domain_sep || count || m_1 || m_2 || ... || m_n)
+    
+    其中 m_i 为每个条目由 construct_message 得到的 32 字节消息; 
+    一次签名即可覆盖整批结果, 验证者可由各条目重新计算
+    
+    参数:
+        messages: 各条目的消息(字节)列表
+    
+    返回:
+        批量消息的 SHA256 哈希
+    """
+    hasher = hashlib.sha256()
+    hasher.update(b"ECHORANK_BATCH_V1")
+    hasher.update(len(messages).to_bytes(4, "big"))
+    for message in messages:
+        hasher.update(message)
+    return hasher.digest()
+
+
 # 测试代码
 if __name__ == "__main__":
     import secrets
@@ -0,0 +1,290 @@
+# committee.py - 验证者委员会注册表
+"""
+缓存验证者委员会的公钥与聚合公钥
+
+- 注册时验证 proof-of-possession (防止 rogue-key 攻击) 并解压公钥点
+- 增删成员时增量维护聚合公钥 (一次点加/点减); 成员位置固定, 移除后留空而不前移
+- quorum 验证只需对缓存的聚合公钥做一次配对检查, 与委员会规模无关
+- 可选持久化为追加写的变更日志, 多个工作进程 (pre-fork) 共享同一份成员列表
+"""
+
+import fcntl
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence
+
+from py_ecc.bls.g2_primitives import G1_to_pubkey, pubkey_to_G1
+from py_ecc.optimized_bls12_381 import Z1, add, neg
+
+from bls_backends import get_backend
+
+logger = logging.getLogger(__name__)
+
+
+class CommitteeError(ValueError):
+    """委员会操作失败 (未知委员会、重复成员、PoP 无效等)"""
+
+
+def encode_bitmap(bits: Sequence[bool]) -> str:
+    """签名者位图 -> 十六进制 (成员 i 对应第 i//8 字节的第 i%8 位)"""
+    data = bytearray((len(bits) + 7) // 8)
+    for i, bit in enumerate(bits):
+        if bit:
+            data[i // 8] |= 1 << (i % 8)
+    return data.hex()
+
+
+def decode_bitmap(value, size: int) -> List[bool]:
+    """
+    解析签名者位图: 十六进制字符串 (encode_bitmap 格式) 或 0/1 列表
+
+    位图短于委员会时, 其后注册的成员视为未签名
+    """
+    if isinstance(value, str):
+        data = bytes.fromhex(value)
+        if len(data) > (size + 7) // 8 or any(data[i // 8] >> (i % 8) & 1 for i in range(size, len(data) * 8)):
+            raise CommitteeError(f"Signer bitmap has bits beyond the {size} committee members")
+        bits = [bool(data[i // 8] >> (i % 8) & 1) for i in range(min(size, len(data) * 8))]
+    else:
+        bits = [bool(bit) for bit in value]
+        if len(bits) > size:
+            raise CommitteeError(f"Signer bitmap has {len(bits)} bits, committee has {size} members")
+    return bits + [False] * (size - len(bits))
+
+
+class Committee:
+    """
+    单个委员会: 按注册顺序分配的固定位置 (即签名者位图中的位) + 增量维护的聚合公钥
+
+    移除成员只把其位置标记为空 (tombstone), 其余成员的位置不变, 之前签发的位图仍指向同一批公钥;
+    同一公钥再次注册时分配新的位置
+    """
+
+    def __init__(self, committee_id: str):
+        self.committee_id = committee_id
+        self.slots: List[Optional[bytes]] = []
+        self._points: Dict[bytes, tuple] = {}
+        self._aggregate_point = Z1
+        self._aggregate_pk: Optional[bytes] = None
+
+    def __len__(self) -> int:
+        """当前成员数 (不含已移除的位置)"""
+        return len(self._points)
+
+    def __contains__(self, public_key: bytes) -> bool:
+        return public_key in self._points
+
+    def add(self, public_key: bytes, point: tuple):
+        self.slots.append(public_key)
+        self._points[public_key] = point
+        self._aggregate_point = add(self._aggregate_point, point)
+        self._aggregate_pk = None
+
+    def remove(self, public_key: bytes):
+        point = self._points.pop(public_key)
+        self.slots[self.slots.index(public_key)] = None
+        self._aggregate_point = add(self._aggregate_point, neg(point))
+        self._aggregate_pk = None
+
+    @property
+    def aggregate_public_key(self) -> bytes:
+        """全体当前成员的聚合公钥 (压缩格式, 缓存)"""
+        if self._aggregate_pk is None:
+            self._aggregate_pk = G1_to_pubkey(self._aggregate_point)
+        return self._aggregate_pk
+
+    def subset_public_key(self, signer_bitmap: Sequence[bool]) -> bytes:
+        """签名者子集的聚合公钥: 从全体聚合公钥中减去未签名成员"""
+        if len(signer_bitmap) != len(self.slots):
+            raise CommitteeError(
+                f"Signer bitmap has {len(signer_bitmap)} bits, committee has {len(self.slots)} slots"
+            )
+        point = self._aggregate_point
+        for i, (public_key, signed) in enumerate(zip(self.slots, signer_bitmap)):
+            if public_key is None:
+                if signed:
+                    raise CommitteeError(f"Signer bitmap marks removed member at slot {i}")
+            elif not signed:
+                point = add(point, neg(self._points[public_key]))
+        return self.aggregate_public_key if point is self._aggregate_point else G1_to_pubkey(point)
+
+
+class CommitteeRegistry:
+    """
+    按委员会 ID 管理验证者公钥
+
+    - path: 可选, 变更日志文件 (每行一条 JSON: {"op": "add"/"remove", "committee": ..., "public_key": ...});
+      多个进程共享同一文件: 写操作持有文件锁 (flock), 先读入其他进程的写入再追加,
+      读操作前按文件大小增量读取新增的行 (不加文件锁, 不修改文件); None 表示只保存在当前进程内存中
+
+    日志只记录已通过 PoP 校验的成员, 重新加载时不再重复校验
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._committees: Dict[str, Committee] = {}
+        self._lock = threading.RLock()
+        self._offset = 0                # 已读取的日志字节数
+        self._inode: Optional[int] = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with self._file_lock():
+                self._refresh()
+            logger.info(f"Committee registry: {self.committees()} from {path}")
+
+    # ---- 变更日志 ----
+
+    @contextmanager
+    def _file_lock(self):
+        """进程间互斥 (flock) + 进程内互斥"""
+        with self._lock:
+            if not self.path:
+                yield
+                return
+            with open(self.path + ".lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """读入其他进程追加的变更 (调用方持有 _lock); 日志被替换或截短时整体重新加载"""
+        if not self.path:
+            return
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            self._committees, self._offset, self._inode = {}, 0, stat.st_ino
+        if stat.st_size == self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1  # 忽略未写完的最后一行
+        for line in data[:end].splitlines():
+            if line.strip():
+                self._apply(json.loads(line))
+        self._offset += end
+
+    def _apply(self, entry: Dict[str, Any]):
+        public_key = bytes.fromhex(entry["public_key"])
+        if entry["op"] == "add":
+            committee = self._committees.setdefault(entry["committee"], Committee(entry["committee"]))
+            committee.add(public_key, pubkey_to_G1(public_key))
+        elif entry["op"] == "remove":
+            self._committees[entry["committee"]].remove(public_key)
+
+    def _commit(self, entry: Dict[str, Any]):
+        """追加一条变更并应用 (调用方持有 _file_lock 且已 _refresh)"""
+        if not self.path:
+            self._apply(entry)
+            return
+        with open(self.path, "ab") as f:
+            if f.tell() != self._offset:
+                f.truncate(self._offset)  # 丢弃写入中途崩溃留下的半行
+            f.write(json.dumps(entry).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._refresh()
+
+    # ---- 成员 ----
+
+    def register(self, committee_id: str, public_key: bytes, proof: bytes, exist_ok: bool = False):
+        """
+        注册验证者
+
+        参数:
+            committee_id: 委员会 ID
+            public_key: 48 字节 G1 压缩公钥
+            proof: 96 字节 proof-of-possession (PopProve)
+            exist_ok: 已是成员时直接返回 (服务启动时注册自身公钥; 日志中可能已有上次运行或其他工作进程的注册)
+        """
+        public_key, proof = bytes(public_key), bytes(proof)
+        if not get_backend().pop_verify(public_key, proof):
+            raise CommitteeError("Invalid proof of possession")
+        pubkey_to_G1(public_key)
+
+        with self._file_lock():
+            self._refresh()
+            committee = self._committees.get(committee_id)
+            if committee is not None and public_key in committee:
+                if exist_ok:
+                    return
+                raise CommitteeError("Validator already registered")
+            self._commit({"op": "add", "committee": committee_id, "public_key": public_key.hex()})
+            size = len(self._committees[committee_id])
+        logger.info(f"Committee '{committee_id}': registered {public_key.hex()[:16]}... ({size} members)")
+
+    def remove(self, committee_id: str, public_key: bytes):
+        public_key = bytes(public_key)
+        with self._file_lock():
+            self._refresh()
+            if public_key not in self._get(committee_id):
+                raise CommitteeError("Validator not registered")
+            self._commit({"op": "remove", "committee": committee_id, "public_key": public_key.hex()})
+        logger.info(f"Committee '{committee_id}': removed {public_key.hex()[:16]}...")
+
+    def _get(self, committee_id: str) -> Committee:
+        committee = self._committees.get(committee_id)
+        if committee is None:
+            raise CommitteeError(f"Unknown committee: {committee_id}")
+        return committee
+
+    def members(self, committee_id: str) -> List[Optional[bytes]]:
+        """按位图顺序的成员公钥; 已移除成员的位置为 None (委员会清空后仍保留, 位置不会复用)"""
+        with self._lock:
+            self._refresh()
+            return list(self._get(committee_id).slots)
+
+    def aggregate_public_key(self, committee_id: str) -> bytes:
+        with self._lock:
+            self._refresh()
+            return self._get(committee_id).aggregate_public_key
+
+    def committees(self) -> Dict[str, int]:
+        """委员会 ID -> 成员数"""
+        with self._lock:
+            self._refresh()
+            return {committee_id: len(c) for committee_id, c in self._committees.items()}
+
+    def verify_quorum(
+        self,
+        committee_id: str,
+        message: bytes,
+        signature: bytes,
+        signer_bitmap: Optional[Sequence[bool]] = None,
+        threshold: Optional[int] = None
+    ) -> bool:
+        """
+        验证委员会 (或其子集) 对同一消息的聚合签名
+
+        参数:
+            signer_bitmap: 按成员位置 (members 的顺序, 含已移除的位置) 标记谁参与了签名; None 表示全体当前成员
+            threshold: 最少签名人数; None 表示不检查
+
+        返回:
+            是否有效
+        """
+        with self._lock:
+            self._refresh()
+            committee = self._get(committee_id)
+            if signer_bitmap is None:
+                signers = len(committee)
+                aggregate_pk = committee.aggregate_public_key
+            else:
+                signers = sum(1 for signed in signer_bitmap if signed)
+                aggregate_pk = committee.subset_public_key(signer_bitmap)
+
+        if signers == 0 or (threshold is not None and signers < threshold):
+            return False
+        try:
+            return get_backend().verify(aggregate_pk, message, bytes(signature))
+        except Exception as e:
+            logger.error(f"Quorum verification failed: {e}")
+            return False
@@ -0,0 +1,211 @@
+# embedding_codec.py - 声纹向量的紧凑传输格式
+"""
+声纹接口的内容协商
+
+- JSON 数组 (默认, 兼容旧客户端): 192 维 float 约 4KB 文本, 解析慢
+- JSON 内的 base64 块: {"dtype": "float16", "shape": [192], "base64": "..."}; float16 为 512 字节文本,
+  余弦相似度误差约 1e-4 (embedding_hash 按 float32 计算, 需要校验哈希时使用 float32)
+- application/msgpack: 同样的结构, 数据为二进制 ("data" 字段), 无 base64 膨胀
+- application/octet-stream (仅单个声纹): 小端原始字节, 维度与类型在响应头中
+
+选择方式: Accept 头选择 msgpack / octet-stream, 查询参数 encoding=json|f32|f16 选择数组编码
+(msgpack 与 octet-stream 默认 f32); 请求体按 Content-Type 解析, 数组字段接受以上任意形式
+
+JSON 响应在安装了 orjson 时用 orjson 序列化, 并绕过 FastAPI 的 jsonable_encoder
+"""
+
+import base64
+import json
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+JSON_TYPE = "application/json"
+MSGPACK_TYPE = "application/msgpack"
+OCTET_TYPE = "application/octet-stream"
+
+ENCODINGS = {"json": None, "f32": "<f4", "f16": "<f2"}
+DTYPE_NAMES = {"float32": "<f4", "float16": "<f2"}
+
+
+class EmbeddingCodecError(ValueError):
+    """无法解析的声纹数据或请求体"""
+
+    status_code = 400
+
+
+class UnsupportedMediaType(EmbeddingCodecError):
+    status_code = 415
+
+
+def encode_array(array: np.ndarray, encoding: str = "json", binary: bool = False) -> Any:
+    """
+    声纹向量或矩阵 -> 可序列化对象
+
+    参数:
+        encoding: json (嵌套列表) / f32 / f16
+        binary: True 时数据为 bytes (msgpack), 否则为 base64 字符串 (JSON)
+    """
+    if encoding not in ENCODINGS:
+        raise EmbeddingCodecError(f"Unknown encoding '{encoding}' (expected one of {', '.join(ENCODINGS)})")
+    array = np.asarray(array)
+    dtype = ENCODINGS[encoding]
+    if dtype is None:
+        return array.astype(np.float32).tolist()
+    data = np.ascontiguousarray(array, dtype=dtype).tobytes()
+    encoded = {"dtype": "float16" if encoding == "f16" else "float32", "shape": list(array.shape)}
+    if binary:
+        encoded["data"] = data
+    else:
+        encoded["base64"] = base64.b64encode(data).decode("ascii")
+    return encoded
+
+
+def decode_array(value: Any, ndim: int = 1) -> np.ndarray:
+    """
+    任意支持的形式 -> float32 数组
+
+    参数:
+        value: 数值列表 / {"dtype", "shape", "base64" 或 "data"} / bytes (视为 float32)
+        ndim: 期望的维数 (1 为单个声纹, 2 为声纹矩阵); 矩阵也可以是编码后声纹的列表
+
+    异常:
+        EmbeddingCodecError: 格式错误
+    """
+    if isinstance(value, (bytes, bytearray)):
+        array = _from_bytes(value, "<f4")
+    elif isinstance(value, dict):
+        dtype = DTYPE_NAMES.get(value.get("dtype", "float32"))
+        if dtype is None:
+            raise EmbeddingCodecError(f"Unsupported dtype '{value.get('dtype')}' (expected float32 or float16)")
+        if "data" in value:
+            data = value["data"]
+            if not isinstance(data, (bytes, bytearray)):
+                raise EmbeddingCodecError("'data' must be binary")
+        elif "base64" in value:
+            try:
+                data = base64.b64decode(value["base64"], validate=True)
+            except (TypeError, ValueError) as e:
+                raise EmbeddingCodecError(f"Invalid base64 embedding: {e}")
+        else:
+            raise EmbeddingCodecError("Encoded embedding needs 'base64' or 'data'")
+        array = _from_bytes(data, dtype)
+        shape = value.get("shape")
+        if shape is not None:
+            try:
+                array = array.reshape(shape)
+            except (TypeError, ValueError):
+                raise EmbeddingCodecError(f"Embedding of {array.size} values does not match shape {shape}")
+    elif isinstance(value, list) and ndim == 2 and value and not isinstance(value[0], (int, float)):
+        rows = [decode_array(row, ndim=1) for row in value]
+        if len({len(row) for row in rows}) != 1:
+            raise EmbeddingCodecError("Embeddings must all have the same dimension")
+        array = np.stack(rows)
+    else:
+        try:
+            array = np.asarray(value, dtype=np.float32)
+        except (TypeError, ValueError):
+            raise EmbeddingCodecError("Embedding must be a list of numbers or an encoded array")
+
+    if ndim == 2 and array.ndim == 1:
+        array = array.reshape(1, -1)
+    if array.ndim != ndim or not array.size:
+        raise EmbeddingCodecError(f"Expected a non-empty {ndim}-dimensional embedding array, got shape {array.shape}")
+    return array
+
+
+def _from_bytes(data: bytes, dtype: str) -> np.ndarray:
+    itemsize = np.dtype(dtype).itemsize
+    if len(data) % itemsize:
+        raise EmbeddingCodecError(f"Embedding byte length {len(data)} is not a multiple of {itemsize}")
+    return np.frombuffer(data, dtype=dtype).astype(np.float32)
+
+
+# ---- 内容协商 ----
+
+def negotiate(request: Request, encoding: Optional[str] = None, allow_octet: bool = False) -> Tuple[str, str]:
+    """
+    根据 Accept 头与 encoding 参数选择 (媒体类型, 数组编码)
+
+    未安装 msgpack 时 msgpack 请求回退为 JSON; allow_octet 为 False (响应不止一个声纹) 时 octet-stream 也回退为 JSON
+    """
+    accept = request.headers.get("accept", "")
+    if MSGPACK_TYPE in accept and msgpack is not None:
+        media_type = MSGPACK_TYPE
+    elif OCTET_TYPE in accept and allow_octet:
+        media_type = OCTET_TYPE
+    else:
+        media_type = JSON_TYPE
+    encoding = encoding or (request.query_params.get("encoding") or ("json" if media_type == JSON_TYPE else "f32"))
+    if encoding not in ENCODINGS or (media_type == OCTET_TYPE and encoding == "json"):
+        raise EmbeddingCodecError(f"Unsupported encoding '{encoding}' for {media_type}")
+    return media_type, encoding
+
+
+async def read_body(request: Request) -> Dict[str, Any]:
+    """按 Content-Type 解析 JSON 或 msgpack 请求体"""
+    content_type = request.headers.get("content-type", JSON_TYPE).split(";")[0].strip()
+    body = await request.body()
+    if content_type == MSGPACK_TYPE:
+        if msgpack is None:
+            raise UnsupportedMediaType("msgpack is not installed on this server")
+        try:
+            data = msgpack.unpackb(body, raw=False)
+        except Exception as e:
+            raise EmbeddingCodecError(f"Invalid msgpack body: {e}")
+    elif content_type in (JSON_TYPE, "") or content_type.endswith("+json"):
+        try:
+            data = orjson.loads(body) if orjson is not None else json.loads(body)
+        except ValueError as e:
+            raise EmbeddingCodecError(f"Invalid JSON body: {e}")
+    else:
+        raise UnsupportedMediaType(f"Unsupported Content-Type '{content_type}' (use {JSON_TYPE} or {MSGPACK_TYPE})")
+    if not isinstance(data, dict):
+        raise EmbeddingCodecError("Request body must be an object")
+    return data
+
+
+def render(payload: Dict[str, Any], media_type: str = JSON_TYPE, status_code: int = 200) -> Response:
+    """序列化响应 (JSON 或 msgpack); 返回 Response 对象, FastAPI 不再逐字段转换"""
+    if media_type == MSGPACK_TYPE:
+        return Response(msgpack.packb(payload, use_bin_type=True), status_code=status_code, media_type=MSGPACK_TYPE)
+    if orjson is not None:
+        body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return Response(body, status_code=status_code, media_type=JSON_TYPE)
+
+
+def render_embedding(payload: Dict[str, Any], embedding: np.ndarray, media_type: str, encoding: str) -> Response:
+    """
+    带声纹的响应: payload["embedding"] 按协商结果编码
+
+    octet-stream 时响应体只有声纹字节, 维度与类型放在 X-Embedding-* 响应头中, payload 的其他字段不返回
+    """
+    if media_type == OCTET_TYPE:
+        dtype = ENCODINGS[encoding]
+        return Response(
+            np.ascontiguousarray(embedding, dtype=dtype).tobytes(),
+            media_type=OCTET_TYPE,
+            headers={
+                "X-Embedding-Dtype": "float16" if encoding == "f16" else "float32",
+                "X-Embedding-Dimensions": str(len(embedding))
+            }
+        )
+    payload["embedding"] = encode_array(embedding, encoding, binary=media_type == MSGPACK_TYPE)
+    return render(payload, media_type)
@@ -0,0 +1,144 @@
+# inference_pool.py - 推理任务准入控制
+"""
+有界推理执行器: 将阻塞的模型推理/签名放到独立线程池, 并在排队过深时快速拒绝请求
+"""
+
+import asyncio
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionError(Exception):
+    """请求未被推理队列接收"""
+
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueFullError(AdmissionError):
+    """队列已满, 立即拒绝 (429)"""
+
+    status_code = 429
+
+
+class QueueTimeoutError(AdmissionError):
+    """排队时间超过截止时间 (503)"""
+
+    status_code = 503
+
+
+class InferenceExecutor:
+    """
+    有界推理执行器
+
+    - max_workers: 同时执行的推理任务数
+    - max_queue: 等待执行的最大任务数, 超出后返回 QueueFullError
+    - queue_timeout: 单个任务在队列中的最长等待时间(秒), 超出后返回 QueueTimeoutError
+    """
+
+    # 服务时间的指数滑动平均系数
+    EWMA_ALPHA = 0.2
+
+    def __init__(self, max_workers: int = 1, max_queue: int = 8, queue_timeout: float = 20.0):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="inference"
+        )
+        self._pending = 0   # 已接收但未完成的任务 (排队 + 执行中)
+        self._running = 0   # 正在执行的任务
+        self._avg_service_s = 1.0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+
+        logger.info(
+            f"Inference executor: workers={self.max_workers}, "
+            f"queue={self.max_queue}, queue_timeout={self.queue_timeout}s"
+        )
+
+    @property
+    def queued(self) -> int:
+        """当前排队(未开始执行)的任务数"""
+        return max(0, self._pending - self._running)
+
+    @property
+    def in_flight(self) -> int:
+        """当前正在执行的任务数"""
+        return self._running
+
+    def retry_after(self) -> int:
+        """根据当前积压和平均服务时间估算 Retry-After (秒)"""
+        backlog = self._pending / self.max_workers
+        return max(1, math.ceil(backlog * self._avg_service_s))
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        在推理线程池中执行 fn(*args, **kwargs)
+
+        队列已满时抛出 QueueFullError; 排队超过 queue_timeout 时抛出 QueueTimeoutError
+        """
+        if self._pending >= self.max_workers + self.max_queue:
+            self.rejected_full += 1
+            raise QueueFullError("Inference queue is full", self.retry_after())
+
+        loop = asyncio.get_running_loop()
+        started = asyncio.Event()
+        self._pending += 1
+
+        def task():
+            loop.call_soon_threadsafe(self._mark_started, started)
+            t0 = time.monotonic()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.monotonic() - t0
+                loop.call_soon_threadsafe(self._mark_finished, elapsed)
+
+        future = self._executor.submit(task)
+        try:
+            try:
+                await asyncio.wait_for(started.wait(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                # 仍在队列中则撤销; 若恰好已开始执行, 继续等待结果
+                if future.cancel():
+                    self.rejected_timeout += 1
+                    raise QueueTimeoutError(
+                        f"Request waited more than {self.queue_timeout}s in inference queue",
+                        self.retry_after()
+                    )
+            return await asyncio.wrap_future(future)
+        finally:
+            self._pending -= 1
+
+    def _mark_started(self, started: asyncio.Event):
+        self._running += 1
+        started.set()
+
+    def _mark_finished(self, elapsed: float):
+        self._running -= 1
+        self._avg_service_s += self.EWMA_ALPHA * (elapsed - self._avg_service_s)
+
+    def stats(self) -> Dict[str, Any]:
+        """队列状态快照"""
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "avg_service_ms": round(self._avg_service_s * 1000, 1),
+            "rejected_full": self.rejected_full,
+            "rejected_timeout": self.rejected_timeout,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,147 @@
+# ingest.py - 流式上传接收
+"""
+分块读取上传文件: 边读边计算 SHA-256, 尽早执行大小/时长限制, 数据暂存在 SpooledTemporaryFile 中
+"""
+
+import hashlib
+import logging
+import tempfile
+from typing import BinaryIO, Optional
+
+logger = logging.getLogger(__name__)
+
+# 调用方声明为原始 PCM 时按 16kHz / 16bit / 单声道估算时长 (与解码器的 PCM 解析一致)
+RAW_PCM_BYTE_RATE = 16000 * 2
+
+
+class UploadRejected(ValueError):
+    """上传内容不符合限制"""
+
+    status_code = 400
+
+
+class UploadTooLargeError(UploadRejected):
+    """上传超过大小上限"""
+
+    status_code = 413
+
+
+class AudioTooLongError(UploadRejected):
+    """音频超过时长上限"""
+
+    status_code = 413
+
+
+class IngestedAudio:
+    """已接收的上传音频"""
+
+    __slots__ = ("file", "size", "sha256", "filename")
+
+    def __init__(self, file: BinaryIO, size: int, sha256: str, filename: Optional[str]):
+        self.file = file
+        self.size = size
+        self.sha256 = sha256
+        self.filename = filename
+
+    def open(self) -> BinaryIO:
+        """返回定位到开头的文件对象(供解码器直接读取, 不再复制为 bytes)"""
+        self.file.seek(0)
+        return self.file
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def wav_byte_rate(header: bytes) -> Optional[int]:
+    """从 WAV 头部解析每秒字节数; 非 WAV 返回 None"""
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+    index = header.find(b"fmt ", 12)
+    if index < 0 or len(header) < index + 20:
+        return None
+    byte_rate = int.from_bytes(header[index + 16:index + 20], "little")
+    return byte_rate or None
+
+
+def estimate_byte_rate(header: bytes, pcm: bool = False) -> Optional[int]:
+    """
+    根据文件头估算未压缩音频的码率
+
+    WAV 使用头部声明的码率; 调用方声明为原始 PCM 时按 RAW_PCM_BYTE_RATE;
+    其他格式 (压缩格式或未识别的容器, 由 ffmpeg 解码) 无法从字节数估算, 返回 None, 由解码后再检查时长
+    """
+    byte_rate = wav_byte_rate(header)
+    if byte_rate:
+        return byte_rate
+    return RAW_PCM_BYTE_RATE if pcm else None
+
+
+async def ingest_upload(
+    upload,
+    max_bytes: int,
+    max_duration_s: Optional[float] = None,
+    chunk_size: int = 64 * 1024,
+    spool_max_size: int = 1024 * 1024,
+    pcm: bool = False
+) -> IngestedAudio:
+    """
+    分块读取 UploadFile
+
+    参数:
+        upload: FastAPI UploadFile
+        max_bytes: 最大字节数, 超出抛出 UploadTooLargeError
+        max_duration_s: 最大时长(秒); 对 WAV/PCM 在读取过程中按码率提前检查
+        chunk_size: 每次读取的块大小
+        spool_max_size: 超过该大小后暂存数据转存到磁盘临时文件
+        pcm: 调用方声明上传为原始 PCM (见 estimate_byte_rate)
+
+    返回:
+        IngestedAudio (调用方负责 close)
+    """
+    hasher = hashlib.sha256()
+    spool = tempfile.SpooledTemporaryFile(max_size=spool_max_size)
+    size = 0
+    header = b""
+    byte_rate = None
+    header_checked = False
+
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLargeError(f"Audio file exceeds {max_bytes} bytes")
+
+            hasher.update(chunk)
+            spool.write(chunk)
+
+            if max_duration_s is None:
+                continue
+            if not header_checked:
+                header += chunk[:64 - len(header)]
+                if len(header) >= 64:
+                    byte_rate = estimate_byte_rate(header, pcm)
+                    header_checked = True
+            if byte_rate and size / byte_rate > max_duration_s:
+                raise AudioTooLongError(f"Audio longer than {max_duration_s:.0f}s")
+
+        # 小于 64 字节的上传在结束时补做检查
+        if max_duration_s is not None and not header_checked and header:
+            byte_rate = estimate_byte_rate(header, pcm)
+            if byte_rate and size / byte_rate > max_duration_s:
+                raise AudioTooLongError(f"Audio longer than {max_duration_s:.0f}s")
+    except Exception:
+        spool.close()
+        raise
+
+    spool.seek(0)
+    return IngestedAudio(spool, size, hasher.hexdigest(), getattr(upload, "filename", None))
@@ -0,0 +1,562 @@
+# keywords.py - 关键词提取引擎
+"""
+TF-IDF 关键词提取: 启动时预加载, 领域词典 + 由已存储反馈转写维护的语料 IDF
+
+- 中文: jieba 分词 (独立的 Tokenizer 实例); 前缀词典缓存写入 cache_dir, 重启后直接加载缓存文件,
+  不再在第一次 /analyze 时花约 1 秒构建词典
+- 英文: 正则分词 + 小写 + 停用词 + 复数还原 (S-stemmer), 领域词典中的多词短语 (Chiang Mai / smart contract) 整体匹配
+- 领域词典 (domain_dict.txt): Web3 / 清迈相关词汇, 中文词加入 jieba 词典, 英文词与短语用于英文分词; 输出时使用词典中的写法
+- IDF: jieba 自带的通用 IDF (中文) 与语料 IDF (已分析反馈的文档频率) 按语料规模加权混合;
+  语料越大, 语料 IDF 权重越高 (所有反馈都提到的词权重下降)
+
+未安装 jieba 时中文退回到正则: 连续汉字为一个词, 领域词典中的词先被切出; 打分方式相同
+
+关键词进入签名的 result_hash, 因此打分只使用加载时固定的 IDF 快照: 新反馈 (observe) 在后台线程中分词并累计到
+语料 IDF 文件, 不改变当前进程的打分; 只有显式调用 reload_idf() (或重启) 才切换到新的快照.
+快照版本 (version) 覆盖所有影响打分的输入 (语料计数、领域词典、先验文档数、分词方式), 由调用方放入结果缓存版本
+
+语料 IDF 文件为 JSON {"documents": N, "df": {词: 文档数}}; 多个工作进程各自累计增量, 保存时在文件锁内与磁盘上的计数合并
+
+用法 (由已存储的反馈重建语料 IDF):
+    python keywords.py --from-cache cache/analysis --out data/keywords/idf.json
+    python keywords.py --from-text transcripts.txt --out data/keywords/idf.json   # 每行一条转写 (如 feedbacks.transcription 导出)
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import math
+import os
+import queue
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import jieba
+except ImportError:
+    jieba = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DOMAIN_DICT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "domain_dict.txt")
+
+# 汉字连续段 / 英文单词 (允许 web3、don't、zk-rollup) / 空白 (不打断英文短语) / 其他字符 (打断英文短语)
+TOKEN_PATTERN = re.compile(r"([\u3400-\u4dbf\u4e00-\u9fff]+)|([A-Za-z0-9]+(?:['’\-][A-Za-z0-9]+)*)|([ \t]+)|.", re.S)
+HAN_PATTERN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff]+")
+# 无 jieba 时的粗切分: 在常见虚词处断开连续汉字
+FUNCTION_CHARS = re.compile(r"[的了在是很都也和就把被吗呢吧啊]")
+
+CHINESE_STOP_WORDS = frozenset("""
+的 了 是 我 你 他 她 它 我们 你们 他们 她们 这个 那个 一个 这些 那些 这样 那样 这里 那里 这么 那么
+什么 怎么 为什么 没有 不是 就是 还是 但是 因为 所以 然后 而且 如果 虽然 可以 可能 应该 觉得 感觉 知道
+一下 一些 一点 一起 已经 还有 非常 特别 真的 比较 有点 有些 很多 其实 大家 自己 时候 现在 今天 之后
+以后 之前 以前 东西 事情 地方 问题 嗯嗯 啊啊 哈哈 呵呵 对对 好的 是的 不过 只是 或者 以及 这种 那种
+""".split())
+
+ENGLISH_STOP_WORDS = frozenset("""
+a about above after again against all almost also am an and any are aren't as at be because been before being
+below between both but by can can't cannot could couldn't did didn't do does doesn't doing don't down during each
+else even ever every few for from further get gets getting got had hadn't has hasn't have haven't having he he's
+her here here's hers herself him himself his how how's however i i'd i'll i'm i've if in into is isn't it it's its
+itself just let's like lot lots made make many maybe me more most much must my myself no nor not now of off oh ok
+okay on once one only or other ought our ours ourselves out over own pretty quite rather really said same say says
+she she'd she'll she's should shouldn't so some something such than that that's the their theirs them themselves
+then there there's these they they'd they'll they're they've thing things think this those though through to too
+um uh under until up us very was wasn't we we'd we'll we're we've well were weren't what what's when when's where
+where's which while who who's whom why why's will with won't would wouldn't yeah yes yet you you'd you'll you're
+you've your yours yourself yourselves
+""".split())
+
+
+def stem_english(word: str) -> str:
+    """复数还原 (Harman S-stemmer): parties -> party, events -> event, 保留 -ss / -us 结尾; 连字符词只处理最后一段"""
+    head, hyphen, word = word.rpartition("-")
+    if hyphen:
+        return head + hyphen + stem_english(word)
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    if word.endswith("ies") and not word.endswith(("eies", "aies")):
+        return word[:-3] + "y"
+    if word.endswith("es") and not word.endswith(("aes", "ees", "oes")):
+        return word[:-1]
+    if word.endswith("s") and not word.endswith(("us", "ss")):
+        return word[:-1]
+    return word
+
+
+def parse_dictionary(path: str) -> List[Tuple[str, Optional[int], Optional[str]]]:
+    """
+    读取领域词典
+
+    每行 "词 [词频 [词性]]" (与 jieba 用户词典兼容, 英文词可以包含空格); 空行与 # 开头的行忽略
+
+    返回:
+        [(词, 词频或 None, 词性或 None)]
+    """
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split()
+            freq = tag = None
+            if len(parts) >= 3 and parts[-2].isdigit() and parts[-1].isalpha() and parts[-1].islower():
+                freq, tag, parts = int(parts[-2]), parts[-1], parts[:-2]
+            elif len(parts) >= 2 and parts[-1].isdigit():
+                freq, parts = int(parts[-1]), parts[:-1]
+            entries.append((" ".join(parts), freq, tag))
+    return entries
+
+
+class KeywordEngine:
+    """
+    预加载的关键词提取器 (线程安全)
+
+    参数:
+        domain_dict: 领域词典路径, None 表示不使用
+        cache_dir: jieba 前缀词典缓存目录, None 表示使用系统临时目录
+        idf_path: 语料 IDF 文件, None 表示只使用通用 IDF
+        prior_docs: 语料 IDF 的先验文档数; 语料 IDF 权重 = N / (N + prior_docs)
+        save_every: 累计多少篇新文档后保存语料 IDF
+        bootstrap_dir: 语料 IDF 文件不存在时, 从该分析结果缓存目录中的转写重建
+        observe_queue: 等待后台计入语料的转写上限, 超出时丢弃 (只影响语料统计, 不影响结果)
+    """
+
+    def __init__(
+        self,
+        domain_dict: Optional[str] = DEFAULT_DOMAIN_DICT,
+        cache_dir: Optional[str] = None,
+        idf_path: Optional[str] = None,
+        prior_docs: int = 200,
+        save_every: int = 20,
+        bootstrap_dir: Optional[str] = None,
+        observe_queue: int = 1000
+    ):
+        self.domain_dict = domain_dict
+        self.cache_dir = cache_dir
+        self.idf_path = idf_path
+        self.prior_docs = max(1, prior_docs)
+        self.save_every = max(1, save_every)
+        self.bootstrap_dir = bootstrap_dir
+        self.observe_queue = max(1, observe_queue)
+
+        self.tokenizer = None
+        self.loaded = False
+        self.load_ms: Optional[float] = None
+        # 通用 IDF (jieba idf.txt), 乘以 _base_scale 归一化到 [0, 1]; 表外词取中位数
+        self._base_idf: Dict[str, float] = {}
+        self._base_scale = 1.0
+        self._base_default = 0.85
+        # 领域词典: 英文小写词 / 短语 -> 输出写法, 中文词集合 (无 jieba 时用于切分)
+        self._english_terms: Dict[Tuple[str, ...], str] = {}
+        self._phrase_max = 1
+        self._han_terms: set = set()
+        self._han_max = 0
+        # 打分使用的语料文档频率快照 (只在 reload_idf 时整体替换); _pending_* 为尚未写入磁盘的新文档计数
+        self._corpus: Tuple[int, Counter] = (0, Counter())
+        self.version: Optional[str] = None
+        self._pending_documents = 0
+        self._pending_df: Counter = Counter()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.observed = 0
+        self.dropped = 0
+        # 后台计入线程 (按进程创建: pre-fork 模式下父进程的线程不会进入工作进程)
+        self._queue: Optional[queue.Queue] = None
+        self._worker: Optional[threading.Thread] = None
+        self._worker_pid: Optional[int] = None
+
+    # ---- 加载 ----
+
+    def load(self) -> "KeywordEngine":
+        """构建 (或从缓存加载) jieba 词典, 读取领域词典与 IDF (阻塞, 启动时调用)"""
+        with self._load_lock:
+            if self.loaded:
+                return self
+            start = time.perf_counter()
+            entries = self._load_domain_dict()
+            if jieba is not None:
+                self._load_jieba(entries)
+            # 分词可用后再读取 (或重建) 语料 IDF
+            self.loaded = True
+            self._bootstrap_corpus_idf()
+            self.reload_idf()
+            self.load_ms = round((time.perf_counter() - start) * 1000, 1)
+        logger.info(
+            f"Keyword engine ready in {self.load_ms} ms (jieba={'yes' if self.tokenizer else 'no'}, "
+            f"domain terms={len(self._english_terms) + len(self._han_terms)}, corpus={self._corpus[0]} docs, "
+            f"version={self.version})"
+        )
+        return self
+
+    def reload_idf(self) -> str:
+        """
+        从语料 IDF 文件读取新的打分快照并替换当前快照 (阻塞: 读取并解析文件)
+
+        返回:
+            新的快照版本; 调用方应同时更换结果缓存版本
+        """
+        self._ensure_loaded()
+        state = self._read_idf_file() if self.idf_path else None
+        documents, df = state or (0, Counter())
+        version = self._scoring_version(documents, df)
+        with self._lock:
+            self._corpus, self.version = (documents, df), version
+        return version
+
+    def _scoring_version(self, documents: int, df: Counter) -> str:
+        """影响打分的全部输入的摘要: 语料计数、领域词典、先验文档数、分词方式 (jieba 版本或正则)"""
+        digest = hashlib.sha256()
+        digest.update(json.dumps({
+            "documents": documents,
+            "df": sorted(df.items()),
+            "prior_docs": self.prior_docs,
+            "english_terms": sorted(" ".join(key) + "=" + shown for key, shown in self._english_terms.items()),
+            "han_terms": sorted(self._han_terms),
+            "segmenter": f"jieba-{getattr(jieba, '__version__', '?')}" if self.tokenizer is not None else "regex",
+        }, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+        return f"idf-{digest.hexdigest()[:12]}"
+
+    def _load_domain_dict(self) -> List[Tuple[str, Optional[int], Optional[str]]]:
+        if not self.domain_dict:
+            return []
+        try:
+            entries = parse_dictionary(self.domain_dict)
+        except OSError as e:
+            logger.warning(f"⚠️  Failed to read domain dictionary {self.domain_dict}: {e}")
+            return []
+        for word, _, _ in entries:
+            if HAN_PATTERN.fullmatch(word):
+                self._han_terms.add(word)
+                self._han_max = max(self._han_max, len(word))
+            else:
+                key = tuple(stem_english(w) for w in word.lower().split())
+                self._english_terms[key] = word
+                self._phrase_max = max(self._phrase_max, len(key))
+        return entries
+
+    def _load_jieba(self, entries):
+        """独立的 jieba Tokenizer: 前缀词典缓存放在 cache_dir, 领域词以 add_word 加入 (不修改全局 jieba)"""
+        try:
+            jieba.setLogLevel(logging.WARNING)
+            tokenizer = jieba.Tokenizer()
+            if self.cache_dir:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tokenizer.tmp_dir = self.cache_dir
+            tokenizer.initialize()
+            for word, freq, tag in entries:
+                if " " not in word:
+                    tokenizer.add_word(word, freq, tag)
+        except Exception as e:
+            logger.warning(f"⚠️  jieba initialization failed, using regex segmentation: {e}")
+            return
+        self.tokenizer = tokenizer
+
+        idf_file = os.path.join(os.path.dirname(jieba.__file__), "analyse", "idf.txt")
+        try:
+            idf = {}
+            with open(idf_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    word, _, value = line.strip().partition(" ")
+                    if value:
+                        idf[word] = float(value)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️  Failed to read jieba IDF table: {e}")
+            return
+        if idf:
+            values = sorted(idf.values())
+            self._base_idf = idf
+            self._base_scale = 1.0 / values[-1]
+            self._base_default = values[len(values) // 2] * self._base_scale
+
+    def _bootstrap_corpus_idf(self):
+        """语料 IDF 文件不存在时, 由分析结果缓存中的转写重建"""
+        if not self.idf_path or os.path.exists(self.idf_path):
+            return
+        if self.bootstrap_dir and os.path.isdir(self.bootstrap_dir):
+            documents = self.add_documents(iter_cached_transcripts(self.bootstrap_dir))
+            if documents:
+                logger.info(f"Built corpus IDF from {documents} stored transcripts in {self.bootstrap_dir}")
+                self.save()
+
+    # ---- 分词 ----
+
+    def tokenize(self, text: str) -> List[Tuple[str, str]]:
+        """文本 -> [(词, 输出写法)], 已去除停用词、单字与纯数字; 英文词为小写词干形式"""
+        self._ensure_loaded()
+        terms: List[Tuple[str, str]] = []
+        words: List[str] = []
+        for match in TOKEN_PATTERN.finditer(text):
+            han, word, space = match.group(1), match.group(2), match.group(3)
+            if word is not None:
+                words.append(word)
+                continue
+            if space is not None:
+                continue
+            if words:
+                self._english(words, terms)
+                words = []
+            if han is not None:
+                self._chinese(han, terms)
+        if words:
+            self._english(words, terms)
+        return terms
+
+    def _english(self, words: List[str], terms: List[Tuple[str, str]]):
+        """一段以空白分隔的英文单词: 领域短语最长匹配, 其余逐词过滤"""
+        domain = self._english_terms
+        lowered = [w.lower().replace("’", "'") for w in words]
+        stems = [stem_english(w[:-2] if w.endswith("'s") else w) for w in lowered]
+        i = 0
+        while i < len(stems):
+            for size in range(min(self._phrase_max, len(stems) - i), 0, -1):
+                key = tuple(stems[i:i + size])
+                if key in domain:
+                    terms.append((" ".join(key), domain[key]))
+                    i += size
+                    break
+            else:
+                word, stem = lowered[i], stems[i]
+                if word not in ENGLISH_STOP_WORDS and stem not in ENGLISH_STOP_WORDS \
+                        and len(stem) >= 3 and not stem.isdigit():
+                    terms.append((stem, stem))
+                i += 1
+
+    def _chinese(self, run: str, terms: List[Tuple[str, str]]):
+        if self.tokenizer is not None:
+            pieces = self.tokenizer.cut(run, HMM=True)
+        else:
+            pieces = self._split_domain(run)
+        for piece in pieces:
+            if len(piece) >= 2 and piece not in CHINESE_STOP_WORDS:
+                terms.append((piece, piece))
+
+    def _split_domain(self, run: str) -> List[str]:
+        """无 jieba 时: 切出领域词 (正向最长匹配), 其余部分在常见虚词处断开"""
+        if not self._han_terms:
+            return FUNCTION_CHARS.split(run)
+        pieces, rest, i = [], 0, 0
+        while i < len(run):
+            for size in range(min(self._han_max, len(run) - i), 1, -1):
+                if run[i:i + size] in self._han_terms:
+                    if rest < i:
+                        pieces.extend(FUNCTION_CHARS.split(run[rest:i]))
+                    pieces.append(run[i:i + size])
+                    i += size
+                    rest = i
+                    break
+            else:
+                i += 1
+        if rest < len(run):
+            pieces.extend(FUNCTION_CHARS.split(run[rest:]))
+        return pieces
+
+    # ---- 打分 ----
+
+    def idf(self, term: str, corpus: Optional[Tuple[int, Counter]] = None) -> float:
+        """归一化到 [0, 1] 的 IDF: 通用 IDF 与语料 IDF (默认为当前快照) 按 N / (N + prior_docs) 加权"""
+        base = self._base_idf.get(term)
+        if base is not None:
+            base *= self._base_scale
+        else:
+            # 通用 IDF 表外的领域词视为罕见词
+            base = 1.0 if term in self._han_terms or " " in term or (term,) in self._english_terms else self._base_default
+        documents, df = corpus or self._corpus
+        if not documents:
+            return base
+        corpus = (math.log((1 + documents) / (1 + df.get(term, 0))) + 1) / (math.log(1 + documents) + 1)
+        weight = documents / (documents + self.prior_docs)
+        return weight * corpus + (1 - weight) * base
+
+    def extract(self, text: str, top_k: int = 4) -> List[str]:
+        """TF-IDF 得分最高的 top_k 个关键词 (得分相同时按首次出现顺序)"""
+        if not text:
+            return []
+        counts: Dict[str, int] = {}
+        display: Dict[str, str] = {}
+        for term, shown in self.tokenize(text):
+            counts[term] = counts.get(term, 0) + 1
+            display.setdefault(term, shown)
+        corpus = self._corpus  # 同一次提取只使用一个快照
+        ranked = sorted(counts, key=lambda term: -counts[term] * self.idf(term, corpus))
+        return [display[term] for term in ranked[:top_k]]
+
+    # ---- 语料 IDF ----
+
+    def observe(self, text: str):
+        """
+        把一篇新的反馈转写交给后台线程计入语料文档频率 (不阻塞, 可在事件循环中调用)
+
+        分词与保存 (每 save_every 篇一次, 含文件锁) 都在后台线程中进行; 不改变当前打分快照
+        """
+        if not text or not self.idf_path:
+            return
+        try:
+            self._observer_queue().put_nowait(text)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _observer_queue(self) -> queue.Queue:
+        with self._lock:
+            if self._worker_pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.observe_queue)
+                self._worker = threading.Thread(target=self._observe_loop, args=(self._queue,), name="keyword-corpus", daemon=True)
+                self._worker_pid = os.getpid()
+                self._worker.start()
+            return self._queue
+
+    def _observe_loop(self, texts: queue.Queue):
+        while True:
+            text = texts.get()
+            try:
+                if text is None:
+                    return
+                self.add_documents([text])
+                with self._lock:
+                    due = self._pending_documents >= self.save_every
+                if due:
+                    self.save()
+            except Exception as e:
+                logger.warning(f"⚠️  Failed to add transcript to corpus IDF: {e}")
+            finally:
+                texts.task_done()
+
+    def flush(self, timeout: Optional[float] = None):
+        """等待后台线程处理完已提交的转写 (最多 timeout 秒), 然后保存 (阻塞, 关闭时调用)"""
+        with self._lock:
+            texts = self._queue if self._worker_pid == os.getpid() else None
+        if texts is not None:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while texts.unfinished_tasks and (deadline is None or time.monotonic() < deadline):
+                time.sleep(0.01)
+        self.save()
+
+    def add_documents(self, texts: Iterable[str]) -> int:
+        """批量计入待保存的文档频率 (阻塞, 不改变打分快照), 返回计入的文档数"""
+        documents = 0
+        df: Counter = Counter()
+        for text in texts:
+            if text:
+                df.update({term for term, _ in self.tokenize(text)})
+                documents += 1
+        if documents:
+            with self._lock:
+                self._pending_documents += documents
+                self._pending_df.update(df)
+                self.observed += documents
+        return documents
+
+    def save(self):
+        """在文件锁内与磁盘上的计数合并后写入 (阻塞; 不改变打分快照, 新计数在下次 reload_idf 时生效)"""
+        if not self.idf_path:
+            return
+        with self._lock:
+            pending_documents, pending_df = self._pending_documents, self._pending_df
+            if not pending_documents:
+                return
+            self._pending_documents, self._pending_df = 0, Counter()
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.idf_path)), exist_ok=True)
+            with self._file_lock():
+                documents, df = self._read_idf_file() or (0, Counter())
+                documents += pending_documents
+                df.update(pending_df)
+                tmp_path = f"{self.idf_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"documents": documents, "df": df}, f, ensure_ascii=False)
+                os.replace(tmp_path, self.idf_path)
+        except OSError as e:
+            logger.warning(f"⚠️  Failed to save corpus IDF: {e}")
+            with self._lock:
+                self._pending_documents += pending_documents
+                self._pending_df.update(pending_df)
+
+    @contextmanager
+    def _file_lock(self):
+        with open(f"{self.idf_path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_idf_file(self) -> Optional[Tuple[int, Counter]]:
+        """读取语料 IDF 文件; 不存在或损坏时返回 None"""
+        try:
+            with open(self.idf_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            return int(state["documents"]), Counter(state["df"])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"⚠️  Ignoring corrupt corpus IDF file {self.idf_path}: {e}")
+            return None
+
+    def _ensure_loaded(self):
+        if not self.loaded:
+            # 未预加载 (如直接使用 EmotionAnalyzer) 时在第一次调用中加载
+            self.load()
+
+    def stats(self) -> Dict[str, Any]:
+        documents, df = self._corpus
+        return {
+            "loaded": self.loaded,
+            "load_ms": self.load_ms,
+            "jieba": self.tokenizer is not None,
+            "domain_terms": len(self._english_terms) + len(self._han_terms),
+            "corpus_documents": documents,
+            "corpus_terms": len(df),
+            "corpus_weight": round(documents / (documents + self.prior_docs), 3),
+            "version": self.version,
+            "observed": self.observed,
+            "pending": self._pending_documents,
+            "dropped": self.dropped,
+        }
+
+
+def iter_cached_transcripts(cache_dir: str):
+    """遍历分析结果缓存 (result_cache.py) 中的转写, 同一转写只返回一次"""
+    seen = set()
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(root, name), "r", encoding="utf-8") as f:
+                    transcript = json.load(f)["result"]["transcript"]
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            if transcript and transcript not in seen:
+                seen.add(transcript)
+                yield transcript
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="由已存储的反馈转写重建语料 IDF")
+    parser.add_argument("--from-cache", help="分析结果缓存目录 (ANALYSIS_CACHE_DIR)")
+    parser.add_argument("--from-text", help="每行一条转写的文本文件")
+    parser.add_argument("--out", required=True, help="语料 IDF 文件 (KEYWORDS_IDF_PATH)")
+    parser.add_argument("--domain-dict", default=DEFAULT_DOMAIN_DICT)
+    parser.add_argument("--cache-dir", default="cache/keywords")
+    args = parser.parse_args()
+
+    if os.path.exists(args.out):
+        os.remove(args.out)
+    engine = KeywordEngine(args.domain_dict or None, args.cache_dir, args.out).load()
+    if args.from_cache:
+        engine.add_documents(iter_cached_transcripts(args.from_cache))
+    if args.from_text:
+        with open(args.from_text, "r", encoding="utf-8") as f:
+            engine.add_documents(line.strip() for line in f)
+    engine.save()
+    print(json.dumps(engine.stats(), indent=2))
@@ -0,0 +1,170 @@
+# long_audio.py - 长音频分窗分析
+"""
+长录音 (活动演讲等) 按固定窗口逐段解码、逐段分析, 内存占用只与窗口长度有关
+
+- 窗口长度与 VAD 的 max_single_segment_time 对齐 (默认 30 秒), 每个窗口一次 SenseVoice 推理
+- 窗口边界选在窗口末尾搜索区间内能量最低的帧, 尽量不切断语音
+- 每个窗口产出一段结果 (文本 / 情感 / 事件), 全部结束后对拼接的原始输出做一次整体解析,
+  与 VAD 多段合并后的 /analyze 结果口径一致; 整体时间线的每段标注其所在窗口的时间范围
+"""
+
+import logging
+import threading
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from audio_frontend import TARGET_SAMPLE_RATE, stream_decode
+from ingest import AudioTooLongError
+from metrics import stage_timer
+from silence_gate import SpeechTooShortError, frame_energy_db
+from tag_parser import annotate_spans
+
+logger = logging.getLogger(__name__)
+
+
+def split_windows(
+    blocks: Iterator[np.ndarray],
+    window_samples: int,
+    search_samples: int,
+    frame_size: int = 320
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    把解码块重新切分为窗口, 产出 (起始采样点, 窗口音频)
+
+    每个窗口在最后 search_samples 个采样内能量最低的帧处截断, 剩余部分并入下一个窗口;
+    缓冲区最多保留一个窗口加一个解码块
+    """
+    buffer = np.empty(0, dtype=np.float32)
+    offset = 0
+    for block in blocks:
+        buffer = np.concatenate([buffer, block]) if len(buffer) else block
+        while len(buffer) >= window_samples:
+            cut = _quiet_cut(buffer[:window_samples], search_samples, frame_size)
+            yield offset, buffer[:cut]
+            offset += cut
+            buffer = buffer[cut:]
+    if len(buffer):
+        yield offset, buffer
+
+
+def _quiet_cut(window: np.ndarray, search_samples: int, frame_size: int) -> int:
+    """窗口末尾 search_samples 内能量最低帧的起点; 搜索区间不足一帧时在窗口末尾截断"""
+    search_samples = min(search_samples, len(window) - frame_size)
+    if search_samples < frame_size:
+        return len(window)
+    start = len(window) - search_samples
+    quietest = int(np.argmin(frame_energy_db(window[start:], frame_size)))
+    return max(frame_size, start + quietest * frame_size)
+
+
+class LongAudioAnalysis:
+    """
+    单个长音频的分窗分析状态
+
+    next_segment 为阻塞调用 (解码 + 推理), 由调用方逐次提交到推理线程池,
+    每个窗口单独排队, 长音频不会长时间独占推理线程
+    """
+
+    def __init__(
+        self,
+        analyzer,
+        file: BinaryIO,
+        window_s: Optional[float] = None,
+        search_s: float = 2.0,
+        max_duration_s: Optional[float] = None,
+        on_close: Optional[Callable[[], None]] = None
+    ):
+        self.analyzer = analyzer
+        self.window_s = window_s or analyzer.MAX_SEGMENT_MS / 1000
+        self.max_duration_s = max_duration_s
+        self.on_close = on_close
+        self._blocks = stream_decode(file, block_seconds=self.window_s)
+        self._windows = split_windows(
+            self._blocks,
+            window_samples=int(self.window_s * TARGET_SAMPLE_RATE),
+            search_samples=int(search_s * TARGET_SAMPLE_RATE)
+        )
+        self._raw_texts: List[str] = []
+        self._spans: List[Tuple[float, float, int]] = []  # 每个已分析窗口的 (start_s, end_s, 段数)
+        self._index = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self.duration_s = 0.0
+        self.skipped_s = 0.0
+
+    def next_segment(self, timings: Optional[Dict[str, float]] = None) -> Optional[Dict[str, Any]]:
+        """
+        解码并分析下一个窗口 (阻塞)
+
+        返回:
+            {"index", "start_s", "end_s", "emotion", "intensity", "events", "text", "language"};
+            静音窗口为 {"index", "start_s", "end_s", "skipped": "silence"}; 全部处理完返回 None
+        """
+        with self._lock:
+            try:
+                if self._closed:
+                    return None
+                with stage_timer(timings, "decode"):
+                    item = next(self._windows, None)
+                if item is None:
+                    return None
+                start, window = item
+                start_s = start / TARGET_SAMPLE_RATE
+                end_s = (start + len(window)) / TARGET_SAMPLE_RATE
+                self.duration_s = end_s
+                if self.max_duration_s and end_s > self.max_duration_s:
+                    raise AudioTooLongError(f"Audio longer than {self.max_duration_s:.0f}s")
+
+                segment = {"index": self._index, "start_s": round(start_s, 2), "end_s": round(end_s, 2)}
+                self._index += 1
+                gate = getattr(self.analyzer, "silence_gate", None)
+                if gate is not None:
+                    try:
+                        window = gate.apply(window).audio
+                    except SpeechTooShortError:
+                        self.skipped_s += end_s - start_s
+                        segment["skipped"] = "silence"
+                        return segment
+
+                result = self.analyzer.analyze_array(window, timings)
+                self._raw_texts.append(result["full_result"])
+                self._spans.append((start_s, end_s, len(result["timeline"])))
+                segment.update({
+                    "emotion": result["emotion"],
+                    "intensity": float(result["intensity"]),
+                    "events": result["events"],
+                    "text": result["raw_text"],
+                    "language": result["language"]
+                })
+                return segment
+            finally:
+                if self._closed:
+                    self._close_windows()
+
+    @property
+    def segments(self) -> int:
+        """已产出的窗口数"""
+        return self._index
+
+    def aggregate(self, timings: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """整段音频的结果 (格式同 EmotionAnalyzer.analyze); 时间线的 start_s / end_s 为所在窗口的范围"""
+        result = self.analyzer._parse_result("".join(self._raw_texts), timings)
+        annotate_spans(result["timeline"], self._spans)
+        return result
+
+    def _close_windows(self):
+        self._windows.close()
+        self._blocks.close()
+        if self.on_close is not None:
+            self.on_close()
+            self.on_close = None
+
+    def close(self):
+        """结束分析并释放解码器; 若窗口正在另一线程中处理, 由该线程处理完后释放"""
+        self._closed = True
+        if self._lock.acquire(blocking=False):
+            try:
+                self._close_windows()
+            finally:
+                self._lock.release()
@@ -0,0 +1,131 @@
+# model_loader.py - 后台并行加载模型
+"""
+在后台线程中并行加载各个模型, 并用合成音频做一次预热推理
+
+- 服务启动不再被模型加载阻塞, /livez 立即可用
+- 模型只有在预热完成后才对外可见 (on_ready 回调), /readyz 据此决定是否接收流量,
+  避免滚动发布时冷实例上的首批请求承担数秒的首次推理开销
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+
+def synthetic_clip(seconds: float = 1.0, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """预热用的合成音频: 带谐波的 220Hz 音调 + 低幅噪声 (float32, 16kHz 单声道)"""
+    t = np.arange(int(seconds * sample_rate), dtype=np.float32) / sample_rate
+    tone = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.1 * np.sin(2 * np.pi * 440 * t)
+    noise = np.random.default_rng(0).normal(0, 0.01, t.shape)
+    return (tone + noise).astype(np.float32)
+
+
+class ModelSlot:
+    """单个模型的加载状态"""
+
+    # pending -> loading -> warming -> ready / failed
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        warm_up: Optional[Callable[[Any], Any]] = None,
+        on_ready: Optional[Callable[[Any], None]] = None,
+        required: bool = True
+    ):
+        self.name = name
+        self.factory = factory
+        self.warm_up = warm_up
+        self.on_ready = on_ready
+        self.required = required
+        self.state = "pending"
+        self.instance = None
+        self.error: Optional[str] = None
+        self.load_ms: Optional[float] = None
+        self.warmup_ms: Optional[float] = None
+
+    def run(self):
+        """加载 + 预热 (阻塞, 在线程中执行)"""
+        try:
+            self.state = "loading"
+            start = time.perf_counter()
+            instance = self.factory()
+            self.load_ms = round((time.perf_counter() - start) * 1000, 1)
+
+            if self.warm_up is not None:
+                self.state = "warming"
+                start = time.perf_counter()
+                self.warm_up(instance)
+                self.warmup_ms = round((time.perf_counter() - start) * 1000, 1)
+
+            self.instance = instance
+            if self.on_ready is not None:
+                self.on_ready(instance)
+            self.state = "ready"
+            logger.info(f"✅ Model '{self.name}' ready (load {self.load_ms} ms, warm-up {self.warmup_ms} ms)")
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            logger.error(f"❌ Failed to load model '{self.name}': {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "required": self.required,
+            "load_ms": self.load_ms,
+            "warmup_ms": self.warmup_ms,
+            "error": self.error,
+        }
+
+
+class ModelLoader:
+    """并行加载一组模型并跟踪就绪状态"""
+
+    def __init__(self):
+        self.slots: Dict[str, ModelSlot] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def add(self, name: str, factory, warm_up=None, on_ready=None, required: bool = True) -> ModelSlot:
+        slot = ModelSlot(name, factory, warm_up, on_ready, required)
+        self.slots[name] = slot
+        return slot
+
+    async def load_all(self):
+        """在默认线程池中并行加载全部模型, 全部结束 (成功或失败) 后返回"""
+        self.started_at = time.time()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(None, slot.run) for slot in self.slots.values()))
+        self.finished_at = time.time()
+
+    def load_all_blocking(self):
+        """同 load_all, 但不需要事件循环; 加载线程全部结束后返回 (pre-fork 父进程中 fork 前使用)"""
+        self.started_at = time.time()
+        threads = [threading.Thread(target=slot.run, name=f"load-{name}") for name, slot in self.slots.items()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.finished_at = time.time()
+
+    @property
+    def ready(self) -> bool:
+        """所有必需模型均已预热完成"""
+        return all(slot.state == "ready" for slot in self.slots.values() if slot.required)
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    def failed(self) -> List[str]:
+        return [name for name, slot in self.slots.items() if slot.state == "failed"]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: slot.stats() for name, slot in self.slots.items()}
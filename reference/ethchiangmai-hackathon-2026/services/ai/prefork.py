@@ -0,0 +1,166 @@
+# prefork.py - 多进程 (pre-fork) 服务模式
+"""
+父进程加载一次模型后 fork 出 N 个 uvicorn 工作进程, 共享同一个监听 socket
+
+- 模型权重在 fork 后以写时复制 (copy-on-write) 方式共享, 不会有 N 份 SenseVoice 权重;
+  fork 前 gc.freeze(), 避免垃圾回收遍历对象时写脏共享页
+- 父进程只用单线程做加载与预热: OpenMP 线程池不能跨 fork 使用,
+  每个工作进程按自己分到的 CPU 设置亲和性与 torch 线程数后再创建线程池
+- 推理线程池、微批处理线程、签名进程等在各工作进程的 startup 中创建 (fork 之后)
+- 父进程只负责监控: 工作进程异常退出时重启, 收到 SIGTERM/SIGINT 时通知全部工作进程退出
+
+注意: /metrics 与内存缓存按进程统计, 抓取到的是处理该请求的工作进程;
+声纹库与委员会成员列表 (COMMITTEE_REGISTRY_PATH) 通过文件 + flock 在工作进程间共享,
+未设置 COMMITTEE_REGISTRY_PATH 时禁止通过 API 变更委员会成员
+"""
+
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Callable, Dict, List, Optional
+
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+
+def partition_cpus(workers: int, cpus: Optional[List[int]] = None) -> List[List[int]]:
+    """
+    把可用 CPU 平均分给各工作进程
+
+    CPU 少于工作进程数时, 多个进程共享同一个 CPU
+    """
+    if cpus is None:
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    if workers <= len(cpus):
+        per_worker = len(cpus) // workers
+        return [cpus[i * per_worker:(i + 1) * per_worker] for i in range(workers)]
+    return [[cpus[i % len(cpus)]] for i in range(workers)]
+
+
+def _configure_worker(index: int, cpus: List[int], threads: Optional[int]):
+    """工作进程: 绑定 CPU 并设置 torch 线程数"""
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError as e:
+            logger.warning(f"Worker {index}: failed to set CPU affinity: {e}")
+    threads = threads or len(cpus)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    logger.info(f"Worker {index} (pid {os.getpid()}): cpus={cpus}, torch threads={threads}")
+
+
+class PreforkServer:
+    """
+    pre-fork 服务
+
+    - app: ASGI 应用
+    - workers: 工作进程数
+    - threads_per_worker: 每个工作进程的 torch 线程数, 默认等于分到的 CPU 数
+    - preload: fork 前在父进程中执行 (加载并预热模型)
+    """
+
+    def __init__(
+        self,
+        app,
+        host: str = "0.0.0.0",
+        port: int = 8001,
+        workers: int = 2,
+        threads_per_worker: Optional[int] = None,
+        preload: Optional[Callable[[], None]] = None,
+        log_level: str = "info"
+    ):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.threads_per_worker = threads_per_worker
+        self.preload = preload
+        self.log_level = log_level
+        self.cpu_sets = partition_cpus(self.workers)
+        self._children: Dict[int, int] = {}  # pid -> worker index
+        self._stopping = False
+
+    def _bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn(self, index: int, sock: socket.socket):
+        pid = os.fork()
+        if pid:
+            self._children[pid] = index
+            return
+
+        # ---- 工作进程 ----
+        exit_code = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            _configure_worker(index, self.cpu_sets[index], self.threads_per_worker)
+            config = uvicorn.Config(self.app, log_level=self.log_level)
+            uvicorn.Server(config).run(sockets=[sock])
+        except BaseException as e:
+            logger.exception(f"Worker {index} crashed: {e}")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _stop(self, signum, _frame):
+        self._stopping = True
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        """加载模型, fork 工作进程并监控, 直到收到退出信号 (阻塞)"""
+        try:
+            import torch
+            torch.set_num_threads(1)
+        except ImportError:
+            pass
+
+        if self.preload:
+            start = time.perf_counter()
+            self.preload()
+            logger.info(f"Models preloaded in parent in {time.perf_counter() - start:.1f}s")
+
+        # 之后的对象视为永久存活, 垃圾回收不再遍历 (不写脏写时复制页)
+        gc.collect()
+        gc.freeze()
+
+        sock = self._bind()
+        logger.info(f"🚀 Pre-fork server on {self.host}:{self.port} with {self.workers} workers")
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for index in range(self.workers):
+            self._spawn(index, sock)
+
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            index = self._children.pop(pid, None)
+            if index is None or self._stopping:
+                continue
+            logger.warning(f"⚠️  Worker {index} (pid {pid}) exited with status {status}, restarting")
+            time.sleep(1)
+            self._spawn(index, sock)
+
+        sock.close()
+        logger.info("Pre-fork server stopped")
@@ -0,0 +1,129 @@
+# quantization.py - CPU 推理优化 (int8 动态量化 / 编译)
+"""
+对 funasr AutoModel 加载的 SenseVoice / CAM++ 模块做 CPU 推理优化 (可选开启)
+
+- int8 动态量化: nn.Linear 权重离线量化为 int8, 激活在运行时按批量化;
+  无需校准数据, 对 Transformer/SAN-M 类编码器通常能降低约 2~4 倍 Linear 权重内存并加速矩阵乘
+- 编译: torch.compile (PyTorch 2.x) 或 TorchScript; 仅作用于编码器子模块,
+  失败时保留 eager 模式并记录原因
+
+精度影响用 benchmarks/bench_quantization.py 在参考音频上评估 (情感一致率 / 声纹余弦漂移)
+"""
+
+import io
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import torch
+import torch.nn as nn
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_MODES = ("none", "int8")
+COMPILE_MODES = ("none", "compile", "script")
+
+
+def model_size_bytes(module: nn.Module) -> int:
+    """序列化后的 state_dict 大小 (量化后的打包权重也计算在内)"""
+    buffer = io.BytesIO()
+    torch.save(module.state_dict(), buffer)
+    return buffer.tell()
+
+
+def _select_quantized_engine():
+    """x86 使用 fbgemm, ARM 等平台回退到 qnnpack"""
+    engines = torch.backends.quantized.supported_engines
+    if torch.backends.quantized.engine in ("fbgemm", "x86", "qnnpack"):
+        return
+    for engine in ("x86", "fbgemm", "qnnpack"):
+        if engine in engines:
+            torch.backends.quantized.engine = engine
+            return
+
+
+def quantize_dynamic_int8(module: nn.Module) -> nn.Module:
+    """nn.Linear -> 动态量化 int8 Linear (返回新模块, 原模块不变)"""
+    _select_quantized_engine()
+    quantization = getattr(torch, "ao", torch).quantization
+    return quantization.quantize_dynamic(module, {nn.Linear}, dtype=torch.qint8)
+
+
+def compile_module(module: nn.Module, mode: str) -> nn.Module:
+    """
+    编译子模块
+
+    参数:
+        mode: "compile" (torch.compile, 动态形状) 或 "script" (TorchScript)
+    """
+    if mode == "compile":
+        if not hasattr(torch, "compile"):
+            raise RuntimeError("torch.compile requires PyTorch 2.x")
+        return torch.compile(module, dynamic=True)
+    if mode == "script":
+        return torch.jit.script(module)
+    raise ValueError(f"Unknown compile mode: {mode} (choose from {', '.join(COMPILE_MODES)})")
+
+
+def optimize_auto_model(
+    auto_model: Any,
+    quantization: str = "none",
+    compile_mode: str = "none",
+    name: str = "model"
+) -> Dict[str, Any]:
+    """
+    优化 funasr AutoModel 中的主模型 (auto_model.model), 原地替换
+
+    VAD 模型 (fsmn) 很小且对端点精度敏感, 保持不变
+
+    返回:
+        报告: {"quantization", "compile", "size_before_mb", "size_after_mb", "quantized_linear", "seconds", "compile_error"}
+    """
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization mode: {quantization} (choose from {', '.join(QUANTIZATION_MODES)})")
+
+    start = time.perf_counter()
+    model = auto_model.model
+    report: Dict[str, Any] = {
+        "quantization": quantization,
+        "compile": compile_mode,
+        "size_before_mb": round(model_size_bytes(model) / 1e6, 1),
+    }
+
+    if quantization == "int8":
+        linear_count = sum(1 for m in model.modules() if isinstance(m, nn.Linear))
+        model = quantize_dynamic_int8(model.eval())
+        report["quantized_linear"] = linear_count
+
+    if compile_mode != "none":
+        # 只编译编码器: 解码/后处理含 Python 控制流, 编译收益小且容易失败
+        target = "encoder" if hasattr(model, "encoder") else None
+        try:
+            if target:
+                setattr(model, target, compile_module(getattr(model, target), compile_mode))
+            else:
+                model = compile_module(model, compile_mode)
+        except Exception as e:
+            logger.warning(f"⚠️  {name}: {compile_mode} failed, keeping eager mode: {e}")
+            report["compile"] = "none"
+            report["compile_error"] = str(e)
+
+    auto_model.model = model
+    report["size_after_mb"] = round(model_size_bytes(model) / 1e6, 1)
+    report["seconds"] = round(time.perf_counter() - start, 2)
+    logger.info(
+        f"{name}: quantization={report['quantization']}, compile={report['compile']}, "
+        f"{report['size_before_mb']} MB -> {report['size_after_mb']} MB"
+    )
+    return report
+
+
+def apply_inference_mode(
+    auto_model: Any,
+    mode: Optional[Dict[str, str]],
+    name: str = "model"
+) -> Optional[Dict[str, Any]]:
+    """按配置优化模型; 两项均为 none 时不做任何处理并返回 None"""
+    if not mode or (mode["quantization"] == "none" and mode["compile"] == "none"):
+        return None
+    return optimize_auto_model(auto_model, mode["quantization"], mode["compile"], name=name)
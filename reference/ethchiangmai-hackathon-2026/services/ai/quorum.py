@@ -0,0 +1,204 @@
+# quorum.py - 多验证者并行签名
+"""
+加载 N 个验证者私钥 (VALIDATOR_{i}_SK), 对同一消息并行签名并聚合
+
+- py_ecc 签名是持有 GIL 的纯 Python 计算, 因此每个验证者在独立的工作进程中签名,
+  墙钟延迟约等于单次签名, 基本不随验证者数量增长
+- 私钥在进程池初始化时传入子进程一次, 之后每次只传消息与验证者序号
+- 原生后端 (blspy/milagro) 单次签名约 1ms, 进程间通信反而更慢, 此时在当前线程依次签名
+"""
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+from bls_backends import get_backend
+from committee import CommitteeRegistry, encode_bitmap
+
+logger = logging.getLogger(__name__)
+
+
+class QuorumError(RuntimeError):
+    """成功签名的验证者数量不足阈值"""
+
+
+def load_validator_keys(count: Optional[int] = None) -> List[int]:
+    """
+    从环境变量读取验证者私钥 VALIDATOR_1_SK, VALIDATOR_2_SK, ...
+
+    参数:
+        count: 需要的验证者数量; None 表示读取到第一个缺失的序号为止
+
+    返回:
+        私钥整数列表 (环境变量中为十进制字符串)
+    """
+    keys = []
+    i = 1
+    while count is None or len(keys) < count:
+        value = os.getenv(f"VALIDATOR_{i}_SK")
+        if not value:
+            if count is not None:
+                raise ValueError(f"VALIDATOR_{i}_SK not found ({count} validators requested)")
+            break
+        keys.append(int(value))
+        i += 1
+    return keys
+
+
+# ---- 工作进程 ----
+
+_worker_keys: List[int] = []
+_worker_backend = None
+
+
+def _init_worker(secret_keys: List[int], backend_name: str):
+    global _worker_keys, _worker_backend
+    _worker_keys = secret_keys
+    _worker_backend = get_backend(backend_name)
+
+
+def _sign_in_worker(index: int, message: bytes) -> bytes:
+    return _worker_backend.sign(_worker_keys[index], message)
+
+
+def _prove_in_worker(index: int) -> bytes:
+    return _worker_backend.pop_prove(_worker_keys[index])
+
+
+class QuorumSigner:
+    """
+    验证者委员会签名器
+
+    - secret_keys: 各验证者私钥, 顺序即签名者位图顺序
+    - threshold: 最少成功签名数, 默认全部验证者
+    - processes: 工作进程数, 默认 min(验证者数, CPU 数); 0 表示不使用进程池
+    """
+
+    def __init__(
+        self,
+        secret_keys: Sequence[int],
+        threshold: Optional[int] = None,
+        backend: Optional[str] = None,
+        processes: Optional[int] = None
+    ):
+        if not secret_keys:
+            raise ValueError("QuorumSigner needs at least one validator key")
+        self.backend = get_backend(backend)
+        self._secret_keys = list(secret_keys)
+        self.public_keys = [self.backend.sk_to_pk(sk) for sk in self._secret_keys]
+        self.aggregate_public_key = self.backend.aggregate_pubkeys(self.public_keys)
+        self._registry: Optional[CommitteeRegistry] = None
+        self._committee_id: Optional[str] = None
+        self.threshold = threshold or len(self._secret_keys)
+        if not 1 <= self.threshold <= len(self._secret_keys):
+            raise ValueError(f"Quorum threshold must be between 1 and {len(self._secret_keys)}")
+
+        if processes is None:
+            processes = min(len(self._secret_keys), os.cpu_count() or 1) if self.backend.name == "py_ecc" else 0
+        self._pool = None
+        if processes > 0:
+            # fork 启动方式下首次提交即一次性启动全部工作进程; 应在加载模型、启动推理线程之前调用 warm_up
+            methods = multiprocessing.get_all_start_methods()
+            self._pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context("fork" if "fork" in methods else "spawn"),
+                initializer=_init_worker,
+                initargs=(self._secret_keys, self.backend.name)
+            )
+
+        logger.info(
+            f"Quorum signer: {len(self._secret_keys)} validators, threshold {self.threshold}, "
+            f"{processes or 'no'} signing processes (backend: {self.backend.name})"
+        )
+
+    def __len__(self) -> int:
+        return len(self._secret_keys)
+
+    def warm_up(self):
+        """启动全部工作进程, 避免首个请求承担启动开销"""
+        if self._pool:
+            list(self._pool.map(_sign_in_worker, range(len(self)), [b"warm-up"] * len(self)))
+
+    def _run(self, fn, *args_per_index) -> List[Optional[bytes]]:
+        """对每个验证者执行 fn(index, ...); 单个验证者失败时对应结果为 None"""
+        indices = range(len(self))
+        if self._pool:
+            futures = [self._pool.submit(fn, i, *(args[i] for args in args_per_index)) for i in indices]
+            outputs = []
+            for i, future in enumerate(futures):
+                try:
+                    outputs.append(future.result())
+                except Exception as e:
+                    logger.error(f"Validator {i + 1} failed: {e}")
+                    outputs.append(None)
+            return outputs
+
+        _init_worker(self._secret_keys, self.backend.name)
+        outputs = []
+        for i in indices:
+            try:
+                outputs.append(fn(i, *(args[i] for args in args_per_index)))
+            except Exception as e:
+                logger.error(f"Validator {i + 1} failed: {e}")
+                outputs.append(None)
+        return outputs
+
+    def sign(self, message: bytes) -> Dict:
+        """
+        全部验证者并行签名并聚合
+
+        已通过 register 加入委员会时, 位图按委员会中的成员位置编码 (可直接用于 verify_quorum),
+        已从委员会移除的验证者的签名不计入; 否则按验证者顺序编码
+
+        返回:
+            {
+                "signature": 聚合签名,
+                "signer_bitmap": 参与签名的验证者 (committee.encode_bitmap 格式),
+                "signers": 签名人数,
+                "aggregate_public_key": 实际签名者的聚合公钥,
+                "committee_public_key": 全体验证者的聚合公钥
+            }
+        """
+        signatures = self._run(_sign_in_worker, [message] * len(self))
+        signed = {pk: signature for pk, signature in zip(self.public_keys, signatures) if signature is not None}
+        if self._registry is not None:
+            slots = self._registry.members(self._committee_id)
+            for pk in set(signed) - set(slots):
+                logger.warning(f"Validator {pk.hex()[:16]}... is no longer in committee '{self._committee_id}'")
+                del signed[pk]
+            bitmap = [pk in signed for pk in slots]
+        else:
+            bitmap = [signature is not None for signature in signatures]
+        signers = len(signed)
+        if signers < self.threshold:
+            raise QuorumError(f"Only {signers}/{len(self)} validators signed (threshold {self.threshold})")
+
+        if signers == len(self):
+            aggregate_pk = self.aggregate_public_key
+        else:
+            aggregate_pk = self.backend.aggregate_pubkeys(list(signed))
+        return {
+            "signature": self.backend.aggregate(list(signed.values())),
+            "signer_bitmap": encode_bitmap(bitmap),
+            "signers": signers,
+            "aggregate_public_key": aggregate_pk,
+            "committee_public_key": self.aggregate_public_key
+        }
+
+    def register(self, registry: CommitteeRegistry, committee_id: str):
+        """
+        把全部验证者注册到委员会 (已是成员的跳过), 之后 sign 返回的位图按委员会中的位置编码;
+        PoP 同样并行生成
+        """
+        proofs = self._run(_prove_in_worker)
+        for public_key, proof in zip(self.public_keys, proofs):
+            if proof is None:
+                raise QuorumError("Failed to generate proof of possession")
+            registry.register(committee_id, public_key, proof, exist_ok=True)
+        self._registry, self._committee_id = registry, committee_id
+
+    def shutdown(self):
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,189 @@
+# realtime.py - 实时流式识别 (WebSocket)
+"""
+接收边录边传的 16kHz PCM 帧, 按能量做端点检测 (endpointing), 每句话结束即送入 SenseVoice
+
+- SenseVoice 不是流式模型: 按句切分后逐句推理, 一句话结束 (静音超过 end_silence_ms) 后
+  很快即可返回该句的文本与情感; 单句超过 max_segment_s 时强制切分
+- 可选的中间结果 (partial): 说话过程中按间隔对当前未结束的句子推理, 推理线程空闲时才执行
+- 只保留当前句子的音频, 内存与会话总时长无关; 全部 PCM 边接收边计算 SHA-256,
+  会话结束时对整体结果签名 (与 /analyze 一致的 audio_hash / result_hash 口径)
+"""
+
+import hashlib
+import logging
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from silence_gate import frame_energy_db
+from tag_parser import annotate_spans
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2  # pcm_s16le
+
+
+class Endpointer:
+    """
+    基于帧能量的端点检测
+
+    - threshold_db: 语音帧能量下限 (dBFS)
+    - end_silence_ms: 语音后连续静音超过该时长即结束一句
+    - max_segment_s: 单句最大时长, 与 VAD 的 max_single_segment_time 对齐
+    - min_speech_ms: 语音帧总时长低于该值的句子丢弃 (咳嗽、碰麦等)
+    - pad_ms: 句首保留的前导音频
+    """
+
+    def __init__(
+        self,
+        threshold_db: float = -45.0,
+        end_silence_ms: float = 600.0,
+        max_segment_s: float = 30.0,
+        min_speech_ms: float = 200.0,
+        pad_ms: float = 200.0,
+        frame_ms: float = 20.0
+    ):
+        self.threshold_db = threshold_db
+        self.frame_size = int(SAMPLE_RATE * frame_ms / 1000)
+        self.end_silence_frames = max(1, int(end_silence_ms / frame_ms))
+        self.max_segment_frames = max(1, int(max_segment_s * 1000 / frame_ms))
+        self.min_speech_frames = int(min_speech_ms / frame_ms)
+        self.pad_frames = int(pad_ms / frame_ms)
+
+        self._pending = b""          # 不足一帧的字节
+        self._frames_seen = 0        # 已处理的帧数 (用于计算时间戳)
+        self._preroll: List[np.ndarray] = []
+        self._segment: List[np.ndarray] = []
+        self._segment_start = 0      # 当前句子的起始采样点
+        self._voiced = 0
+        self._silence_run = 0
+
+    @property
+    def in_speech(self) -> bool:
+        return bool(self._segment)
+
+    def current(self) -> Optional[Tuple[int, np.ndarray]]:
+        """当前未结束的句子 (起始采样点, 音频); 不在句子中时返回 None"""
+        if not self._segment:
+            return None
+        return self._segment_start, np.concatenate(self._segment)
+
+    def feed(self, data: bytes) -> List[Tuple[int, np.ndarray]]:
+        """
+        送入 PCM 字节, 返回本次结束的句子 [(起始采样点, float32 音频), ...]
+        """
+        data = self._pending + data
+        usable = len(data) - len(data) % (self.frame_size * BYTES_PER_SAMPLE)
+        self._pending = data[usable:]
+        if not usable:
+            return []
+
+        samples = np.frombuffer(data, dtype="<i2", count=usable // BYTES_PER_SAMPLE).astype(np.float32) / 32768.0
+        frames = samples.reshape(-1, self.frame_size)
+        voiced = frame_energy_db(samples, self.frame_size) > self.threshold_db
+
+        completed = []
+        for frame, is_voiced in zip(frames, voiced):
+            index = self._frames_seen
+            self._frames_seen += 1
+            if not self._segment:
+                if is_voiced:
+                    self._segment_start = (index - len(self._preroll)) * self.frame_size
+                    self._segment = self._preroll + [frame]
+                    self._preroll = []
+                    self._voiced = 1
+                    self._silence_run = 0
+                else:
+                    self._preroll.append(frame)
+                    if len(self._preroll) > self.pad_frames:
+                        self._preroll.pop(0)
+                continue
+
+            self._segment.append(frame)
+            if is_voiced:
+                self._voiced += 1
+                self._silence_run = 0
+            else:
+                self._silence_run += 1
+            if self._silence_run >= self.end_silence_frames or len(self._segment) >= self.max_segment_frames:
+                segment = self._finish()
+                if segment is not None:
+                    completed.append(segment)
+        return completed
+
+    def flush(self) -> Optional[Tuple[int, np.ndarray]]:
+        """结束输入, 返回最后一个未结束的句子"""
+        self._pending = b""
+        return self._finish() if self._segment else None
+
+    def _finish(self) -> Optional[Tuple[int, np.ndarray]]:
+        # 句尾只保留 pad 长度的静音
+        keep = len(self._segment) - max(0, self._silence_run - self.pad_frames)
+        frames, voiced = self._segment[:keep], self._voiced
+        start = self._segment_start
+        self._segment, self._voiced, self._silence_run = [], 0, 0
+        if voiced < self.min_speech_frames:
+            return None
+        return start, np.concatenate(frames)
+
+
+class RecognitionSession:
+    """单个 WebSocket 会话的状态: 端点检测、音频哈希、逐句结果"""
+
+    def __init__(self, endpointer: Endpointer, max_duration_s: Optional[float] = None):
+        self.endpointer = endpointer
+        self.max_duration_s = max_duration_s
+        self.hasher = hashlib.sha256()
+        self.received_bytes = 0
+        self.raw_texts: List[str] = []
+        self.spans: List[Tuple[float, float, int]] = []  # 每句的 (start_s, end_s, 解析出的段数)
+        self.segments = 0
+
+    @property
+    def duration_s(self) -> float:
+        return self.received_bytes / (SAMPLE_RATE * BYTES_PER_SAMPLE)
+
+    @property
+    def audio_hash(self) -> str:
+        return self.hasher.hexdigest()
+
+    def feed(self, data: bytes) -> List[Tuple[int, np.ndarray]]:
+        self.hasher.update(data)
+        self.received_bytes += len(data)
+        return self.endpointer.feed(data)
+
+    @property
+    def too_long(self) -> bool:
+        return bool(self.max_duration_s) and self.duration_s > self.max_duration_s
+
+    def analyze_segment(self, analyzer, start: int, audio: np.ndarray, final: bool = True) -> dict:
+        """
+        推理一句 (阻塞, 在推理线程池中调用)
+
+        final 为 False 时为中间结果, 不计入整体结果
+        """
+        result = analyzer.analyze_array(audio)
+        start_s, end_s = start / SAMPLE_RATE, (start + len(audio)) / SAMPLE_RATE
+        message = {
+            "type": "segment" if final else "partial",
+            "start_s": round(start_s, 2),
+            "end_s": round(end_s, 2),
+            "text": result["raw_text"],
+            "emotion": result["emotion"],
+            "intensity": float(result["intensity"]),
+            "events": result["events"],
+            "language": result["language"]
+        }
+        if final:
+            message["index"] = self.segments
+            self.segments += 1
+            self.raw_texts.append(result["full_result"])
+            self.spans.append((start_s, end_s, len(result["timeline"])))
+        return message
+
+    def aggregate(self, analyzer) -> dict:
+        """整个会话的结果 (格式同 EmotionAnalyzer.analyze); 时间线的 start_s / end_s 为所在句子的范围"""
+        result = analyzer._parse_result("".join(self.raw_texts))
+        annotate_spans(result["timeline"], self.spans)
+        return result
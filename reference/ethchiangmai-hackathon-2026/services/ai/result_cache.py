@@ -0,0 +1,179 @@
+# result_cache.py - 分析结果缓存
+"""
+以 audio_hash + 模型/算法版本为键的两级缓存: 内存 LRU + 磁盘持久化 (按总大小淘汰)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisCache:
+    """
+    两级分析结果缓存
+
+    - memory_entries: 内存 LRU 条目数, 0 表示关闭内存层
+    - disk_dir: 磁盘缓存目录, None 表示关闭磁盘层
+    - disk_max_bytes: 磁盘缓存总大小上限, 超出后按最近访问时间淘汰
+
+    缓存值为 {"result": result_json, "result_hash": "..."}, 签名相关字段从不缓存
+    """
+
+    def __init__(
+        self,
+        memory_entries: int = 1024,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 256 * 1024 * 1024
+    ):
+        self.memory_entries = max(0, memory_entries)
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._scan_disk())
+            logger.info(
+                f"Analysis cache: memory={self.memory_entries} entries, disk={self.disk_dir} "
+                f"({self._disk_bytes / 1e6:.1f}/{self.disk_max_bytes / 1e6:.0f} MB)"
+            )
+
+    @staticmethod
+    def make_key(audio_hash: str, version: str) -> str:
+        """缓存键: 版本变化(模型/算法/结果格式)后旧结果自动失效"""
+        return hashlib.sha256(f"{version}|{audio_hash}".encode("utf-8")).hexdigest()
+
+    def get(self, audio_hash: str, version: str) -> Optional[Dict[str, Any]]:
+        key = self.make_key(audio_hash, version)
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, entry)
+        return entry
+
+    def put(self, audio_hash: str, version: str, entry: Dict[str, Any]):
+        key = self.make_key(audio_hash, version)
+        with self._lock:
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        """写入内存 LRU (调用方持有锁)"""
+        if not self.memory_entries:
+            return
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    # ---- 磁盘层 ----
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.disk_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)  # 更新访问时间, 用于淘汰顺序
+            return entry
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Corrupt cache entry {key[:16]}: {e}")
+            return None
+
+    def _write_disk(self, key: str, entry: Dict[str, Any]):
+        if not self.disk_dir:
+            return
+        path = self._path(key)
+        data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write cache entry {key[:16]}: {e}")
+            return
+
+        with self._lock:
+            self._disk_bytes += len(data) - old_size
+            over_limit = self._disk_bytes > self.disk_max_bytes
+        if over_limit:
+            self._evict_disk()
+
+    def _scan_disk(self):
+        """遍历磁盘缓存, 生成 (path, size, mtime)"""
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _evict_disk(self):
+        """按最近访问时间淘汰, 直到总大小降到上限的 90%"""
+        target = int(self.disk_max_bytes * 0.9)
+        entries = sorted(self._scan_disk(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        with self._lock:
+            self._disk_bytes = total
+            self.evictions += removed
+        logger.info(f"Analysis cache evicted {removed} entries ({total / 1e6:.1f} MB left)")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
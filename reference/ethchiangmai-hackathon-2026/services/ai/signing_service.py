@@ -0,0 +1,151 @@
+# signing_service.py - 进程外 BLS 签名服务
+"""
+在独立的工作进程中执行 BLS 签名与验证
+
+- py_ecc 的签名/验证是持有 GIL 的纯 Python 计算; 放到子进程后不再阻塞 HTTP 进程的事件循环与推理线程,
+  一个请求签名的同时, 下一个请求可以继续解码和推理
+- 私钥只在子进程中从环境变量读取并解析, HTTP 进程不持有私钥对象
+- 环境变量不从 HTTP 进程中删除: spawn 启动方式下子进程在启动时才复制环境变量, 进程池重建或重启签名进程
+  也需要再次读取; 而删除 os.environ 中的条目并不能清除 /proc/<pid>/environ 中的原始环境,
+  对同一用户下的其他进程没有实际保护作用. 需要更强隔离时应通过密钥文件 / 密钥管理服务提供私钥
+- 异步接口: 并发请求直接排队到进程池 (流水线), 每个调用只需一次进程间往返
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from bls_backends import get_backend
+
+logger = logging.getLogger(__name__)
+
+
+# ---- 工作进程 ----
+
+_worker_sk: Optional[int] = None
+_worker_pk: Optional[bytes] = None
+_worker_backend = None
+
+
+def _init_worker(key_env: str, backend_name: Optional[str]):
+    global _worker_sk, _worker_pk, _worker_backend
+    _worker_backend = get_backend(backend_name)
+    value = os.environ.get(key_env)
+    if not value:
+        raise RuntimeError(f"{key_env} not set")
+    # 与 app.py 相同: 环境变量为十进制私钥
+    _worker_sk = int(value)
+    _worker_pk = _worker_backend.sk_to_pk(_worker_sk)
+
+
+def _worker_identity(_index: int = 0) -> Tuple[bytes, bytes, str]:
+    """(公钥, PoP, 后端名称)"""
+    return _worker_pk, _worker_backend.pop_prove(_worker_sk), _worker_backend.name
+
+
+def _worker_sign_and_verify(message: bytes) -> Tuple[bytes, bool, float, float]:
+    """签名并自检; 返回 (签名, 是否有效, 签名耗时, 验证耗时)"""
+    start = time.perf_counter()
+    signature = _worker_backend.sign(_worker_sk, message)
+    signed = time.perf_counter()
+    try:
+        is_valid = bool(_worker_backend.verify(_worker_pk, message, signature))
+    except Exception:
+        is_valid = False
+    return signature, is_valid, signed - start, time.perf_counter() - signed
+
+
+def _worker_verify(public_key: bytes, message: bytes, signature: bytes) -> bool:
+    try:
+        return bool(_worker_backend.verify(public_key, message, signature))
+    except Exception:
+        return False
+
+
+def _worker_batch_verify(items: List[Tuple[bytes, bytes, bytes]]) -> List[bool]:
+    try:
+        return _worker_backend.batch_verify(items)
+    except Exception as e:
+        logger.warning(f"Batch verification failed, verifying individually: {e}")
+        return _worker_backend._verify_each(items)
+
+
+class SigningService:
+    """
+    进程外签名器
+
+    - key_env: 私钥所在的环境变量
+    - processes: 签名进程数 (每个进程各持有一份私钥)
+    - backend: BLS 后端名称, 默认读取 BLS_BACKEND
+    """
+
+    def __init__(self, key_env: str = "VALIDATOR_1_SK", processes: int = 1, backend: Optional[str] = None):
+        self.key_env = key_env
+        self.processes = max(1, processes)
+        self._backend_name = backend
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+
+        self.public_key: Optional[bytes] = None
+        self.proof_of_possession: Optional[bytes] = None
+        self.backend_name: Optional[str] = None
+
+    def start(self):
+        """
+        启动签名进程并读取公钥 (阻塞)
+
+        fork 启动方式下首次提交即一次性启动全部进程, 因此应在加载模型、启动推理线程之前调用;
+        子进程在创建时从环境变量读取私钥 (环境变量保留, 以便 spawn 方式与重建进程池时再次读取)
+        """
+        methods = multiprocessing.get_all_start_methods()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("fork" if "fork" in methods else "spawn"),
+            initializer=_init_worker,
+            initargs=(self.key_env, self._backend_name)
+        )
+        identities = list(self._pool.map(_worker_identity, range(self.processes)))
+        self.public_key, self.proof_of_possession, self.backend_name = identities[0]
+        logger.info(
+            f"Signing service: {self.processes} processes, public key {self.public_key.hex()[:16]}... "
+            f"(backend: {self.backend_name})"
+        )
+
+    async def _submit(self, fn, *args):
+        if self._pool is None:
+            raise RuntimeError("Signing service not started")
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._in_flight += 1
+        try:
+            return await asyncio.wrap_future(self._pool.submit(fn, *args), loop=loop)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self.completed += 1
+
+    async def sign_and_verify(self, message: bytes) -> Tuple[bytes, bool, float, float]:
+        """签名并自检 (一次进程间往返); 返回 (签名, 是否有效, 签名秒数, 验证秒数)"""
+        return await self._submit(_worker_sign_and_verify, bytes(message))
+
+    async def verify(self, public_key: bytes, message: bytes, signature: bytes) -> bool:
+        return await self._submit(_worker_verify, bytes(public_key), bytes(message), bytes(signature))
+
+    async def batch_verify(self, items: Sequence[Tuple[bytes, bytes, bytes]]) -> List[bool]:
+        return await self._submit(_worker_batch_verify, [tuple(map(bytes, item)) for item in items])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"processes": self.processes, "in_flight": self._in_flight, "completed": self.completed}
+
+    def shutdown(self):
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
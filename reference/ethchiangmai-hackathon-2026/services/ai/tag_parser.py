@@ -0,0 +1,182 @@
+# tag_parser.py - SenseVoice 富文本标签解析
+"""
+SenseVoice 每个 VAD 段输出 "<|语言|><|情感|><|事件|><|itn|>文本", 多段直接拼接:
+
+    <|zh|><|HAPPY|><|Speech|><|withitn|>今天很开心。<|zh|><|NEUTRAL|><|BGM|><|withitn|>然后下雨了。
+
+一次扫描同时完成:
+- 按段切分 (标签出现在文本之后, 或同类标签在本段已出现, 即为新段的开始)
+- 全局的情感计数、事件与语言集合 (用于整体结果)
+- 去标签后的文本, 以及每段文本在整体转写中的字符偏移
+
+标签切分由 re.split 在 C 中完成, Python 层每个标签只查一次表; 解析时间与输入长度成线性关系,
+整体结果与逐标签 count / in 扫描的旧实现一致
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 与旧实现去标签的正则 r"<\|[^>]+\|>" 匹配范围相同 (标签内可含 "|" 或 "<", 如 "<|a|b|>" 整体视为一个未知标签)
+TAG_PATTERN = re.compile(r"<\|([^>]+)\|>")
+
+LANGUAGE = "language"
+EMOTION = "emotion"
+EVENT = "event"
+OTHER = "other"
+
+UNKNOWN = "UNKNOWN"
+
+# 模型会输出但不参与整体结果的标签
+EXTRA_TAGS = {
+    "nospeech": (LANGUAGE, "nospeech"),
+    "EMO_UNKNOWN": (EMOTION, None),
+    "Event_UNK": (EVENT, None),
+    "withitn": (OTHER, None),
+    "woitn": (OTHER, None),
+}
+
+
+def _body(tag: str) -> str:
+    """"<|HAPPY|>" -> "HAPPY" """
+    return tag[2:-2] if tag.startswith("<|") and tag.endswith("|>") else tag
+
+
+class ParsedTags:
+    """
+    解析结果
+
+    - segments: 每段 {"index", "language", "emotion", "events", "text", "text_start", "text_end"};
+      text_start / text_end 为该段在 text 中的字符偏移
+    - text: 去标签并规整空白后的整体文本
+    - emotion_counts: {情感: 出现次数}
+    - events / languages: 出现过的事件 / 语言集合
+    """
+
+    __slots__ = ("segments", "text", "emotion_counts", "events", "languages")
+
+    def __init__(self, segments: List[dict], text: str, emotion_counts: Dict[str, int], events: set, languages: set):
+        self.segments = segments
+        self.text = text
+        self.emotion_counts = emotion_counts
+        self.events = events
+        self.languages = languages
+
+
+class TagParser:
+    """
+    预编译的标签解析器
+
+    参数:
+        emotion_tags / event_tags / language_tags: {"<|标签|>": 输出值}, 与 EmotionAnalyzer 的映射表相同
+        ignored_events: 不计入事件列表的事件 (speech 等)
+    """
+
+    def __init__(
+        self,
+        emotion_tags: Dict[str, str],
+        event_tags: Dict[str, str],
+        language_tags: Dict[str, str],
+        ignored_events: Iterable[str] = ("speech", "breath")
+    ):
+        self.ignored_events = frozenset(ignored_events)
+        self._table: Dict[str, Tuple[str, Optional[str]]] = dict(EXTRA_TAGS)
+        for category, tags in ((EMOTION, emotion_tags), (EVENT, event_tags), (LANGUAGE, language_tags)):
+            for tag, value in tags.items():
+                self._table[_body(tag)] = (category, value)
+
+    def parse(self, raw_text: str) -> ParsedTags:
+        """单次扫描解析原始输出"""
+        table = self._table
+        unknown_tag = (OTHER, None)
+        # split 在 C 中完成扫描: [文本, 标签, 文本, 标签, ...]
+        parts = TAG_PATTERN.split(raw_text)
+
+        headers: List[dict] = []   # 每段 {类别: 值}
+        texts: List[str] = []      # 每段的原始文本
+        header = None
+        has_text = False
+        if parts[0]:
+            header, has_text = {}, not parts[0].isspace()
+            headers.append(header)
+            texts.append(parts[0])
+
+        for i in range(1, len(parts), 2):
+            category, value = table.get(parts[i], unknown_tag)
+            # 文本之后的标签, 或本段已有同类标签 (事件可以有多个), 开始新的一段
+            if header is None or has_text or (category in header and category != EVENT):
+                header, has_text = {}, False
+                headers.append(header)
+                texts.append("")
+            if category == EVENT:
+                header.setdefault(EVENT, []).append(value)
+            else:
+                header[category] = value
+            text = parts[i + 1]
+            if text:
+                texts[-1] += text
+                if not has_text:
+                    has_text = not text.isspace()
+
+        segments: List[dict] = []
+        emotion_counts: Dict[str, int] = {}
+        events: set = set()
+        languages: set = set()
+        ignored = self.ignored_events
+        clean_parts: List[str] = []
+        length = 0
+        pending_space = False
+        for index, (header, raw) in enumerate(zip(headers, texts)):
+            language, emotion = header.get(LANGUAGE), header.get(EMOTION)
+            if language is not None:
+                languages.add(language)
+            if emotion is not None:
+                emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
+            segment_events = []
+            for event in header.get(EVENT, ()):
+                if event is not None:
+                    events.add(event)
+                    if event not in ignored and event not in segment_events:
+                        segment_events.append(event)
+
+            # 整体文本 = ' '.join(拼接文本.split()): 逐段规整, 段间原本有空白时补一个空格
+            clean = " ".join(raw.split())
+            if clean:
+                if clean_parts and (pending_space or raw[0].isspace()):
+                    clean_parts.append(" ")
+                    length += 1
+                clean_parts.append(clean)
+                pending_space = raw[-1].isspace()
+            elif raw:
+                pending_space = True
+            segments.append({
+                "index": index,
+                "language": language or UNKNOWN,
+                "emotion": emotion or UNKNOWN,
+                "events": segment_events,
+                "text": clean,
+                "text_start": length,
+                "text_end": length + len(clean),
+            })
+            length += len(clean)
+
+        return ParsedTags(segments, "".join(clean_parts), emotion_counts, events, languages)
+
+
+def annotate_spans(segments: List[dict], spans: Sequence[Tuple[float, float, int]]) -> bool:
+    """
+    为整体解析出的段标注时间范围
+
+    参数:
+        spans: 每个分析单元 (长音频窗口 / 实时识别的句子) 的 (start_s, end_s, 该单元解析出的段数), 按时间顺序
+
+    返回:
+        段数一致并完成标注时为 True; 不一致时不做修改
+    """
+    if sum(count for _, _, count in spans) != len(segments):
+        return False
+    index = 0
+    for start_s, end_s, count in spans:
+        for segment in segments[index:index + count]:
+            segment["start_s"], segment["end_s"] = round(start_s, 2), round(end_s, 2)
+        index += count
+    return True
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# test_ann_index.py - 声纹近似最近邻索引测试
+"""
+验证 IVF-PQ 索引的召回率、增删与持久化, 以及 VoiceprintIndex 跟随声纹库同步 (精确检索回退、重排、排除 ID)
+
+用法:
+    python -m pytest test_ann_index.py
+"""
+
+import sys
+
+import numpy as np
+import pytest
+
+from ann_index import INDEX_FILE, IVFPQIndex, VoiceprintIndex, kmeans
+from speaker_store import SpeakerStore
+
+DIM = 32
+
+
+def _clustered(n, seed=0, clusters=20):
+    """聚成若干簇的 L2 归一化向量 (与真实声纹相似: 同一说话人的多段录音彼此接近)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, DIM))
+    vectors = centers[rng.integers(0, clusters, n)] + 0.3 * rng.standard_normal((n, DIM))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _index(vectors, **kwargs):
+    index = IVFPQIndex(dim=DIM, m=8, **kwargs)
+    index.train(vectors)
+    index.add([f"s{i}" for i in range(len(vectors))], vectors)
+    return index
+
+
+def test_kmeans_finds_separated_clusters():
+    rng = np.random.default_rng(1)
+    data = np.concatenate([rng.normal(loc, 0.05, (50, 2)) for loc in (-5.0, 0.0, 5.0)]).astype(np.float32)
+    centroids = np.sort(kmeans(data, 3)[:, 0])
+    np.testing.assert_allclose(centroids, [-5.0, 0.0, 5.0], atol=0.1)
+
+
+def test_recall_against_exact_search():
+    vectors = _clustered(2000)
+    index = _index(vectors, nprobe=8)
+    assert index.code_bytes == 8
+    noise = 0.1 * np.random.default_rng(1).standard_normal((50, DIM)).astype(np.float32)
+    queries = vectors[:50] + noise
+    hits = 0
+    for query in queries:
+        exact = {f"s{i}" for i in np.argsort(-(vectors @ query))[:10]}
+        hits += len(exact & {label for label, _ in index.search(query, k=40)})
+    assert hits / (10 * len(queries)) > 0.9
+
+
+def test_add_replace_remove_and_compact():
+    vectors = _clustered(300)
+    index = _index(vectors)
+    target = vectors[0]
+    assert index.search(target, k=1)[0][0] == "s0"
+
+    index.add(["s0"], vectors[1:2])  # 重新注册: 旧编码作废
+    assert len(index) == 300
+    assert index.remove(["s0", "missing"]) == 1
+    assert "s0" not in [label for label, _ in index.search(target, k=300, nprobe=index.nlist)]
+
+    index.remove([f"s{i}" for i in range(1, 200)])
+    assert len(index) == 100
+    assert len(index._labels) == 100  # 作废过半后压缩
+
+
+def test_state_round_trip():
+    vectors = _clustered(500)
+    index = _index(vectors, nprobe=4)
+    index.remove(["s3"])
+    restored = IVFPQIndex.from_state(index.state())
+    assert len(restored) == len(index)
+    query = _clustered(1, seed=2)[0]
+    assert restored.search(query, k=5) == index.search(query, k=5)
+
+
+def test_untrained_index():
+    index = IVFPQIndex(dim=DIM, m=8)
+    assert index.search(np.ones(DIM), k=3) == []
+    with pytest.raises(RuntimeError):
+        index.add(["a"], np.ones((1, DIM)))
+    with pytest.raises(ValueError):
+        IVFPQIndex(dim=DIM, m=5)
+
+
+def test_voiceprint_index_follows_store(tmp_path):
+    store = SpeakerStore(str(tmp_path), dim=DIM)
+    vectors = _clustered(400, seed=3)
+    for i, vector in enumerate(vectors[:10]):
+        store.enroll(f"s{i}", vector)
+
+    voiceprints = VoiceprintIndex(store, min_speakers=50, m=8, nprobe=8)
+    results, approximate = voiceprints.search(vectors[4], k=2)
+    assert not approximate and results[0][0] == "s4"
+
+    for i, vector in enumerate(vectors[10:], start=10):
+        store.enroll(f"s{i}", vector)
+    results, approximate = voiceprints.search(vectors[123], k=3, exclude=["s7"])
+    assert approximate
+    assert results[0] == ("s123", pytest.approx(1.0, abs=1e-5))  # 原始向量精确重排
+    assert voiceprints.stats()["mode"] == "ivfpq"
+    assert (tmp_path / INDEX_FILE).exists()
+
+    results, _ = voiceprints.search(vectors[123], k=3, exclude=["s123"])
+    assert "s123" not in [label for label, _ in results]
+
+    store.remove("s123")
+    results, _ = voiceprints.search(vectors[123], k=3)
+    assert "s123" not in [label for label, _ in results]
+
+    # 其他工作进程: 加载已保存的索引后增量同步
+    reloaded = VoiceprintIndex(SpeakerStore(str(tmp_path), dim=DIM), min_speakers=50, m=8, nprobe=8)
+    results, approximate = reloaded.search(vectors[200], k=1)
+    assert approximate and results[0][0] == "s200"
+    assert "s123" not in reloaded.index._positions
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# test_batcher.py - 动态微批处理测试
+"""
+验证微批处理器: 等待窗口内凑批、结果按提交顺序分发、批量失败时逐条重试 (只有出错的条目收到异常)、
+结果数量不符时报错, 以及关闭后的行为
+
+用法:
+    python -m pytest test_batcher.py
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import wait
+
+import pytest
+
+from batcher import MicroBatcher
+
+
+class Recorder:
+    """记录每次批量调用的输入; 可选在条目为 bad 时抛异常"""
+
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+
+    def __call__(self, items):
+        self.calls.append(list(items))
+        if self.fail_on is not None and self.fail_on in items:
+            raise ValueError(f"bad item {self.fail_on}")
+        return [item * 10 for item in items]
+
+
+def test_fills_batch_within_wait_window_and_keeps_order():
+    batch_fn = Recorder()
+    batcher = MicroBatcher(batch_fn, max_batch_size=4, max_wait_ms=200)
+    try:
+        futures = [batcher.submit(i) for i in range(6)]
+        assert [future.result(timeout=2) for future in futures] == [0, 10, 20, 30, 40, 50]
+    finally:
+        batcher.close()
+    assert batch_fn.calls == [[0, 1, 2, 3], [4, 5]]
+    assert batcher.stats()["avg_batch_size"] == 3.0
+
+
+def test_departs_after_max_wait():
+    batch_fn = Recorder()
+    batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=50)
+    try:
+        start = time.monotonic()
+        assert batcher.infer(1, timeout=2) == 10
+        assert 0.04 < time.monotonic() - start < 1.0
+    finally:
+        batcher.close()
+    assert batch_fn.calls == [[1]]
+
+
+def test_failed_batch_is_retried_per_item():
+    batch_fn = Recorder(fail_on=2)
+    batcher = MicroBatcher(batch_fn, max_batch_size=4, max_wait_ms=200)
+    try:
+        futures = [batcher.submit(i) for i in range(4)]
+        wait(futures, timeout=2)
+        assert [future.result() for i, future in enumerate(futures) if i != 2] == [0, 10, 30]
+        with pytest.raises(ValueError, match="bad item 2"):
+            futures[2].result()
+    finally:
+        batcher.close()
+    assert batch_fn.calls == [[0, 1, 2, 3], [0], [1], [2], [3]]
+    assert batcher.stats()["retries"] == 1
+
+
+def test_result_count_mismatch_is_an_error():
+    batcher = MicroBatcher(lambda items: items[:-1], max_batch_size=2, max_wait_ms=100)
+    try:
+        futures = [batcher.submit(i) for i in range(2)]
+        for future in futures:
+            with pytest.raises(RuntimeError, match="returned 0 results for 1 items"):
+                future.result(timeout=2)
+    finally:
+        batcher.close()
+
+
+def test_close_drains_pending_items_and_rejects_new_ones():
+    release = threading.Event()
+
+    def slow(items):
+        release.wait(2)
+        return items
+
+    batcher = MicroBatcher(slow, max_batch_size=1, max_wait_ms=0)
+    futures = [batcher.submit(i) for i in range(3)]
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit(3)
+    release.set()
+    assert [future.result(timeout=2) for future in futures] == [0, 1, 2]
+    batcher._thread.join(timeout=2)
+    assert not batcher._thread.is_alive()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
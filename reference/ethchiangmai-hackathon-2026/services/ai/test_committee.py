@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# test_committee.py - 验证者委员会注册表测试
+"""
+用 py_ecc 参考实现签名, 验证委员会注册表: 位图编码的填充与越界规则、PoP 校验、子集聚合公钥,
+quorum 验证的阈值处理, 移除成员后位图位置保持不变, 以及多个进程通过变更日志共享成员列表
+
+用法:
+    python -m pytest test_committee.py
+"""
+
+import sys
+
+import pytest
+
+from bls_backends import PyEccBackend
+from committee import CommitteeError, CommitteeRegistry, decode_bitmap, encode_bitmap
+
+REFERENCE = PyEccBackend()
+SECRET_KEYS = [11, 22, 33, 44]
+MESSAGE = b"ECHORANK_V1||committee-test"
+
+
+@pytest.fixture(scope="module")
+def validators():
+    """[(公钥, PoP, 对 MESSAGE 的签名)]"""
+    return [
+        (REFERENCE.sk_to_pk(sk), REFERENCE.pop_prove(sk), REFERENCE.sign(sk, MESSAGE))
+        for sk in SECRET_KEYS
+    ]
+
+
+def _registry(validators, count=3):
+    registry = CommitteeRegistry()
+    for public_key, proof, _ in validators[:count]:
+        registry.register("c", public_key, proof)
+    return registry
+
+
+def _aggregate(validators, indices):
+    return REFERENCE.aggregate([validators[i][2] for i in indices])
+
+
+def test_bitmap_round_trip_and_padding():
+    bits = [True, False, True] + [False] * 6 + [True]
+    assert encode_bitmap(bits) == "0502"
+    assert decode_bitmap("0502", 10) == bits
+    # 短位图: 之后注册的成员视为未签名
+    assert decode_bitmap("05", 12) == [True, False, True] + [False] * 9
+    assert decode_bitmap([1, 0, 1], 4) == [True, False, True, False]
+    assert decode_bitmap("", 2) == [False, False]
+
+
+@pytest.mark.parametrize("value", ["0500", "08", "ff", [1, 0, 1, 0]])
+def test_bitmap_overflow_is_rejected(value):
+    with pytest.raises(CommitteeError):
+        decode_bitmap(value, 3)
+
+
+def test_register_checks_proof_of_possession(validators):
+    registry = CommitteeRegistry()
+    public_key, proof, _ = validators[0]
+    with pytest.raises(CommitteeError, match="proof of possession"):
+        registry.register("c", public_key, validators[1][1])
+    registry.register("c", public_key, proof)
+    with pytest.raises(CommitteeError, match="already registered"):
+        registry.register("c", public_key, proof)
+    with pytest.raises(CommitteeError, match="Unknown committee"):
+        registry.members("other")
+    assert registry.committees() == {"c": 1}
+
+
+def test_full_and_subset_quorums(validators):
+    registry = _registry(validators)
+    public_keys = [public_key for public_key, _, _ in validators[:3]]
+    assert registry.aggregate_public_key("c") == REFERENCE.aggregate_pubkeys(public_keys)
+
+    assert registry.verify_quorum("c", MESSAGE, _aggregate(validators, [0, 1, 2]))
+    assert registry.verify_quorum("c", MESSAGE, _aggregate(validators, [0, 2]), [True, False, True])
+    # 位图与实际签名者不符 / 消息不同
+    assert not registry.verify_quorum("c", MESSAGE, _aggregate(validators, [0, 2]), [True, True, False])
+    assert not registry.verify_quorum("c", MESSAGE, _aggregate(validators, [0, 1, 2]), [True, True, False])
+    assert not registry.verify_quorum("c", b"other", _aggregate(validators, [0, 1, 2]))
+    assert not registry.verify_quorum("c", MESSAGE, b"\x00" * 96)
+
+
+def test_threshold(validators):
+    registry = _registry(validators)
+    signature = _aggregate(validators, [1, 2])
+    bitmap = decode_bitmap("06", 3)
+    assert registry.verify_quorum("c", MESSAGE, signature, bitmap, threshold=2)
+    assert not registry.verify_quorum("c", MESSAGE, signature, bitmap, threshold=3)
+    assert not registry.verify_quorum("c", MESSAGE, signature, [False, False, False])
+
+
+def test_wrong_size_bitmap(validators):
+    registry = _registry(validators)
+    with pytest.raises(CommitteeError, match="slots"):
+        registry.verify_quorum("c", MESSAGE, _aggregate(validators, [0, 1]), [True, True])
+
+
+def test_removal_keeps_bitmap_positions(validators):
+    registry = _registry(validators)
+    issued = encode_bitmap([True, False, True])
+    registry.remove("c", validators[1][0])
+    assert registry.members("c") == [validators[0][0], None, validators[2][0]]
+    assert registry.committees() == {"c": 2}
+
+    # 移除前签发的位图仍指向同一批公钥
+    bitmap = decode_bitmap(issued, len(registry.members("c")))
+    assert registry.verify_quorum("c", MESSAGE, _aggregate(validators, [0, 2]), bitmap, threshold=2)
+    assert registry.verify_quorum("c", MESSAGE, _aggregate(validators, [0, 2]))
+    with pytest.raises(CommitteeError, match="removed member"):
+        registry.verify_quorum("c", MESSAGE, _aggregate(validators, [0, 1, 2]), [True, True, True])
+
+    # 再次注册分配新位置, 空位不复用
+    registry.register("c", validators[3][0], validators[3][1])
+    registry.register("c", validators[1][0], validators[1][1])
+    assert registry.members("c") == [validators[0][0], None, validators[2][0], validators[3][0], validators[1][0]]
+    assert registry.verify_quorum(
+        "c", MESSAGE, _aggregate(validators, [1, 3]), [False, False, False, True, True]
+    )
+
+    for public_key, _, _ in validators:
+        registry.remove("c", public_key)
+    assert registry.committees() == {"c": 0}
+    assert not registry.verify_quorum("c", MESSAGE, _aggregate(validators, [0]))
+    with pytest.raises(CommitteeError, match="not registered"):
+        registry.remove("c", validators[0][0])
+
+
+def test_registry_log_is_shared_between_workers(validators, tmp_path):
+    path = str(tmp_path / "committees.jsonl")
+    first, second = CommitteeRegistry(path), CommitteeRegistry(path)
+    for public_key, proof, _ in validators[:2]:
+        first.register("c", public_key, proof)
+    assert second.members("c") == [validators[0][0], validators[1][0]]
+
+    second.remove("c", validators[0][0])
+    second.register("c", *validators[0][:2])
+    with pytest.raises(CommitteeError, match="already registered"):
+        first.register("c", *validators[1][:2])
+    first.register("c", *validators[1][:2], exist_ok=True)
+    expected = [None, validators[1][0], validators[0][0]]
+    assert first.members("c") == expected
+    assert first.verify_quorum("c", MESSAGE, _aggregate(validators, [0, 1]), [False, True, True])
+
+    # 重启后按日志恢复相同的位置
+    assert CommitteeRegistry(path).members("c") == expected
+
+
+def test_partial_log_line_is_ignored_then_repaired(validators, tmp_path):
+    path = tmp_path / "committees.jsonl"
+    registry = CommitteeRegistry(str(path))
+    registry.register("c", *validators[0][:2])
+    with open(path, "ab") as f:
+        f.write(b'{"op": "add", "committee": "c", "pub')  # 写入中途崩溃
+    reader = CommitteeRegistry(str(path))
+    assert reader.members("c") == [validators[0][0]]
+
+    reader.register("c", *validators[1][:2])
+    assert registry.members("c") == [validators[0][0], validators[1][0]]
+    assert len(path.read_text().splitlines()) == 2
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
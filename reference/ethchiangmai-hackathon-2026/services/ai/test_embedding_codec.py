@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# test_embedding_codec.py - 声纹传输格式测试
+"""
+验证声纹向量在 JSON 数组 / base64 块 / 二进制 (msgpack) 之间编解码一致, 以及格式错误与内容协商
+
+用法:
+    python -m pytest test_embedding_codec.py
+"""
+
+import json
+import sys
+
+import numpy as np
+import pytest
+from starlette.requests import Request
+
+from embedding_codec import (
+    JSON_TYPE, MSGPACK_TYPE, OCTET_TYPE, EmbeddingCodecError, decode_array, encode_array, msgpack, negotiate,
+    render, render_embedding
+)
+
+DIM = 192
+
+
+def _embedding(seed=0):
+    return np.random.default_rng(seed).standard_normal(DIM).astype(np.float32)
+
+
+def _request(accept="", query=""):
+    return Request({
+        "type": "http", "method": "GET", "path": "/", "query_string": query.encode(),
+        "headers": [(b"accept", accept.encode())] if accept else []
+    })
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_float32_round_trip_is_exact(binary):
+    embedding = _embedding()
+    encoded = encode_array(embedding, "f32", binary=binary)
+    assert encoded["dtype"] == "float32" and encoded["shape"] == [DIM]
+    assert ("data" in encoded) == binary
+    np.testing.assert_array_equal(decode_array(encoded), embedding)
+
+
+def test_json_list_and_raw_bytes():
+    embedding = _embedding()
+    np.testing.assert_allclose(decode_array(encode_array(embedding)), embedding, rtol=1e-7)
+    np.testing.assert_array_equal(decode_array(embedding.astype("<f4").tobytes()), embedding)
+
+
+def test_float16_keeps_cosine_similarity():
+    a, b = _embedding(1), _embedding(2)
+    decoded_a, decoded_b = (decode_array(json.loads(json.dumps(encode_array(v, "f16")))) for v in (a, b))
+    assert decoded_a.dtype == np.float32
+    cosine = lambda x, y: float(x @ y / (np.linalg.norm(x) * np.linalg.norm(y)))  # noqa: E731
+    assert cosine(decoded_a, decoded_b) == pytest.approx(cosine(a, b), abs=1e-3)
+
+
+def test_matrix_from_encoded_rows_and_block():
+    matrix = np.stack([_embedding(i) for i in range(3)])
+    np.testing.assert_array_equal(decode_array(encode_array(matrix, "f32"), ndim=2), matrix)
+    rows = [encode_array(row, "f32") for row in matrix]
+    np.testing.assert_array_equal(decode_array(rows, ndim=2), matrix)
+    # 单个声纹作为矩阵时视为一行
+    assert decode_array(encode_array(matrix[0], "f32"), ndim=2).shape == (1, DIM)
+
+
+@pytest.mark.parametrize("value", [
+    {"dtype": "int8", "base64": ""},
+    {"dtype": "float32", "base64": "not base64!"},
+    {"dtype": "float32", "base64": "AAAA", "shape": [2]},
+    {"dtype": "float32", "data": "text"},
+    {"dtype": "float32"},
+    b"\x00" * 7,
+    [],
+    ["a", "b"],
+])
+def test_malformed_embeddings_are_rejected(value):
+    with pytest.raises(EmbeddingCodecError):
+        decode_array(value)
+
+
+def test_ragged_matrix_is_rejected():
+    with pytest.raises(EmbeddingCodecError):
+        decode_array([[1.0, 2.0], [1.0, 2.0, 3.0]], ndim=2)
+    with pytest.raises(EmbeddingCodecError):
+        decode_array([encode_array(np.ones(2), "f32"), encode_array(np.ones(3), "f32")], ndim=2)
+
+
+def test_unknown_encoding_is_rejected():
+    with pytest.raises(EmbeddingCodecError):
+        encode_array(_embedding(), "f64")
+
+
+def test_negotiate():
+    assert negotiate(_request()) == (JSON_TYPE, "json")
+    assert negotiate(_request(query="encoding=f16")) == (JSON_TYPE, "f16")
+    assert negotiate(_request(OCTET_TYPE), allow_octet=True) == (OCTET_TYPE, "f32")
+    # 响应不止一个声纹时 octet-stream 回退为 JSON
+    assert negotiate(_request(OCTET_TYPE)) == (JSON_TYPE, "json")
+    with pytest.raises(EmbeddingCodecError):
+        negotiate(_request(OCTET_TYPE, "encoding=json"), allow_octet=True)
+    with pytest.raises(EmbeddingCodecError):
+        negotiate(_request(query="encoding=f64"))
+    expected = MSGPACK_TYPE if msgpack is not None else JSON_TYPE
+    assert negotiate(_request(MSGPACK_TYPE))[0] == expected
+
+
+def test_render_embedding():
+    embedding = _embedding()
+    response = render_embedding({"success": True}, embedding, JSON_TYPE, "f32")
+    body = json.loads(response.body)
+    assert body["success"]
+    np.testing.assert_array_equal(decode_array(body["embedding"]), embedding)
+
+    response = render_embedding({"success": True}, embedding, OCTET_TYPE, "f16")
+    assert response.headers["X-Embedding-Dtype"] == "float16"
+    assert response.headers["X-Embedding-Dimensions"] == str(DIM)
+    assert len(response.body) == DIM * 2
+
+
+@pytest.mark.skipif(msgpack is None, reason="msgpack not installed")
+def test_msgpack_round_trip():
+    embedding = _embedding()
+    response = render({"embedding": encode_array(embedding, "f32", binary=True)}, MSGPACK_TYPE)
+    body = msgpack.unpackb(response.body, raw=False)
+    np.testing.assert_array_equal(decode_array(body["embedding"]), embedding)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# test_inference_pool.py - 推理准入控制测试
+"""
+验证有界推理执行器: 正常执行与异常传递、队列满时立即拒绝 (429)、排队超时撤销 (503) 与 Retry-After 估算
+
+用法:
+    python -m pytest test_inference_pool.py
+"""
+
+import asyncio
+import sys
+import threading
+import time
+
+import pytest
+
+from inference_pool import InferenceExecutor, QueueFullError, QueueTimeoutError
+
+
+def _blocker():
+    """阻塞推理线程直到 release.set()"""
+    release = threading.Event()
+    return release, lambda: release.wait(5) and "done"
+
+
+def test_runs_in_worker_thread_and_propagates_errors():
+    executor = InferenceExecutor(max_workers=1, max_queue=1)
+
+    async def main():
+        name = await executor.run(lambda: threading.current_thread().name)
+        assert name.startswith("inference")
+        assert await executor.run(lambda a, b=0: a + b, 2, b=3) == 5
+        with pytest.raises(ZeroDivisionError):
+            await executor.run(lambda: 1 / 0)
+        await asyncio.sleep(0.01)
+        return executor.stats()
+
+    try:
+        stats = asyncio.run(main())
+    finally:
+        executor.shutdown()
+    assert (stats["queued"], stats["in_flight"]) == (0, 0)
+
+
+def test_full_queue_is_rejected_immediately():
+    executor = InferenceExecutor(max_workers=1, max_queue=1, queue_timeout=5)
+    release, blocked = _blocker()
+
+    async def main():
+        running = asyncio.ensure_future(executor.run(blocked))
+        queued = asyncio.ensure_future(executor.run(lambda: "queued"))
+        await asyncio.sleep(0.05)
+        assert (executor.in_flight, executor.queued) == (1, 1)
+        start = time.monotonic()
+        with pytest.raises(QueueFullError) as error:
+            await executor.run(lambda: "rejected")
+        assert time.monotonic() - start < 0.5
+        assert error.value.status_code == 429 and error.value.retry_after >= 1
+        release.set()
+        return await running, await queued
+
+    try:
+        assert asyncio.run(main()) == ("done", "queued")
+    finally:
+        release.set()
+        executor.shutdown()
+    assert executor.rejected_full == 1
+
+
+def test_queue_timeout_cancels_waiting_task():
+    executor = InferenceExecutor(max_workers=1, max_queue=4, queue_timeout=0.1)
+    release, blocked = _blocker()
+    ran = []
+
+    async def main():
+        running = asyncio.ensure_future(executor.run(blocked))
+        await asyncio.sleep(0.02)
+        with pytest.raises(QueueTimeoutError) as error:
+            await executor.run(lambda: ran.append(True))
+        assert error.value.status_code == 503
+        release.set()
+        await running
+        await asyncio.sleep(0.05)
+
+    try:
+        asyncio.run(main())
+    finally:
+        release.set()
+        executor.shutdown()
+    assert ran == []
+    assert executor.rejected_timeout == 1
+
+
+def test_retry_after_follows_backlog():
+    executor = InferenceExecutor(max_workers=2, max_queue=8)
+    try:
+        executor._avg_service_s = 3.0
+        executor._pending = 6
+        assert executor.retry_after() == 9
+        executor._pending = 0
+        assert executor.retry_after() == 1
+    finally:
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# test_ingest.py - 上传接收测试
+"""
+验证分块接收上传: 哈希与大小、字节数/时长上限的提前拒绝、暂存文件落盘,
+以及解码器直接使用暂存文件的数据 (内存中共享缓冲区, 落盘后 mmap)
+
+用法:
+    python -m pytest test_ingest.py
+"""
+
+import asyncio
+import hashlib
+import io
+import struct
+import sys
+
+import numpy as np
+import pytest
+
+from audio_frontend import _as_buffer, decode_audio
+from ingest import (
+    RAW_PCM_BYTE_RATE, AudioTooLongError, UploadTooLargeError, estimate_byte_rate, ingest_upload
+)
+
+
+class FakeUpload:
+    """只实现 ingest_upload 用到的 UploadFile 接口"""
+
+    def __init__(self, data: bytes, filename: str = "audio.wav"):
+        self._stream = io.BytesIO(data)
+        self.filename = filename
+
+    async def read(self, size: int) -> bytes:
+        return self._stream.read(size)
+
+
+def _wav(seconds: float, rate: int = 16000) -> bytes:
+    samples = (np.sin(np.arange(int(seconds * rate)) / 8) * 8000).astype("<i2").tobytes()
+    fmt = struct.pack("<HHIIHH", 1, 1, rate, rate * 2, 2, 16)
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", len(samples)) + samples
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def _ingest(data: bytes, **kwargs):
+    kwargs.setdefault("max_bytes", 10 * 1024 * 1024)
+    return asyncio.run(ingest_upload(FakeUpload(data), **kwargs))
+
+
+def test_hash_size_and_filename():
+    data = _wav(0.5)
+    with _ingest(data, chunk_size=1000) as ingested:
+        assert ingested.size == len(data)
+        assert ingested.sha256 == hashlib.sha256(data).hexdigest()
+        assert ingested.filename == "audio.wav"
+        assert ingested.open().read() == data
+
+
+def test_too_large_is_rejected():
+    with pytest.raises(UploadTooLargeError) as error:
+        _ingest(b"\x00" * 5000, max_bytes=4096, chunk_size=1024)
+    assert error.value.status_code == 413
+
+
+@pytest.mark.parametrize("data, pcm", [(_wav(3.0), False), (b"\x01\x02" * 16000 * 3, True)])
+def test_too_long_wav_and_pcm_are_rejected_while_reading(data, pcm):
+    with pytest.raises(AudioTooLongError):
+        _ingest(data, max_duration_s=2.0, chunk_size=4096, pcm=pcm)
+    with _ingest(data, max_duration_s=4.0, pcm=pcm) as ingested:
+        assert ingested.size == len(data)
+
+
+def test_unknown_container_is_checked_after_decoding():
+    # 未识别的容器 (如 ASF/WMA) 由 ffmpeg 解码, 不能按 PCM 码率提前拒绝
+    data = b"\x30\x26\xb2\x75\x8e\x66\xcf\x11" + b"\x00" * (16000 * 2 * 3)
+    with _ingest(data, max_duration_s=2.0, chunk_size=4096) as ingested:
+        assert ingested.size == len(data)
+
+
+def test_estimate_byte_rate():
+    assert estimate_byte_rate(_wav(0.1)[:64]) == 32000
+    assert estimate_byte_rate(_wav(0.1)[:64], pcm=True) == 32000
+    assert estimate_byte_rate(b"\x01\x02\x03\x04" * 16, pcm=True) == RAW_PCM_BYTE_RATE
+    for header in (b"OggS", b"ID3\x04", b"fLaC", b"\xff\xfb\x90", b"\xff\xf1\x50", b"#!AMR\n",
+                   b"FORM\x00\x00\x00\x00AIFF", b"\x00\x00\x00\x20ftypM4A ", b"\x30\x26\xb2\x75", b"\x01\x02\x03\x04"):
+        assert estimate_byte_rate(header.ljust(64, b"\x00")) is None, header
+
+
+@pytest.mark.parametrize("spool_max_size", [1024 * 1024, 1024])
+def test_decoder_reads_spool_without_copying(spool_max_size):
+    data = _wav(1.0)
+    with _ingest(data, spool_max_size=spool_max_size) as ingested:
+        rolled = ingested.file._rolled
+        assert rolled == (spool_max_size < len(data))
+        with _as_buffer(ingested.open()) as buffer:
+            assert len(buffer) == len(data)
+            assert bytes(buffer[:4]) == b"RIFF"
+            # 内存中: 共享暂存 BytesIO 的缓冲区; 落盘后: mmap 临时文件
+            assert type(buffer.obj).__name__ == ("mmap" if rolled else "_BytesIOBuffer")
+        audio, rate = decode_audio(ingested.open())
+        assert rate == 16000 and len(audio) == 16000
+        expected = np.frombuffer(data[44:], dtype="<i2").astype(np.float32) / 32768.0
+        np.testing.assert_allclose(audio, expected, atol=1e-6)
+    # 视图释放后暂存文件可以正常关闭 (上面的 with 退出时关闭)
+    assert ingested.file.closed
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
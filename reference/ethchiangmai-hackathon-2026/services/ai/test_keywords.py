@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# test_keywords.py - 关键词引擎测试
+"""
+验证关键词引擎: 英文词干与领域短语、领域词典解析、中英混合提取,
+以及打分只使用固定的 IDF 快照 (后台计入语料不改变结果, 显式 reload_idf 后才切换版本)
+
+未安装 jieba 时中文走正则切分, 断言只依赖两种方式共同的行为
+
+用法:
+    python -m pytest test_keywords.py
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+from keywords import DEFAULT_DOMAIN_DICT, KeywordEngine, iter_cached_transcripts, parse_dictionary, stem_english
+
+
+@pytest.fixture(scope="module")
+def cache_dir(tmp_path_factory):
+    # jieba 前缀词典缓存在同一模块的测试间复用
+    return str(tmp_path_factory.mktemp("jieba"))
+
+
+def _engine(cache_dir, tmp_path, **kwargs):
+    return KeywordEngine(cache_dir=cache_dir, idf_path=str(tmp_path / "idf.json"), **kwargs).load()
+
+
+@pytest.mark.parametrize("word, stem", [
+    ("parties", "party"), ("events", "event"), ("glass", "glass"), ("status", "status"),
+    ("zk-rollups", "zk-rollup"), ("gas", "gas"), ("web3", "web3"),
+])
+def test_stem_english(word, stem):
+    assert stem_english(word) == stem
+
+
+def test_parse_dictionary(tmp_path):
+    path = tmp_path / "dict.txt"
+    path.write_text("# comment\n\n智能合约\n清迈 100\n空投 50 n\nsmart contract\nChiang Mai 10\n", encoding="utf-8")
+    assert parse_dictionary(str(path)) == [
+        ("智能合约", None, None), ("清迈", 100, None), ("空投", 50, "n"),
+        ("smart contract", None, None), ("Chiang Mai", 10, None),
+    ]
+    assert parse_dictionary(DEFAULT_DOMAIN_DICT)
+
+
+def test_english_phrases_use_dictionary_spelling(cache_dir, tmp_path):
+    engine = _engine(cache_dir, tmp_path)
+    terms = engine.tokenize("The NFTs at chiang mai were great, smart contracts everywhere!")
+    shown = [display for _, display in terms]
+    assert "NFT" in shown and "Chiang Mai" in shown and "smart contract" in shown
+    assert "the" not in shown and "were" not in shown
+    # 标点打断短语
+    assert "Chiang Mai" not in [display for _, display in engine.tokenize("chiang. mai")]
+
+
+def test_extract_mixed_text(cache_dir, tmp_path):
+    engine = _engine(cache_dir, tmp_path)
+    keywords = engine.extract("清迈的黑客松很棒，智能合约的分享很精彩。The DAO panel was great, DAO voting rocks", top_k=4)
+    assert len(keywords) == 4
+    assert "DAO" in keywords
+    assert {"智能合约", "黑客松", "清迈"} & set(keywords)
+    assert engine.extract("") == []
+
+
+def test_observe_does_not_change_scoring_until_reload(cache_dir, tmp_path):
+    engine = _engine(cache_dir, tmp_path, save_every=2, prior_docs=1)
+    text = "wifi wifi wifi coffee venue"
+    version, keywords = engine.version, engine.extract(text, top_k=2)
+    assert version.startswith("idf-")
+
+    for _ in range(5):
+        engine.observe("the wifi kept dropping")
+    engine.flush(timeout=5)
+    assert engine.stats()["pending"] == 0
+    assert json.loads((tmp_path / "idf.json").read_text())["documents"] == 5
+    # 已计入并保存, 但打分快照不变
+    assert (engine.version, engine.extract(text, top_k=2)) == (version, keywords)
+
+    assert engine.reload_idf() != version
+    assert engine.stats()["corpus_documents"] == 5
+    assert engine.idf("wifi") < engine.idf("coffee")
+
+
+def test_save_merges_counts_from_other_workers(cache_dir, tmp_path):
+    first = _engine(cache_dir, tmp_path)
+    second = _engine(cache_dir, tmp_path)
+    first.add_documents(["coffee venue", "coffee wifi"])
+    second.add_documents(["venue speaker"])
+    first.save()
+    second.save()
+    state = json.loads((tmp_path / "idf.json").read_text())
+    assert state["documents"] == 3
+    assert state["df"]["coffee"] == 2 and state["df"]["venue"] == 2
+
+    # 相同的语料与配置得到相同的快照版本
+    assert first.reload_idf() == second.reload_idf()
+
+
+def test_corrupt_idf_file_is_ignored(cache_dir, tmp_path):
+    (tmp_path / "idf.json").write_text("{not json")
+    engine = _engine(cache_dir, tmp_path)
+    assert engine.stats()["corpus_documents"] == 0
+    assert engine.extract("coffee venue wifi")
+
+
+def test_bootstrap_from_cached_transcripts(cache_dir, tmp_path):
+    analysis = tmp_path / "analysis" / "ab"
+    analysis.mkdir(parents=True)
+    for i, transcript in enumerate(["great coffee", "great coffee", "slow wifi"]):
+        (analysis / f"{i}.json").write_text(json.dumps({"result": {"transcript": transcript}}))
+    (analysis / "broken.json").write_text("{")
+    assert sorted(iter_cached_transcripts(str(tmp_path / "analysis"))) == ["great coffee", "slow wifi"]
+
+    engine = _engine(cache_dir, tmp_path, bootstrap_dir=str(tmp_path / "analysis"))
+    assert engine.stats()["corpus_documents"] == 2
+    assert os.path.exists(tmp_path / "idf.json")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# test_quorum.py - 多验证者签名测试
+"""
+验证多验证者签名器: 聚合签名配合返回的 signer_bitmap 能通过委员会 quorum 验证,
+部分验证者失败时按阈值放行或抛出 QuorumError, 以及委员会成员变化后位图仍对齐委员会位置
+
+用法:
+    python -m pytest test_quorum.py
+"""
+
+import sys
+
+import pytest
+
+import quorum
+from committee import CommitteeRegistry, decode_bitmap
+from quorum import QuorumError, QuorumSigner, load_validator_keys
+
+SECRET_KEYS = [101, 202, 303, 404]
+MESSAGE = b"ECHORANK_V1||quorum-test"
+
+
+def _signer(threshold=None, count=3):
+    registry = CommitteeRegistry()
+    signer = QuorumSigner(SECRET_KEYS[:count], threshold=threshold, processes=0)
+    signer.register(registry, "default")
+    return signer, registry
+
+
+def _verify(registry, signed, threshold=None):
+    bitmap = decode_bitmap(signed["signer_bitmap"], len(registry.members("default")))
+    return registry.verify_quorum("default", MESSAGE, signed["signature"], bitmap, threshold)
+
+
+def _fail_validators(monkeypatch, failing):
+    sign = quorum._sign_in_worker
+
+    def flaky(index, message):
+        if index in failing:
+            raise RuntimeError(f"validator {index + 1} offline")
+        return sign(index, message)
+
+    monkeypatch.setattr(quorum, "_sign_in_worker", flaky)
+
+
+def test_load_validator_keys(monkeypatch):
+    monkeypatch.setenv("VALIDATOR_1_SK", "11")
+    monkeypatch.setenv("VALIDATOR_2_SK", "22")
+    monkeypatch.delenv("VALIDATOR_3_SK", raising=False)
+    assert load_validator_keys() == [11, 22]
+    with pytest.raises(ValueError, match="VALIDATOR_3_SK"):
+        load_validator_keys(3)
+
+
+def test_threshold_bounds():
+    with pytest.raises(ValueError):
+        QuorumSigner(SECRET_KEYS[:2], threshold=3, processes=0)
+    with pytest.raises(ValueError):
+        QuorumSigner([], processes=0)
+    assert QuorumSigner(SECRET_KEYS[:2], processes=0).threshold == 2
+
+
+def test_all_validators_sign():
+    signer, registry = _signer()
+    signed = signer.sign(MESSAGE)
+    assert (signed["signers"], signed["signer_bitmap"]) == (3, "07")
+    assert signed["aggregate_public_key"] == signed["committee_public_key"] == registry.aggregate_public_key("default")
+    assert _verify(registry, signed, threshold=3)
+    assert registry.verify_quorum("default", MESSAGE, signed["signature"])
+
+
+def test_partial_signing_meets_threshold(monkeypatch):
+    signer, registry = _signer(threshold=2)
+    _fail_validators(monkeypatch, {1})
+    signed = signer.sign(MESSAGE)
+    assert (signed["signers"], signed["signer_bitmap"]) == (2, "05")
+    assert signed["aggregate_public_key"] == signer.backend.aggregate_pubkeys(
+        [signer.public_keys[0], signer.public_keys[2]]
+    )
+    assert _verify(registry, signed, threshold=2)
+    assert not _verify(registry, signed, threshold=3)
+
+
+def test_below_threshold_raises(monkeypatch):
+    signer, _ = _signer(threshold=2)
+    _fail_validators(monkeypatch, {0, 2})
+    with pytest.raises(QuorumError, match="Only 1/3"):
+        signer.sign(MESSAGE)
+
+
+def test_bitmap_follows_committee_slots():
+    signer, registry = _signer(threshold=2, count=4)
+    registry.remove("default", signer.public_keys[1])
+    signed = signer.sign(MESSAGE)
+    # 已移除的验证者不计入, 位图中其位置留空
+    assert (signed["signers"], signed["signer_bitmap"]) == (3, "0d")
+    assert _verify(registry, signed, threshold=3)
+
+    # 重新注册后位于新位置
+    registry.register("default", signer.public_keys[1], signer.backend.pop_prove(SECRET_KEYS[1]))
+    signed = signer.sign(MESSAGE)
+    assert (signed["signers"], signed["signer_bitmap"]) == (4, "1d")
+    assert _verify(registry, signed, threshold=4)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
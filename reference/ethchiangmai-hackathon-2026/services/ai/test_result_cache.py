@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# test_result_cache.py - 分析结果缓存测试
+"""
+验证两级缓存的命中顺序、版本隔离、内存 LRU 与磁盘淘汰, 以及损坏条目的处理
+
+用法:
+    python -m pytest test_result_cache.py
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+from result_cache import AnalysisCache
+
+VERSION = "model|algo|2|keywords"
+
+
+def _entry(i):
+    return {"result": {"emotion": "HAPPY", "transcript": "x" * 100, "index": i}, "result_hash": f"{i:064x}"}
+
+
+def test_memory_only_lru():
+    cache = AnalysisCache(memory_entries=2)
+    for i in range(3):
+        cache.put(f"audio{i}", VERSION, _entry(i))
+    assert cache.get("audio0", VERSION) is None
+    assert cache.get("audio2", VERSION) == _entry(2)
+    stats = cache.stats()
+    assert (stats["memory_entries"], stats["memory_hits"], stats["misses"]) == (2, 1, 1)
+
+
+def test_version_change_misses(tmp_path):
+    cache = AnalysisCache(disk_dir=str(tmp_path))
+    cache.put("audio", VERSION, _entry(1))
+    assert cache.get("audio", VERSION + "|idf-2") is None
+    assert cache.get("audio", VERSION) == _entry(1)
+
+
+def test_disk_layer_survives_restart(tmp_path):
+    AnalysisCache(disk_dir=str(tmp_path)).put("audio", VERSION, _entry(7))
+    cache = AnalysisCache(memory_entries=4, disk_dir=str(tmp_path))
+    assert cache.stats()["disk_bytes"] > 0
+    assert cache.get("audio", VERSION) == _entry(7)
+    assert cache.get("audio", VERSION) == _entry(7)
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"]) == (1, 1)
+
+
+def test_disk_eviction_keeps_recent_entries(tmp_path):
+    entry_size = len(str(_entry(0)))
+    cache = AnalysisCache(memory_entries=0, disk_dir=str(tmp_path), disk_max_bytes=entry_size * 4)
+    for i in range(4):
+        cache.put(f"audio{i}", VERSION, _entry(i))
+        past = time.time() - 100 + i
+        os.utime(cache._path(cache.make_key(f"audio{i}", VERSION)), (past, past))
+    cache.put("audio4", VERSION, _entry(4))
+    assert cache.stats()["evictions"] >= 1
+    assert cache.stats()["disk_bytes"] <= cache.disk_max_bytes
+    assert cache.get("audio0", VERSION) is None
+    assert cache.get("audio4", VERSION) == _entry(4)
+
+
+def test_corrupt_disk_entry_is_a_miss(tmp_path):
+    cache = AnalysisCache(memory_entries=0, disk_dir=str(tmp_path))
+    cache.put("audio", VERSION, _entry(1))
+    with open(cache._path(cache.make_key("audio", VERSION)), "w") as f:
+        f.write("{truncated")
+    assert cache.get("audio", VERSION) is None
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.parametrize("memory_entries", [0, 8])
+def test_put_overwrites(tmp_path, memory_entries):
+    cache = AnalysisCache(memory_entries=memory_entries, disk_dir=str(tmp_path))
+    cache.put("audio", VERSION, _entry(1))
+    size = cache.stats()["disk_bytes"]
+    cache.put("audio", VERSION, _entry(2))
+    assert cache.get("audio", VERSION) == _entry(2)
+    assert cache.stats()["disk_bytes"] == size
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# test_silence_gate.py - 静音门限测试
+"""
+验证静音门限: 首尾静音裁剪 (保留边缘)、语音不足时拒绝 (422), 以及写入响应 metadata 的时长统计
+
+用法:
+    python -m pytest test_silence_gate.py
+"""
+
+import sys
+
+import numpy as np
+import pytest
+
+from silence_gate import SilenceGate, SpeechTooShortError, frame_energy_db
+
+RATE = 16000
+
+
+def _tone(seconds, amplitude=0.3):
+    return (amplitude * np.sin(2 * np.pi * 220 * np.arange(int(seconds * RATE)) / RATE)).astype(np.float32)
+
+
+def _silence(seconds):
+    return np.zeros(int(seconds * RATE), dtype=np.float32)
+
+
+def test_frame_energy_db():
+    energy = frame_energy_db(np.concatenate([_silence(0.02), np.full(320, 0.5, np.float32), _silence(0.01)]), 320)
+    assert len(energy) == 2
+    assert energy[0] < -100
+    assert energy[1] == pytest.approx(10 * np.log10(0.25), abs=1e-3)
+
+
+def test_trims_leading_and_trailing_silence_with_padding():
+    gate = SilenceGate(min_speech_s=0.5, pad_ms=200, name="test")
+    audio = np.concatenate([_silence(1.0), _tone(1.0), _silence(2.0)])
+    result = gate.apply(audio)
+    assert result.input_s == pytest.approx(4.0)
+    assert result.speech_s == pytest.approx(1.0, abs=0.02)
+    assert len(result.audio) / RATE == pytest.approx(1.4, abs=0.02)
+    assert result.trimmed_s == pytest.approx(2.6, abs=0.02)
+    # 裁剪结果是原数组的视图
+    assert np.shares_memory(result.audio, audio)
+
+    stats = {}
+    result.record(stats)
+    assert set(stats) == {"input_s", "speech_s", "trimmed_s"}
+    assert stats["trimmed_s"] == round(result.trimmed_s, 3)
+    result.record(None)
+
+
+def test_keeps_tail_shorter_than_a_frame():
+    gate = SilenceGate(min_speech_s=0.1)
+    audio = _tone(1.0)[:RATE - 100]
+    result = gate.apply(audio)
+    assert len(result.audio) == len(audio)
+    assert result.trimmed_s == 0.0
+
+
+@pytest.mark.parametrize("audio", [_silence(3.0), np.concatenate([_silence(1.0), _tone(0.2), _silence(1.0)])])
+def test_rejects_clips_without_enough_speech(audio):
+    with pytest.raises(SpeechTooShortError) as error:
+        SilenceGate(min_speech_s=0.5).apply(audio)
+    assert error.value.status_code == 422
+
+
+def test_min_speech_zero_only_trims():
+    result = SilenceGate(min_speech_s=0.0).apply(_silence(1.0))
+    assert len(result.audio) == RATE
+    assert (result.speech_s, result.trimmed_s) == (0.0, 0.0)
+
+
+def test_threshold_is_absolute_level():
+    quiet = np.concatenate([_silence(0.5), _tone(1.0, amplitude=0.001), _silence(0.5)])
+    with pytest.raises(SpeechTooShortError):
+        SilenceGate(threshold_db=-45.0).apply(quiet)
+    assert SilenceGate(threshold_db=-70.0).apply(quiet).speech_s == pytest.approx(1.0, abs=0.02)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# test_speaker_store.py - 声纹库测试
+"""
+验证声纹库的注册/删除/识别、压缩、跨实例同步, 以及查询不会破坏其他进程正在进行的注册
+
+用法:
+    python -m pytest test_speaker_store.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+from speaker_store import EMBEDDINGS_FILE, SpeakerStore, SpeakerStoreError, cosine_similarity_matrix
+
+DIM = 8
+
+
+def _vectors(n, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+
+
+def _store(directory, **kwargs):
+    return SpeakerStore(str(directory), dim=DIM, **kwargs)
+
+
+def test_enroll_identify_and_replace(tmp_path):
+    store = _store(tmp_path)
+    vectors = _vectors(5)
+    for i, vector in enumerate(vectors):
+        assert store.enroll(f"s{i}", vector)
+    assert len(store) == 5
+
+    results = store.identify(vectors[3] * 2.5, k=2)
+    assert results[0][0] == "s3"
+    assert results[0][1] == pytest.approx(1.0, abs=1e-5)
+
+    # 重新注册同一 ID: 返回 False, 旧行作废
+    assert not store.enroll("s3", vectors[0])
+    assert len(store) == 5
+    assert store.stats()["stale_rows"] == 1
+    np.testing.assert_allclose(store.get("s3"), vectors[0] / np.linalg.norm(vectors[0]), rtol=1e-6)
+
+
+def test_remove(tmp_path):
+    store = _store(tmp_path)
+    store.enroll("a", _vectors(1)[0])
+    assert store.remove("a")
+    assert not store.remove("a")
+    assert store.get("a") is None
+    assert store.identify(_vectors(1)[0]) == []
+
+
+def test_invalid_embeddings_are_rejected(tmp_path):
+    store = _store(tmp_path)
+    with pytest.raises(SpeakerStoreError):
+        store.enroll("a", np.zeros(DIM))
+    with pytest.raises(SpeakerStoreError):
+        store.enroll("a", np.ones(DIM + 1))
+    with pytest.raises(SpeakerStoreError):
+        store.enroll("", np.ones(DIM))
+
+
+def test_compaction_keeps_live_rows(tmp_path):
+    store = _store(tmp_path, compact_min_rows=4, compact_ratio=0.3)
+    vectors = _vectors(6)
+    for i, vector in enumerate(vectors):
+        store.enroll(f"s{i}", vector)
+    for i in range(4):
+        store.remove(f"s{i}")
+    assert store.compactions >= 1
+    assert store.stats()["rows"] == 2
+    assert [speaker for speaker, _ in store.identify(vectors[5], k=2)][0] == "s5"
+    assert os.path.getsize(tmp_path / EMBEDDINGS_FILE) == 2 * DIM * 4
+
+
+def test_other_instance_sees_writes_and_compaction(tmp_path):
+    writer = _store(tmp_path, compact_min_rows=2, compact_ratio=0.3)
+    reader = _store(tmp_path)
+    vectors = _vectors(4)
+    for i, vector in enumerate(vectors):
+        writer.enroll(f"s{i}", vector)
+    assert reader.identify(vectors[2], k=1)[0][0] == "s2"
+
+    writer.remove("s0")
+    writer.remove("s1")  # 触发压缩, 旁路文件被替换
+    assert writer.compactions == 1
+    assert reader.get("s0") is None
+    assert reader.identify(vectors[3], k=1)[0][0] == "s3"
+    assert len(reader) == 2
+
+
+def test_reader_does_not_truncate_concurrent_enroll(tmp_path):
+    """另一进程注册到一半 (向量已追加, 旁路行未写入) 时, 无锁查询只读取共有的行, 不截断向量文件"""
+    writer = _store(tmp_path, compact_min_rows=1, compact_ratio=0.1)
+    reader = _store(tmp_path)
+    vectors = _vectors(3)
+    writer.enroll("a", vectors[0])
+    writer.enroll("b", vectors[1])
+    writer.remove("a")  # 压缩: 读者下次查询时整体重新加载
+    assert writer.compactions == 1
+
+    path = tmp_path / EMBEDDINGS_FILE
+    with open(path, "ab") as f:
+        f.write((vectors[2] / np.linalg.norm(vectors[2])).astype("<f4").tobytes())
+    size = os.path.getsize(path)
+
+    assert reader.identify(vectors[1], k=1)[0][0] == "b"
+    assert reader.get("b") is not None
+    assert os.path.getsize(path) == size
+
+    # 写路径持有文件锁时才修复 (崩溃后遗留的多余行)
+    _store(tmp_path)
+    assert os.path.getsize(path) == DIM * 4
+
+
+def test_cosine_similarity_matrix():
+    queries, candidates = _vectors(3, seed=1), _vectors(4, seed=2)
+    candidates[1] = 0.0
+    expected = np.array([
+        [q @ c / max(np.linalg.norm(q) * np.linalg.norm(c), 1e-12) for c in candidates] for q in queries
+    ])
+    np.testing.assert_allclose(cosine_similarity_matrix(queries, candidates), expected, atol=1e-5)
+    with pytest.raises(SpeakerStoreError):
+        cosine_similarity_matrix(queries, np.ones((2, DIM + 1)))
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
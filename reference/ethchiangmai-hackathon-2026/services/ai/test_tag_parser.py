@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# test_tag_parser.py - SenseVoice 标签解析测试
+"""
+验证单次扫描的标签解析: 分段规则、整体计数、文本偏移, 以及与 "去掉全部标签后规整空白" 的旧实现一致
+
+用法:
+    python -m pytest test_tag_parser.py
+"""
+
+import random
+import re
+import sys
+
+import pytest
+
+from tag_parser import UNKNOWN, TagParser, annotate_spans
+
+EMOTIONS = {"<|HAPPY|>": "HAPPY", "<|SAD|>": "SAD", "<|NEUTRAL|>": "NEUTRAL"}
+EVENTS = {"<|Speech|>": "speech", "<|BGM|>": "bgm", "<|Applause|>": "applause", "<|Laughter|>": "laughter"}
+LANGUAGES = {"<|zh|>": "zh", "<|en|>": "en"}
+
+PARSER = TagParser(EMOTIONS, EVENTS, LANGUAGES)
+
+# 旧版 EmotionAnalyzer._clean_text 的去标签正则
+LEGACY_TAG = re.compile(r"<\|[^>]+\|>")
+
+
+def _legacy_clean_text(raw: str) -> str:
+    return " ".join(LEGACY_TAG.sub("", raw).split())
+
+
+def test_segments_and_totals():
+    raw = (
+        "<|zh|><|HAPPY|><|Speech|><|withitn|>今天很开心。"
+        "<|en|><|NEUTRAL|><|BGM|><|Applause|><|woitn|>then it rained"
+        "<|zh|><|HAPPY|><|Laughter|><|withitn|>哈哈"
+    )
+    parsed = PARSER.parse(raw)
+    assert parsed.text == "今天很开心。then it rained哈哈"
+    assert parsed.emotion_counts == {"HAPPY": 2, "NEUTRAL": 1}
+    assert parsed.languages == {"zh", "en"}
+    assert parsed.events == {"speech", "bgm", "applause", "laughter"}
+
+    first, second, third = parsed.segments
+    assert (first["language"], first["emotion"], first["events"]) == ("zh", "HAPPY", [])
+    assert (second["language"], second["emotion"], second["events"]) == ("en", "NEUTRAL", ["bgm", "applause"])
+    assert third["events"] == ["laughter"]
+    for segment in parsed.segments:
+        assert parsed.text[segment["text_start"]:segment["text_end"]] == segment["text"]
+
+
+def test_repeated_tag_starts_new_segment_without_text():
+    parsed = PARSER.parse("<|zh|><|SAD|><|zh|><|HAPPY|>好")
+    assert [s["emotion"] for s in parsed.segments] == ["SAD", "HAPPY"]
+    assert parsed.segments[0]["text"] == ""
+
+
+def test_untagged_and_unknown_tags():
+    parsed = PARSER.parse("hello <|EMO_UNKNOWN|><|Event_UNK|><|xx|>world")
+    assert parsed.text == "hello world"
+    assert parsed.segments[0]["language"] == UNKNOWN
+    assert parsed.emotion_counts == {}
+    assert PARSER.parse("").segments == []
+
+
+def test_tags_containing_separators_are_stripped_like_legacy():
+    for raw in ["hi <|a|b|> there", "x<|<|HAPPY|>y", "a <|b<c|> d", "<|zh|><|HAPPY|>a|b <c> |>"]:
+        assert PARSER.parse(raw).text == _legacy_clean_text(raw), raw
+    assert PARSER.parse("hi <|a|b|> there").text == "hi there"
+
+
+def _random_output(rng):
+    tags = list(EMOTIONS) + list(EVENTS) + list(LANGUAGES) + [
+        "<|withitn|>", "<|nospeech|>", "<|foo|>", "<|a|b|>", "<|x<y|>", "<||>"
+    ]
+    texts = ["", " ", "好的", " ok  then ", "\n", "天气 不错 ", "<|", "|>", "|", "<", ">", "a|b"]
+    return "".join(rng.choice(tags) if rng.random() < 0.6 else rng.choice(texts) for _ in range(rng.randint(0, 30)))
+
+
+def test_text_matches_legacy_strip():
+    rng = random.Random(0)
+    for _ in range(2000):
+        raw = _random_output(rng)
+        parsed = PARSER.parse(raw)
+        assert parsed.text == _legacy_clean_text(raw), raw
+        for segment in parsed.segments:
+            assert parsed.text[segment["text_start"]:segment["text_end"]] == segment["text"]
+
+
+def test_annotate_spans():
+    segments = PARSER.parse("<|zh|><|HAPPY|>一<|zh|><|SAD|>二<|en|><|NEUTRAL|>three").segments
+    assert annotate_spans(segments, [(0.0, 1.234, 2), (1.234, 3.0, 1)])
+    assert [(s["start_s"], s["end_s"]) for s in segments] == [(0.0, 1.23), (0.0, 1.23), (1.23, 3.0)]
+    # 段数不一致时不修改
+    fresh = PARSER.parse("<|zh|><|HAPPY|>一").segments
+    assert not annotate_spans(fresh, [(0.0, 1.0, 2)])
+    assert "start_s" not in fresh[0]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
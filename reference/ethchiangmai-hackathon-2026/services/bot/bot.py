@@ -781,7 +781,7 @@ async def handle_voice_test(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         async with httpx.AsyncClient(timeout=60.0) as client:
             with open(file_path, "rb") as f:
-                 resp = await client.post("http://127.0.0.1:8001/voiceprint", files={"audio": f})
+                 resp = await client.post("http://127.0.0.1:8001/voiceprint?encoding=f16", files={"audio": f})
             
             if resp.status_code != 200:
                 raise Exception(f"AI Service Error: {resp.text}")